@@ -8,14 +8,29 @@ import cv2
 import numpy as np
 import logging
 from datetime import datetime
+from typing import Union
+from urllib.parse import urlsplit, urlunsplit
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def redact_source(source: Union[int, str]) -> Union[int, str]:
+    """Camera source safe to log: stream URLs lose their user:password"""
+    if not isinstance(source, str) or '://' not in source:
+        return source
+    parts = urlsplit(source)
+    if parts.username is None and parts.password is None:
+        return source
+    host = parts.hostname or ''
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    return urlunsplit(parts._replace(netloc=f"***@{host}"))
+
 class CameraManager:
     """Manages camera operations and image capture"""
     
-    def __init__(self, camera_index: int = 0):
+    def __init__(self, camera_index: Union[int, str] = 0):
+        # A device index, or a video file path / stream URL (e.g. RTSP)
         self.camera_index = camera_index
         self.camera = None
         self.is_connected = False
@@ -25,10 +40,10 @@ class CameraManager:
         try:
             self.camera = cv2.VideoCapture(self.camera_index)
             if not self.camera.isOpened():
-                logger.error(f"Failed to open camera at index {self.camera_index}")
+                logger.error(f"Failed to open camera at index {redact_source(self.camera_index)}")
                 return False
             self.is_connected = True
-            logger.info(f"Successfully connected to camera {self.camera_index}")
+            logger.info(f"Successfully connected to camera {redact_source(self.camera_index)}")
             return True
         except Exception as e:
             logger.error(f"Error connecting to camera: {e}")
@@ -40,6 +55,12 @@ class CameraManager:
             self.camera.release()
             self.is_connected = False
     
+    def get_fps(self) -> float:
+        """Frame rate reported by the device or file (0.0 if unknown)"""
+        if not self.is_connected:
+            return 0.0
+        return self.camera.get(cv2.CAP_PROP_FPS) or 0.0
+    
     def capture_image(self, save_path: str = None) -> np.ndarray:
         """Capture a single image from camera"""
         if not self.is_connected:
@@ -1,11 +1,12 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from django.utils import timezone
 from django.contrib.admin import AdminSite
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.views import LogoutView
 from django.urls import path, reverse
-from .models import Bin, DumpingSpot, Truck, SensorData, Camera, CameraImage
+from .models import Bin, DumpingSpot, Truck, TruckPosition, GeofenceEvent, SensorData, SensorLatest, SensorAlert, RuleAlert, CollectionEvent, DumpingSpotLoad, LoginAttempt, Camera, CameraImage, ImageUploadJob
 
 User = get_user_model()
 
@@ -30,7 +31,7 @@ class SmartWasteAdminSite(AdminSite):
         bin_count = Bin.objects.count()
         truck_count = Truck.objects.count()
         dumping_spot_count = DumpingSpot.objects.count()
-        sensor_count = SensorData.objects.count()
+        sensor_count = SensorLatest.objects.count()
         
         # Calculate additional statistics
         from django.db.models import Avg, Count, Q
@@ -49,17 +50,11 @@ class SmartWasteAdminSite(AdminSite):
         # Dumping spot statistics
         total_capacity = DumpingSpot.objects.aggregate(total=Avg('total_capacity'))['total'] or 0
         
-        # Calculate average fill level manually since it's a method
-        dumping_spots = DumpingSpot.objects.all()
-        total_fill_level = 0
-        spot_count = dumping_spots.count()
-        for spot in dumping_spots:
-            total_fill_level += spot.current_fill_level()
-        avg_fill_level_spots = total_fill_level / spot_count if spot_count > 0 else 0
+        avg_fill_level_spots = DumpingSpot.objects.aggregate(avg_fill=Avg('fill_level'))['avg_fill'] or 0
         
-        # Sensor statistics
-        recent_sensors = SensorData.objects.filter(timestamp__gte=datetime.now() - timedelta(hours=1)).count()
-        online_sensors = SensorData.objects.filter(sensor_status='ONLINE').count()
+        # Sensor statistics (one row per sensor, not the reading history)
+        recent_sensors = SensorLatest.objects.filter(last_seen__gte=timezone.now() - timedelta(hours=1)).count()
+        online_sensors = SensorLatest.objects.filter(sensor_status='ONLINE').count()
         
         # Recent activity (last 7 days)
         week_ago = datetime.now() - timedelta(days=7)
@@ -128,6 +123,7 @@ class BinAdmin(admin.ModelAdmin):
 class DumpingSpotAdmin(admin.ModelAdmin):
     list_display = ('spot_id', 'latitude', 'longitude', 'total_capacity', 'current_fill_level', 'organic_percentage', 'plastic_percentage', 'metal_percentage')
     list_filter = ('total_capacity',)
+    readonly_fields = ('fill_level',)
     search_fields = ('spot_id',)
     ordering = ('spot_id',)
     
@@ -139,13 +135,14 @@ class DumpingSpotAdmin(admin.ModelAdmin):
             'fields': ('latitude', 'longitude')
         }),
         ('Current Content', {
-            'fields': ('organic_content', 'plastic_content', 'metal_content')
+            'fields': ('organic_content', 'plastic_content', 'metal_content', 'fill_level')
             }),
     )
     
     def current_fill_level(self, obj):
         return f"{obj.current_fill_level():.1f}%"
     current_fill_level.short_description = 'Fill Level'
+    current_fill_level.admin_order_field = 'fill_level'
     
     def organic_percentage(self, obj):
         return f"{obj.organic_percentage():.1f}%"
@@ -163,7 +160,7 @@ class TruckAdmin(admin.ModelAdmin):
     list_display = ('truck_id', 'driver_name', 'status', 'fuel_level', 'current_location', 'last_updated')
     list_filter = ('status', 'fuel_level', 'last_updated')
     search_fields = ('truck_id', 'driver_name')
-    readonly_fields = ('last_updated',)
+    readonly_fields = ('last_updated', 'track_compacted_until')
     ordering = ('truck_id',)
     
     fieldsets = (
@@ -177,7 +174,7 @@ class TruckAdmin(admin.ModelAdmin):
             'fields': ('fuel_level',)
         }),
         ('Timestamps', {
-            'fields': ('last_updated',),
+            'fields': ('last_updated', 'track_compacted_until'),
             'classes': ('collapse',)
         }),
     )
@@ -248,11 +245,146 @@ class SensorDataAdmin(admin.ModelAdmin):
         """Allow deletion for data cleanup"""
         return True
 
+class SensorLatestAdmin(admin.ModelAdmin):
+    """
+    Health overview: the latest state of each sensor, one row per device
+    """
+    list_display = ('sensor_id', 'bin_id', 'get_sensor_health', 'sensor_status', 'battery_level', 'signal_strength', 'fill_level', 'last_seen')
+    list_filter = ('sensor_status', 'last_seen')
+    search_fields = ('sensor_id', 'bin_id')
+    ordering = ('sensor_id',)
+    
+    def get_sensor_health(self, obj):
+        health = obj.get_sensor_health()
+        color = {'Healthy': 'green', 'Online': 'orange', 'Maintenance': 'gray'}.get(health, 'red')
+        return format_html('<span style="color: {}; font-weight: bold;">{}</span>', color, health)
+    get_sensor_health.short_description = 'Health'
+    
+    def has_add_permission(self, request):
+        """Maintained from incoming readings"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class SensorAlertAdmin(admin.ModelAdmin):
+    """
+    Anomalies flagged at ingestion; open alerts have no resolved time
+    """
+    list_display = ('sensor_id', 'bin_id', 'kind', 'get_severity', 'message', 'occurrences', 'created_at', 'updated_at', 'resolved_at')
+    list_filter = ('kind', 'severity', ('resolved_at', admin.EmptyFieldListFilter), 'created_at')
+    search_fields = ('sensor_id', 'bin_id', 'message')
+    readonly_fields = ('sensor_id', 'bin_id', 'kind', 'severity', 'value', 'message', 'reading_id', 'occurrences', 'created_at', 'updated_at')
+    ordering = ('-created_at',)
+    
+    def get_severity(self, obj):
+        color = 'red' if obj.severity == 'CRITICAL' else 'orange'
+        return format_html('<span style="color: {}; font-weight: bold;">{}</span>', color, obj.get_severity_display())
+    get_severity.short_description = 'Severity'
+    
+    def has_add_permission(self, request):
+        """Alerts are raised by the detector"""
+        return False
+
+class RuleAlertAdmin(admin.ModelAdmin):
+    """
+    Alerts raised by the rule engine on bin, dumping spot and sensor changes
+    """
+    list_display = ('rule', 'entity_type', 'entity_id', 'get_severity', 'message', 'triggered_at')
+    list_filter = ('rule', 'entity_type', 'severity', 'triggered_at')
+    search_fields = ('entity_id', 'message')
+    readonly_fields = ('rule', 'severity', 'entity_type', 'entity_id', 'message', 'value', 'triggered_at')
+    ordering = ('-triggered_at',)
+    
+    def get_severity(self, obj):
+        color = 'red' if obj.severity == 'CRITICAL' else 'orange'
+        return format_html('<span style="color: {}; font-weight: bold;">{}</span>', color, obj.get_severity_display())
+    get_severity.short_description = 'Severity'
+    
+    def has_add_permission(self, request):
+        """Alerts are raised by the rule engine"""
+        return False
+
+class TruckPositionAdmin(admin.ModelAdmin):
+    """
+    GPS fixes of the trucks; tracks are replayed through /api/trucks/{id}/track/
+    """
+    list_display = ('truck', 'timestamp', 'latitude', 'longitude', 'speed', 'heading')
+    list_filter = ('truck', 'timestamp')
+    search_fields = ('truck__truck_id',)
+    readonly_fields = ('truck', 'timestamp', 'latitude', 'longitude', 'speed', 'heading')
+    list_select_related = ('truck',)
+    ordering = ('-timestamp',)
+    
+    def has_add_permission(self, request):
+        """Fixes are sent by the trucks"""
+        return False
+
+class GeofenceEventAdmin(admin.ModelAdmin):
+    """
+    Trucks entering, staying at and leaving bin and dumping spot fences
+    """
+    list_display = ('truck', 'event', 'fence_type', 'fence_id', 'timestamp')
+    list_filter = ('event', 'fence_type', 'truck', 'timestamp')
+    search_fields = ('truck__truck_id', 'fence_id')
+    readonly_fields = ('truck', 'fence_type', 'fence_id', 'event', 'timestamp', 'latitude', 'longitude')
+    list_select_related = ('truck',)
+    ordering = ('-timestamp',)
+    
+    def has_add_permission(self, request):
+        """Events are derived from the GPS fixes"""
+        return False
+
+class CollectionEventAdmin(admin.ModelAdmin):
+    """
+    Bin collections detected from fill drops in the sensor data
+    """
+    list_display = ('bin_id', 'collected_at', 'fill_before', 'fill_after', 'truck', 'truck_distance_m', 'sensor_id')
+    list_filter = ('collected_at', ('truck', admin.EmptyFieldListFilter))
+    search_fields = ('bin_id', 'sensor_id', 'truck__truck_id')
+    readonly_fields = ('bin_id', 'sensor_id', 'reading_id', 'truck', 'truck_distance_m', 'fill_before', 'fill_after', 'collected_at', 'created_at')
+    list_select_related = ('truck',)
+    ordering = ('-collected_at',)
+    
+    def has_add_permission(self, request):
+        """Collections are detected from sensor data"""
+        return False
+
+class LoginAttemptAdmin(admin.ModelAdmin):
+    """
+    Login audit log written by the authentication backend
+    """
+    list_display = ('timestamp', 'username', 'ip_address', 'success')
+    list_filter = ('success', 'timestamp')
+    search_fields = ('username', 'ip_address')
+    readonly_fields = ('username', 'ip_address', 'success', 'timestamp')
+    ordering = ('-id',)
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        """Attempts are logged at login"""
+        return False
+
+class DumpingSpotLoadAdmin(admin.ModelAdmin):
+    """
+    Collections unloaded at dumping spots, split by waste type
+    """
+    list_display = ('spot', 'unloaded_at', 'volume', 'organic', 'plastic', 'metal', 'truck', 'collection_event')
+    list_filter = ('unloaded_at', 'spot')
+    search_fields = ('spot__spot_id', 'truck__truck_id', 'collection_event__bin_id')
+    readonly_fields = ('spot', 'collection_event', 'truck', 'organic', 'plastic', 'metal', 'volume', 'unloaded_at')
+    list_select_related = ('spot', 'truck', 'collection_event')
+    ordering = ('-unloaded_at',)
+
+    def has_add_permission(self, request):
+        """Loads are accounted when trucks unload"""
+        return False
+
 @admin.register(Camera)
 class CameraAdmin(admin.ModelAdmin):
     """Admin interface for Camera model"""
     list_display = ['camera_id', 'name', 'camera_type', 'location', 'status', 'total_images', 'last_maintenance', 'created_at']
-    list_filter = ['camera_type', 'status', 'created_at']
+    list_filter = ['camera_type', 'status', 'change_gating', 'created_at']
     search_fields = ['camera_id', 'name', 'location']
     readonly_fields = ['created_at', 'updated_at', 'total_images']
     ordering = ['-created_at']
@@ -264,6 +396,10 @@ class CameraAdmin(admin.ModelAdmin):
         ('Status & Configuration', {
             'fields': ('status', 'ip_address', 'rtsp_url')
         }),
+        ('Frame Change Gating', {
+            'fields': ('change_gating', 'change_threshold', 'unchanged_keep_interval'),
+            'description': 'Controls how uploaded frames showing an unchanged scene are stored.'
+        }),
         ('Maintenance', {
             'fields': ('last_maintenance',)
         }),
@@ -273,18 +409,25 @@ class CameraAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """Count images in the changelist query instead of once per row"""
+        from django.db.models import Count
+        return super().get_queryset(request).annotate(image_count=Count('images'))
+    
     def total_images(self, obj):
         """Display total number of images"""
-        return obj.images.count()
+        return obj.image_count
     total_images.short_description = 'Total Images'
+    total_images.admin_order_field = 'image_count'
 
 @admin.register(CameraImage)
 class CameraImageAdmin(admin.ModelAdmin):
     """Admin interface for CameraImage model with enhanced upload capabilities"""
-    list_display = ['id', 'camera', 'thumb', 'analysis_type', 'file_size_mb', 'dimensions', 'is_analyzed', 'created_at']
-    list_filter = ['camera', 'analysis_type', 'is_analyzed', 'created_at']
+    list_display = ['id', 'camera', 'thumb', 'analysis_type', 'file_size_mb', 'dimensions', 'processing_status', 'deduplicated', 'is_analyzed', 'created_at']
+    list_filter = ['camera', 'analysis_type', 'processing_status', 'storage_tier', 'deduplicated', 'is_analyzed', 'created_at']
+    list_select_related = ['camera']
     search_fields = ['camera__name', 'camera__camera_id']
-    readonly_fields = ['created_at', 'file_size_mb', 'dimensions', 'image_url', 'thumbnail_url', 'image_preview', 'thumbnail_preview']
+    readonly_fields = ['created_at', 'file_size_mb', 'dimensions', 'content_hash', 'deduplicated', 'duplicate_of', 'image_url', 'thumbnail_url', 'image_preview', 'thumbnail_preview', 'processing_status', 'storage_tier', 'archive_name']
     ordering = ['-created_at']
     actions = ['bulk_upload_images']
     
@@ -297,25 +440,27 @@ class CameraImageAdmin(admin.ModelAdmin):
         return super().get_form(request, obj, **kwargs)
     
     def changelist_view(self, request, extra_context=None):
-        """Add bulk upload link to changelist"""
+        """Add bulk upload link and deduplication savings to changelist"""
+        from .image_dedup import storage_savings
         extra_context = extra_context or {}
         extra_context['bulk_upload_url'] = reverse('admin:core_cameraimage_bulk_upload')
+        extra_context['storage_savings'] = storage_savings()
         return super().changelist_view(request, extra_context=extra_context)
     
     fieldsets = (
         ('Image Upload', {
             'fields': ('camera', 'image', 'image_preview'),
-            'description': '📸 Upload images directly from your computer. Images will be automatically resized and thumbnails created.'
+            'description': '📸 Upload images directly from your computer. Thumbnails and a medium WebP variant are created in the background.'
         }),
         ('Image Information', {
-            'fields': ('thumbnail', 'thumbnail_preview', 'analysis_type', 'confidence_score', 'is_analyzed')
+            'fields': ('thumbnail', 'thumbnail_preview', 'medium', 'processing_status', 'analysis_type', 'confidence_score', 'is_analyzed')
         }),
         ('Analysis Results', {
             'fields': ('detected_objects', 'analysis_result', 'metadata'),
             'classes': ('collapse',)
         }),
         ('File Details', {
-            'fields': ('file_size_mb', 'dimensions', 'image_url', 'thumbnail_url'),
+            'fields': ('file_size_mb', 'dimensions', 'content_hash', 'deduplicated', 'duplicate_of', 'storage_tier', 'archive_name', 'image_url', 'thumbnail_url'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -324,6 +469,15 @@ class CameraImageAdmin(admin.ModelAdmin):
         }),
     )
     
+    def save_model(self, request, obj, form, change):
+        """Recompute stored file info when the image is replaced"""
+        if change and 'image' in form.changed_data:
+            obj.content_hash = ''
+            # A newly uploaded file starts over as a loose original
+            obj.storage_tier = 'ORIGINAL'
+            obj.archive_name = ''
+        super().save_model(request, obj, form, change)
+    
     def file_size_mb(self, obj):
         """Display file size in MB"""
         return f"{obj.get_file_size_mb()} MB"
@@ -395,6 +549,8 @@ class CameraImageAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('bulk-upload/', self.admin_site.admin_view(self.bulk_upload_view), name='core_cameraimage_bulk_upload'),
+            path('bulk-upload/<int:job_id>/', self.admin_site.admin_view(self.bulk_upload_progress_view), name='core_cameraimage_bulk_upload_progress'),
+            path('bulk-upload/<int:job_id>/status/', self.admin_site.admin_view(self.bulk_upload_status_view), name='core_cameraimage_bulk_upload_status'),
         ]
         return custom_urls + urls
     
@@ -408,13 +564,15 @@ class CameraImageAdmin(admin.ModelAdmin):
             form = BulkImageUploadForm(request.POST, request.FILES)
             if form.is_valid():
                 try:
-                    created_images = form.save()
+                    job = form.save(user=request.user)
                     messages.success(
                         request, 
-                        f"✅ Successfully uploaded {len(created_images)} images! "
-                        f"All images have been processed and thumbnails created."
+                        f"✅ Successfully uploaded {job.stored_files} images! "
+                        f"Thumbnails will be generated in the background."
                     )
-                    return redirect('admin:core_cameraimage_changelist')
+                    if job.failed_files:
+                        messages.warning(request, f"⚠️ {job.failed_files} file(s) could not be stored.")
+                    return redirect('admin:core_cameraimage_bulk_upload_progress', job_id=job.id)
                 except Exception as e:
                     messages.error(request, f"❌ Error uploading images: {str(e)}")
         else:
@@ -429,12 +587,43 @@ class CameraImageAdmin(admin.ModelAdmin):
         }
         
         return render(request, 'admin/core/cameraimage/bulk_upload.html', context)
+    
+    def bulk_upload_progress_view(self, request, job_id):
+        """Progress page for a bulk upload; polls the status endpoint"""
+        from django.shortcuts import render, get_object_or_404
+        
+        job = get_object_or_404(ImageUploadJob, pk=job_id)
+        context = {
+            'job': job,
+            'progress': job.get_progress(),
+            'title': 'Bulk Upload Progress',
+            'has_permission': True,
+            'site_title': self.admin_site.site_title,
+            'site_header': self.admin_site.site_header,
+        }
+        return render(request, 'admin/core/cameraimage/bulk_upload_progress.html', context)
+    
+    def bulk_upload_status_view(self, request, job_id):
+        """JSON progress of a bulk upload"""
+        from django.http import JsonResponse
+        from django.shortcuts import get_object_or_404
+        
+        job = get_object_or_404(ImageUploadJob, pk=job_id)
+        return JsonResponse(job.get_progress())
 
 # Register models with custom admin site
 admin_site.register(Bin, BinAdmin)
 admin_site.register(DumpingSpot, DumpingSpotAdmin)
 admin_site.register(Truck, TruckAdmin)
+admin_site.register(TruckPosition, TruckPositionAdmin)
+admin_site.register(GeofenceEvent, GeofenceEventAdmin)
 admin_site.register(SensorData, SensorDataAdmin)
+admin_site.register(SensorLatest, SensorLatestAdmin)
+admin_site.register(SensorAlert, SensorAlertAdmin)
+admin_site.register(RuleAlert, RuleAlertAdmin)
+admin_site.register(CollectionEvent, CollectionEventAdmin)
+admin_site.register(DumpingSpotLoad, DumpingSpotLoadAdmin)
+admin_site.register(LoginAttempt, LoginAttemptAdmin)
 admin_site.register(Camera, CameraAdmin)
 admin_site.register(CameraImage, CameraImageAdmin)
 
@@ -0,0 +1,316 @@
+"""
+Alert rules evaluated on change events.
+
+Pollers turn each fresh snapshot of bins, dumping spots or sensor states
+into ChangeEvents with a ChangeTracker. Only entities whose watched fields
+changed produce an event, so evaluation cost follows the rate of change,
+not the number of bins. The RuleEngine runs the rules for each event's
+entity type, applies a per-rule dedup window and hands the alerts to
+pluggable sinks (log, webhook, database).
+
+Rules keep a small state dict per entity, e.g. the hysteresis flag or the
+last value, so one engine instance must live as long as the poller.
+
+Nothing here needs Django except DatabaseSink, so the standalone updater
+script can use the engine with the log sink.
+"""
+
+import json
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+ChangeEvent = namedtuple('ChangeEvent', 'entity_type entity_id previous current timestamp')
+Alert = namedtuple('Alert', 'rule severity entity_type entity_id message value timestamp')
+
+
+class ChangeTracker:
+    """Keeps the last snapshot of each entity and reports the ones that changed"""
+
+    def __init__(self, entity_type, key, fields, derive=None):
+        self.entity_type = entity_type
+        self.key = key
+        self.fields = tuple(fields)
+        # Optional function adding computed fields (e.g. a fill percentage) to a row
+        self.derive = derive
+        self.snapshot = {}
+
+    def diff(self, rows, timestamp=None):
+        timestamp = timestamp or time.time()
+        events = []
+        for row in rows:
+            entity_id = row.get(self.key)
+            if entity_id is None:
+                continue
+            current = {field: row.get(field) for field in self.fields}
+            if self.derive:
+                current.update(self.derive(row))
+            previous = self.snapshot.get(entity_id)
+            if previous != current:
+                self.snapshot[entity_id] = current
+                events.append(ChangeEvent(self.entity_type, entity_id, previous, current, timestamp))
+        return events
+
+
+class Rule:
+    """Base rule; subclasses implement check() and may keep per-entity state"""
+
+    entity_type = None
+
+    def __init__(self, name, entity_type, severity='WARNING', dedup_seconds=3600):
+        self.name = name
+        self.entity_type = entity_type
+        self.severity = severity
+        # Repeats of this rule for the same entity within the window are dropped
+        self.dedup_seconds = dedup_seconds
+
+    def check(self, event, state):
+        """Return (message, value) to raise an alert, or None"""
+        raise NotImplementedError
+
+
+class ThresholdRule(Rule):
+    """
+    Fires when a field crosses raise_at, then stays quiet until it has come
+    back past clear_at (hysteresis), so a value hovering at the threshold
+    does not flap.
+    """
+
+    def __init__(self, name, entity_type, field, raise_at, clear_at, above=True, label=None, **kwargs):
+        super().__init__(name, entity_type, **kwargs)
+        self.field = field
+        self.raise_at = raise_at
+        self.clear_at = clear_at
+        self.above = above
+        self.label = label or field.replace('_', ' ')
+
+    def check(self, event, state):
+        value = event.current.get(self.field)
+        if value is None:
+            return None
+        if self.above:
+            crossed, cleared = value >= self.raise_at, value <= self.clear_at
+        else:
+            crossed, cleared = value <= self.raise_at, value >= self.clear_at
+        if state.get('active'):
+            if cleared:
+                state['active'] = False
+            return None
+        if crossed:
+            state['active'] = True
+            return f"{self.label} {value:.1f} {'above' if self.above else 'below'} {self.raise_at}", value
+        return None
+
+
+class RateOfChangeRule(Rule):
+    """Fires when a field rises faster than max_per_minute between two observations"""
+
+    def __init__(self, name, entity_type, field, max_per_minute, label=None, **kwargs):
+        super().__init__(name, entity_type, **kwargs)
+        self.field = field
+        self.max_per_minute = max_per_minute
+        self.label = label or field.replace('_', ' ')
+
+    def check(self, event, state):
+        value = event.current.get(self.field)
+        last = state.get('last')
+        state['last'] = (value, event.timestamp)
+        if value is None or last is None or last[0] is None:
+            return None
+        minutes = max(event.timestamp - last[1], 1.0) / 60.0
+        rate = (value - last[0]) / minutes
+        if rate > self.max_per_minute:
+            return f"{self.label} rising {rate:.1f}/min (limit {self.max_per_minute}/min)", rate
+        return None
+
+
+class TimeToFullRule(Rule):
+    """
+    Projects when a bin will be full from an EWMA of its fill rate and fires
+    when that is less than horizon_minutes away, once min_samples rises have
+    been seen. A drop in fill (the bin was emptied) resets the estimate.
+    """
+
+    def __init__(self, name, entity_type, horizon_minutes=60, field='fill_level', alpha=0.3, min_samples=3,
+                 **kwargs):
+        super().__init__(name, entity_type, **kwargs)
+        self.horizon_minutes = horizon_minutes
+        self.field = field
+        self.alpha = alpha
+        self.min_samples = min_samples
+
+    def check(self, event, state):
+        value = event.current.get(self.field)
+        last = state.get('last')
+        state['last'] = (value, event.timestamp)
+        if value is None or last is None or last[0] is None:
+            return None
+        if value < last[0]:
+            state.pop('rate', None)
+            state['samples'] = 0
+            state['active'] = False
+            return None
+        minutes = max(event.timestamp - last[1], 1.0) / 60.0
+        rate = (value - last[0]) / minutes
+        state['rate'] = rate if 'rate' not in state else state['rate'] + self.alpha * (rate - state['rate'])
+        state['samples'] = state.get('samples', 0) + 1
+        if state['samples'] < self.min_samples or state['rate'] <= 0 or value >= 100:
+            return None
+        minutes_to_full = (100 - value) / state['rate']
+        if minutes_to_full > self.horizon_minutes * 1.5:
+            state['active'] = False
+        elif minutes_to_full <= self.horizon_minutes and not state.get('active'):
+            state['active'] = True
+            return f"full in about {minutes_to_full:.0f} min at {state['rate']:.2f}%/min", minutes_to_full
+        return None
+
+
+class LogSink:
+    """Writes alerts to the log"""
+
+    def __init__(self, log=None):
+        self.log = log or logger
+
+    def emit(self, alerts):
+        for alert in alerts:
+            level = logging.ERROR if alert.severity == 'CRITICAL' else logging.WARNING
+            self.log.log(level, f"🚨 [{alert.rule}] {alert.entity_type} {alert.entity_id}: {alert.message}")
+
+
+class WebhookSink:
+    """POSTs each batch of alerts as JSON (see the alert_webhook_stub command for a local receiver)"""
+
+    def __init__(self, url, timeout=(3.05, 5), session=None):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def emit(self, alerts):
+        payload = {'alerts': [
+            dict(alert._asdict(), timestamp=datetime.fromtimestamp(alert.timestamp, dt_timezone.utc).isoformat())
+            for alert in alerts
+        ]}
+        response = self.session.post(self.url, data=json.dumps(payload),
+                                     headers={'Content-Type': 'application/json'}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class DatabaseSink:
+    """Stores alerts as RuleAlert rows"""
+
+    def emit(self, alerts):
+        from .models import RuleAlert
+
+        RuleAlert.objects.bulk_create([
+            RuleAlert(
+                rule=alert.rule,
+                severity=alert.severity,
+                entity_type=alert.entity_type,
+                entity_id=str(alert.entity_id),
+                message=alert.message[:200],
+                value=alert.value,
+                triggered_at=datetime.fromtimestamp(alert.timestamp, dt_timezone.utc),
+            )
+            for alert in alerts
+        ])
+
+
+class RuleEngine:
+    """Evaluates rules on change events, deduplicates, and fans alerts out to sinks"""
+
+    def __init__(self, rules, sinks):
+        self.rules = {}
+        for rule in rules:
+            self.rules.setdefault(rule.entity_type, []).append(rule)
+        self.sinks = list(sinks)
+        self.state = {}
+        self.last_emitted = {}
+        self.stats = {'events': 0, 'alerts': 0, 'suppressed': 0, 'sink_errors': 0}
+
+    def evaluate(self, events):
+        alerts = []
+        for event in events:
+            self.stats['events'] += 1
+            for rule in self.rules.get(event.entity_type, ()):
+                key = (rule.name, event.entity_id)
+                result = rule.check(event, self.state.setdefault(key, {}))
+                if result is None:
+                    continue
+                last = self.last_emitted.get(key)
+                if last is not None and event.timestamp - last < rule.dedup_seconds:
+                    self.stats['suppressed'] += 1
+                    continue
+                self.last_emitted[key] = event.timestamp
+                message, value = result
+                alerts.append(Alert(rule.name, rule.severity, event.entity_type, event.entity_id,
+                                    message, value, event.timestamp))
+        if alerts:
+            self.stats['alerts'] += len(alerts)
+            for sink in self.sinks:
+                try:
+                    sink.emit(alerts)
+                except Exception as e:
+                    # One failing sink must not stop the others or the poller
+                    self.stats['sink_errors'] += 1
+                    logger.error(f"❌ Alert sink {type(sink).__name__} failed: {e}")
+        return alerts
+
+
+def dumping_spot_fill(row):
+    if row.get('fill_level') is not None:
+        return {'fill_percentage': row['fill_level']}
+    content = sum(row.get(field) or 0 for field in ('organic_content', 'plastic_content', 'metal_content'))
+    capacity = row.get('total_capacity') or 0
+    return {'fill_percentage': content / capacity * 100 if capacity else 0.0}
+
+
+def default_trackers():
+    """Change trackers for the entity types the default rules watch"""
+    return {
+        'bin': ChangeTracker('bin', 'bin_id', ['fill_level']),
+        'dumping_spot': ChangeTracker(
+            'dumping_spot', 'spot_id', ['organic_content', 'plastic_content', 'metal_content', 'total_capacity'],
+            derive=dumping_spot_fill
+        ),
+        'sensor': ChangeTracker('sensor', 'sensor_id', ['battery_level', 'signal_strength', 'sensor_status']),
+    }
+
+
+def default_rules():
+    return [
+        ThresholdRule('bin_full', 'bin', 'fill_level', raise_at=80, clear_at=70, label='fill level'),
+        RateOfChangeRule('bin_fill_rate', 'bin', 'fill_level', max_per_minute=10, dedup_seconds=900,
+                         label='fill level'),
+        TimeToFullRule('bin_time_to_full', 'bin', horizon_minutes=60),
+        ThresholdRule('dumping_spot_capacity', 'dumping_spot', 'fill_percentage', raise_at=90, clear_at=85,
+                      severity='CRITICAL', label='capacity used %'),
+        ThresholdRule('sensor_battery_low', 'sensor', 'battery_level', raise_at=15, clear_at=25, above=False,
+                      label='battery %'),
+        ThresholdRule('sensor_weak_signal', 'sensor', 'signal_strength', raise_at=-85, clear_at=-80, above=False,
+                      label='signal dBm', dedup_seconds=6 * 3600),
+    ]
+
+
+def build_engine(webhook_url=None, database=False, rules=None):
+    """Engine with the log sink plus the optional webhook and database sinks"""
+    sinks = [LogSink()]
+    if webhook_url:
+        sinks.append(WebhookSink(webhook_url))
+    if database:
+        sinks.append(DatabaseSink())
+    return RuleEngine(rules if rules is not None else default_rules(), sinks)
+
+
+def engine_from_settings():
+    """build_engine() with the sinks configured by ALERT_WEBHOOK_URL and ALERT_RULES_DB"""
+    from django.conf import settings
+
+    return build_engine(
+        webhook_url=getattr(settings, 'ALERT_WEBHOOK_URL', ''),
+        database=getattr(settings, 'ALERT_RULES_DB', False),
+    )
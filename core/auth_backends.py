@@ -1,9 +1,7 @@
 import logging
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
-from django.utils import timezone
-from datetime import timedelta
+from .login_throttle import login_throttle
 from .user_management import log_login_attempt
 
 logger = logging.getLogger(__name__)
@@ -22,13 +20,14 @@ class EnhancedAuthenticationBackend(ModelBackend):
         if not username or not password:
             return None
             
-        # Check for IP-based blocking
-        if self._is_ip_blocked(request):
-            logger.warning(f"Login attempt from blocked IP: {self._get_client_ip(request)}")
+        # IP block, account lock and attempt counters in one cache round-trip
+        ip = self._get_client_ip(request)
+        status = login_throttle.status(ip, username)
+        if status['ip_blocked']:
+            logger.warning(f"Login attempt from blocked IP: {ip}")
             return None
             
-        # Check for account lockout
-        if self._is_account_locked(username):
+        if status['account_locked']:
             logger.warning(f"Login attempt for locked account: {username}")
             return None
             
@@ -44,23 +43,20 @@ class EnhancedAuthenticationBackend(ModelBackend):
             # Verify password
             if user.check_password(password):
                 # Reset failed attempts on successful login
-                self._reset_failed_attempts(username, request)
-                ip = self._get_client_ip(request)
+                login_throttle.reset(ip=ip, username=username, now=status['now'])
                 log_login_attempt(username, ip, success=True)
                 logger.info(f"Successful login: {username} from {ip}")
                 return user
             else:
                 # Increment failed attempts
-                self._increment_failed_attempts(username, request)
-                ip = self._get_client_ip(request)
+                self._register_failure(username, ip, status)
                 log_login_attempt(username, ip, success=False)
                 logger.warning(f"Failed login attempt: {username} from {ip}")
                 return None
                 
         except User.DoesNotExist:
             # Don't reveal if user exists or not
-            self._increment_failed_attempts(username, request)
-            ip = self._get_client_ip(request)
+            self._register_failure(username, ip, status)
             log_login_attempt(username, ip, success=False)
             logger.warning(f"Login attempt for non-existent user: {username} from {ip}")
             return None
@@ -74,57 +70,10 @@ class EnhancedAuthenticationBackend(ModelBackend):
             ip = request.META.get('REMOTE_ADDR')
         return ip
         
-    def _get_cache_key(self, identifier, prefix):
-        """Generate cache key for tracking"""
-        return f"{prefix}:{identifier}"
-        
-    def _is_ip_blocked(self, request):
-        """Check if IP is blocked due to too many failed attempts"""
-        ip = self._get_client_ip(request)
-        cache_key = self._get_cache_key(ip, 'ip_blocked')
-        return cache.get(cache_key, False)
-        
-    def _is_account_locked(self, username):
-        """Check if account is locked due to too many failed attempts"""
-        cache_key = self._get_cache_key(username, 'account_locked')
-        return cache.get(cache_key, False)
-        
-    def _increment_failed_attempts(self, username, request):
-        """Increment failed login attempts"""
-        ip = self._get_client_ip(request)
-        
-        # Track IP-based attempts
-        ip_key = self._get_cache_key(ip, 'ip_attempts')
-        ip_attempts = cache.get(ip_key, 0) + 1
-        cache.set(ip_key, ip_attempts, 3600)  # 1 hour
-        
-        # Track user-based attempts
-        user_key = self._get_cache_key(username, 'user_attempts')
-        user_attempts = cache.get(user_key, 0) + 1
-        cache.set(user_key, user_attempts, 3600)  # 1 hour
-        
-        # Block IP if too many attempts
-        if ip_attempts >= 10:
-            cache.set(self._get_cache_key(ip, 'ip_blocked'), True, 3600)  # 1 hour
+    def _register_failure(self, username, ip, status):
+        """Count the failed attempt against the IP and the username, blocking or locking at the limits"""
+        result = login_throttle.register_failure(ip, username, status)
+        if result['ip_blocked']:
             logger.warning(f"IP blocked due to too many failed attempts: {ip}")
-            
-        # Lock account if too many attempts
-        if user_attempts >= 5:
-            cache.set(self._get_cache_key(username, 'account_locked'), True, 1800)  # 30 minutes
+        if result['account_locked']:
             logger.warning(f"Account locked due to too many failed attempts: {username}")
-            
-    def _reset_failed_attempts(self, username, request):
-        """Reset failed attempts on successful login"""
-        ip = self._get_client_ip(request)
-        
-        # Reset IP attempts
-        ip_key = self._get_cache_key(ip, 'ip_attempts')
-        cache.delete(ip_key)
-        
-        # Reset user attempts
-        user_key = self._get_cache_key(username, 'user_attempts')
-        cache.delete(user_key)
-        
-        # Unblock IP and unlock account
-        cache.delete(self._get_cache_key(ip, 'ip_blocked'))
-        cache.delete(self._get_cache_key(username, 'account_locked'))
@@ -0,0 +1,86 @@
+"""
+Shared ingestion path for camera frames.
+
+Every frame, whether it arrives over HTTP from an ESP32-CAM or from the
+local capture service, goes through the same steps: frame-change gating,
+the optional near-duplicate check, and creation of the CameraImage row
+(which deduplicates identical files and queues the derivative pipeline).
+"""
+
+import logging
+
+from .frame_gate import frame_gate
+from .image_dedup import (
+    get_near_duplicate_policy, compute_dhash, find_near_duplicate, share_blob,
+    POLICY_OFF, POLICY_SKIP
+)
+
+logger = logging.getLogger(__name__)
+
+# Ingestion outcomes
+CREATED = 'created'
+DROPPED = 'dropped'
+DUPLICATE = 'duplicate'
+
+
+class IngestResult:
+    """Outcome of ingesting one frame"""
+
+    def __init__(self, outcome, gate, camera_image=None):
+        self.outcome = outcome
+        self.gate = gate
+        # The new row when created, the matching earlier row for a skipped duplicate
+        self.camera_image = camera_image
+
+
+def ingest_frame(camera, image_file, info, analysis_type='WASTE_CLASSIFICATION', metadata=None):
+    """
+    Store one frame for a camera.
+
+    info holds the CameraImage file columns (width, height, byte_size,
+    content_hash) computed while the file was received. The caller owns
+    image_file and is responsible for closing it.
+    """
+    from .models import CameraImage
+
+    # Frame-change gating against the camera's last kept frame
+    gate = frame_gate.evaluate(camera, image_file)
+    if not gate.keep:
+        return IngestResult(DROPPED, gate)
+
+    # Optional near-duplicate check against recent frames from this camera
+    info = dict(info)
+    policy = get_near_duplicate_policy()
+    near_duplicate = None
+    if policy != POLICY_OFF:
+        try:
+            info['perceptual_hash'] = compute_dhash(image_file)
+            near_duplicate = find_near_duplicate(camera, info['perceptual_hash'])
+        except Exception as e:
+            logger.warning(f"Perceptual hash failed for frame from {camera.camera_id}: {e}")
+
+    if near_duplicate and policy == POLICY_SKIP:
+        logger.info(f"Skipped near-duplicate frame from {camera.camera_id} (matches image {near_duplicate.id})")
+        return IngestResult(DUPLICATE, gate, CameraImage.objects.get(pk=near_duplicate.pk))
+
+    camera_image = CameraImage(
+        camera=camera,
+        image=image_file,
+        analysis_type=analysis_type,
+        metadata={
+            **(metadata or {}),
+            'file_size': info['byte_size'],
+            **gate.as_metadata()
+        },
+        **info
+    )
+    if near_duplicate:
+        # Link policy: keep the row but reference the earlier frame's file
+        share_blob(camera_image, near_duplicate)
+        camera_image.duplicate_of = near_duplicate
+        for field in ('width', 'height', 'byte_size', 'content_hash'):
+            setattr(camera_image, field, getattr(near_duplicate, field))
+    camera_image.save()
+
+    # Thumbnail and medium variant are generated by the background image pipeline
+    return IngestResult(CREATED, gate, camera_image)
@@ -0,0 +1,242 @@
+"""
+Multi-camera capture service.
+
+One reader thread per camera keeps pulling frames from its source (a
+device index, a video file or an RTSP URL) through CameraManager, so
+network streams never fall behind, and keeps the most recent frames in a
+bounded ring buffer. At each camera's sampling interval the latest frame
+is handed to a shared worker pool that JPEG-encodes it and pushes it
+through the same ingestion path as ESP32-CAM uploads.
+
+Video files stand in for live cameras: they are paced at their own frame
+rate (or read as fast as possible with realtime=False) and sampled on the
+video timeline, so runs are reproducible.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.utils import timezone
+
+from camera_utils import CameraManager
+from .camera_ingest import ingest_frame
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 2.0
+MAX_RECONNECT_DELAY = 60.0
+
+
+def parse_source(value):
+    """Device indices are given as digits; anything else is a path or URL"""
+    value = str(value).strip()
+    return int(value) if value.isdigit() else value
+
+
+def source_type(source):
+    if isinstance(source, int):
+        return 'device'
+    if '://' in source:
+        return source.split('://', 1)[0].lower()
+    return 'file'
+
+
+class FrameRingBuffer:
+    """Thread-safe, fixed-size buffer of the most recent frames"""
+
+    def __init__(self, capacity):
+        self._frames = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def append(self, frame, captured_at):
+        with self._lock:
+            self._frames.append((frame, captured_at))
+            self.total += 1
+
+    def latest(self):
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def frames(self):
+        with self._lock:
+            return list(self._frames)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._frames)
+
+
+class CameraReader(threading.Thread):
+    """Reads one camera continuously and submits a frame every sample_interval seconds"""
+
+    def __init__(self, service, camera, source, sample_interval, buffer_size, realtime=True, loop=False):
+        super().__init__(name=f'capture-{camera.camera_id}', daemon=True)
+        self.service = service
+        self.camera = camera
+        self.source = source
+        self.sample_interval = sample_interval
+        self.buffer = FrameRingBuffer(buffer_size)
+        self.is_file = isinstance(source, str) and os.path.exists(source)
+        self.realtime = realtime
+        self.loop = loop
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        delay = RECONNECT_DELAY
+        while not self._stop_event.is_set():
+            manager = CameraManager(self.source)
+            if not manager.connect():
+                if self.is_file:
+                    break
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                continue
+            delay = RECONNECT_DELAY
+            try:
+                finished = self._read(manager)
+            finally:
+                manager.disconnect()
+            if finished:
+                break
+            self.service.count(self.camera.camera_id, 'reconnects')
+        logger.info(f"Capture reader for {self.camera.camera_id} stopped")
+
+    def _read(self, manager):
+        """Read until the source ends or fails. Returns True when the reader should exit."""
+        fps = manager.get_fps() if self.is_file else 0.0
+        started = time.monotonic()
+        frames_read = 0
+        next_sample = 0.0
+
+        while not self._stop_event.is_set():
+            frame = manager.capture_image()
+            if frame is None:
+                # End of a video file, or a dropped stream that needs reconnecting
+                return self.is_file and not self.loop
+
+            frames_read += 1
+            if fps:
+                # Sample on the video timeline so files behave like a camera running at their fps
+                clock = frames_read / fps
+                if self.realtime:
+                    ahead = started + clock - time.monotonic()
+                    if ahead > 0:
+                        self._stop_event.wait(ahead)
+            else:
+                clock = time.monotonic() - started
+
+            captured_at = timezone.now()
+            self.buffer.append(frame, captured_at)
+            self.service.count(self.camera.camera_id, 'frames_read')
+
+            if clock >= next_sample:
+                next_sample = clock + self.sample_interval
+                self.service.submit(self, frame, captured_at)
+        return True
+
+
+class CaptureService:
+    """Owns the camera readers and the encode/ingest worker pool"""
+
+    def __init__(self, encode_workers=2, jpeg_quality=85, max_pending=None):
+        self.jpeg_quality = jpeg_quality
+        self.readers = {}
+        self._executor = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix='capture-encode')
+        # Bounded backlog: when encoding falls behind, samples are skipped rather than queued without limit
+        self._pending = threading.BoundedSemaphore(max_pending or encode_workers * 2)
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def add_camera(self, camera, source, sample_interval=10.0, buffer_size=30, realtime=True, loop=False):
+        reader = CameraReader(self, camera, source, sample_interval, buffer_size, realtime=realtime, loop=loop)
+        self.readers[camera.camera_id] = reader
+        return reader
+
+    def start(self):
+        for reader in self.readers.values():
+            reader.start()
+        logger.info(f"Capture service started for {len(self.readers)} camera(s)")
+
+    def is_running(self):
+        return any(reader.is_alive() for reader in self.readers.values())
+
+    def stop(self, timeout=5.0):
+        for reader in self.readers.values():
+            reader.stop()
+        for reader in self.readers.values():
+            reader.join(timeout)
+        # Let frames that were already sampled finish ingesting
+        self._executor.shutdown(wait=True)
+
+    def count(self, camera_id, name, amount=1):
+        with self._stats_lock:
+            self._stats.setdefault(camera_id, Counter())[name] += amount
+
+    def stats(self):
+        with self._stats_lock:
+            return {camera_id: dict(counter) for camera_id, counter in self._stats.items()}
+
+    def submit(self, reader, frame, captured_at):
+        if not self._pending.acquire(blocking=False):
+            self.count(reader.camera.camera_id, 'skipped_backlog')
+            return
+        self.count(reader.camera.camera_id, 'sampled')
+        future = self._executor.submit(self._run_job, reader, frame, captured_at)
+        future.add_done_callback(lambda _: self._pending.release())
+
+    def _run_job(self, reader, frame, captured_at):
+        """Worker thread entry point"""
+        camera_id = reader.camera.camera_id
+        close_old_connections()
+        try:
+            outcome = self.encode_and_ingest(reader, frame, captured_at)
+            self.count(camera_id, outcome)
+        except Exception as e:
+            logger.error(f"Capture ingest failed for {camera_id}: {e}")
+            self.count(camera_id, 'failed')
+        finally:
+            close_old_connections()
+
+    def encode_and_ingest(self, reader, frame, captured_at):
+        camera = reader.camera
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError('JPEG encoding failed')
+        data = encoded.tobytes()
+
+        # The frame is already decoded, so the file columns come for free
+        height, width = frame.shape[:2]
+        info = {
+            'width': width,
+            'height': height,
+            'byte_size': len(data),
+            'content_hash': hashlib.sha256(data).hexdigest(),
+        }
+        image_file = ContentFile(data, name=f'image_{camera.camera_id}_{captured_at.strftime("%Y%m%d_%H%M%S")}.jpg')
+        try:
+            result = ingest_frame(
+                camera, image_file, info,
+                metadata={
+                    'camera_id': camera.camera_id,
+                    'camera_type': camera.camera_type,
+                    'upload_method': 'CAPTURE_SERVICE',
+                    # Never the source itself: stream URLs can carry credentials
+                    'source_type': source_type(reader.source),
+                    'captured_at': captured_at.isoformat(),
+                }
+            )
+        finally:
+            image_file.close()
+        return result.outcome
@@ -0,0 +1,200 @@
+"""
+Detection of bin collections in the sensor data stream.
+
+A collection shows up as a sharp fill drop: the previous reading of the
+bin was at least `min_drop` points higher and the new one is nearly empty.
+Each drop becomes a CollectionEvent, keyed by the reading that showed the
+emptied bin so live detection and backfills never record it twice.
+
+- Live: CollectionDetector.observe() runs inside SensorLatest.record at
+  ingestion, where the sensor's previous fill level is already loaded, and
+  flush() stores the events of the batch.
+- Backfill: backfill() walks the SensorData history in (timestamp, id)
+  chunks and finds the drops of a whole chunk at once with numpy (plain
+  Python when numpy is not installed).
+
+Each event is matched with the nearest truck whose GPS track
+(TruckPosition) passed within `truck_radius_m` of the bin around the time
+of the drop.
+"""
+
+import logging
+import math
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:  # backfill falls back to a plain loop
+    np = None
+
+EARTH_RADIUS_M = 6371000.0
+
+Drop = namedtuple('Drop', 'bin_id sensor_id reading_id fill_before fill_after collected_at latitude longitude')
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters (haversine)"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class CollectionDetector:
+    """Recognizes emptied bins and records them as CollectionEvent rows"""
+
+    def __init__(self, min_drop=None, max_after=None, truck_radius_m=None, truck_window_minutes=None):
+        self.min_drop = min_drop if min_drop is not None else getattr(settings, 'COLLECTION_MIN_DROP', 30.0)
+        # A bin is only emptied if the new level is low, not merely lower
+        self.max_after = max_after if max_after is not None else getattr(settings, 'COLLECTION_MAX_AFTER', 20.0)
+        self.truck_radius_m = truck_radius_m if truck_radius_m is not None else getattr(
+            settings, 'COLLECTION_TRUCK_RADIUS_M', 100.0)
+        self.truck_window_minutes = truck_window_minutes if truck_window_minutes is not None else getattr(
+            settings, 'COLLECTION_TRUCK_WINDOW_MINUTES', 10)
+        self.drops = []
+
+    def is_collection(self, before, after):
+        return before - after >= self.min_drop and after <= self.max_after
+
+    def observe(self, state, reading):
+        """Compare a reading with the sensor's previous state (before it is applied)"""
+        if not state.samples or state.bin_id != reading.bin_id:
+            return
+        if self.is_collection(state.fill_level, reading.fill_level):
+            self.drops.append(Drop(reading.bin_id, reading.sensor_id, reading.id, state.fill_level,
+                                   reading.fill_level, reading.timestamp, reading.latitude, reading.longitude))
+
+    def find_drops(self, rows, previous):
+        """
+        Collections in a chunk of readings in (timestamp, id) order. `previous`
+        maps bin_id to the last fill level before the chunk and is updated.
+        """
+        if not rows:
+            return []
+        if np is None:
+            drops = []
+            for row in rows:
+                before = previous.get(row['bin_id'])
+                if before is not None and self.is_collection(before, row['fill_level']):
+                    drops.append(self.make_drop(row, before))
+                previous[row['bin_id']] = row['fill_level']
+            return drops
+
+        bins, codes = np.unique([row['bin_id'] for row in rows], return_inverse=True)
+        fills = np.fromiter((row['fill_level'] for row in rows), dtype=float, count=len(rows))
+        # Group by bin; the stable sort keeps each bin's readings in time order
+        order = np.argsort(codes, kind='stable')
+        codes, fills = codes[order], fills[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = codes[1:] != codes[:-1]
+        before = np.empty_like(fills)
+        before[1:] = fills[:-1]
+        before[first] = [previous.get(bin_id, np.nan) for bin_id in bins[codes[first]]]
+        with np.errstate(invalid='ignore'):
+            hits = np.flatnonzero((before - fills >= self.min_drop) & (fills <= self.max_after))
+        last = np.append(first[1:], True)
+        previous.update(zip(bins[codes[last]].tolist(), fills[last].tolist()))
+        return [self.make_drop(rows[order[index]], float(before[index])) for index in hits]
+
+    @staticmethod
+    def make_drop(row, before):
+        return Drop(row['bin_id'], row['sensor_id'], row['id'], before, row['fill_level'], row['timestamp'],
+                    row['latitude'], row['longitude'])
+
+    def match_trucks(self, drops):
+        """Nearest truck within the radius around the time of each drop, from the GPS tracks"""
+        from .models import TruckPosition
+
+        if not drops:
+            return {}
+        window = timedelta(minutes=self.truck_window_minutes)
+        times = [drop.collected_at for drop in drops]
+        # Bounding box of all drops, widened by the radius, so only nearby fixes are loaded
+        margin = self.truck_radius_m / 111000.0
+        lon_margin = margin / max(math.cos(math.radians(max(abs(drop.latitude) for drop in drops))), 0.01)
+        fixes = list(TruckPosition.objects.filter(
+            timestamp__gte=min(times) - window, timestamp__lte=max(times) + window,
+            latitude__gte=min(drop.latitude for drop in drops) - margin,
+            latitude__lte=max(drop.latitude for drop in drops) + margin,
+            longitude__gte=min(drop.longitude for drop in drops) - lon_margin,
+            longitude__lte=max(drop.longitude for drop in drops) + lon_margin,
+        ).select_related('truck').only('timestamp', 'latitude', 'longitude', 'truck__id', 'truck__truck_id')
+            .order_by('timestamp'))
+        stamps = [fix.timestamp for fix in fixes]
+        matches = {}
+        for drop in drops:
+            best = None
+            start = bisect_left(stamps, drop.collected_at - window)
+            end = bisect_right(stamps, drop.collected_at + window)
+            for fix in fixes[start:end]:
+                distance = distance_m(drop.latitude, drop.longitude, fix.latitude, fix.longitude)
+                if distance <= self.truck_radius_m and (best is None or distance < best[1]):
+                    best = (fix.truck, distance)
+            if best is not None:
+                matches[drop.reading_id] = best
+        return matches
+
+    def save(self, drops):
+        """Store drops as CollectionEvents; ones already recorded are skipped"""
+        from .models import CollectionEvent
+
+        matches = self.match_trucks(drops)
+        events = []
+        for drop in drops:
+            truck, distance = matches.get(drop.reading_id, (None, None))
+            events.append(CollectionEvent(
+                bin_id=drop.bin_id, sensor_id=drop.sensor_id, reading_id=drop.reading_id,
+                fill_before=drop.fill_before, fill_after=drop.fill_after, collected_at=drop.collected_at,
+                truck=truck, truck_distance_m=None if distance is None else round(distance, 1),
+            ))
+        CollectionEvent.objects.bulk_create(events, ignore_conflicts=True)
+        return events
+
+    def flush(self):
+        """Save the drops seen by observe() since the last flush"""
+        drops, self.drops = self.drops, []
+        events = self.save(drops)
+        for event in events:
+            logger.info(f"🚛 Bin {event.bin_id} emptied ({event.fill_before:.0f}% -> {event.fill_after:.0f}%)"
+                        f"{f' by truck {event.truck.truck_id}' if event.truck else ''}")
+        return len(events)
+
+
+def backfill(since=None, until=None, bin_id=None, chunk_size=50000, detector=None):
+    """Detect collections in the stored readings; returns (readings scanned, events found)"""
+    from .models import SensorData
+
+    detector = detector or CollectionDetector()
+    queryset = SensorData.objects.all()
+    if since:
+        queryset = queryset.filter(timestamp__gte=since)
+    if until:
+        queryset = queryset.filter(timestamp__lt=until)
+    if bin_id:
+        queryset = queryset.filter(bin_id=bin_id)
+    fields = ('id', 'sensor_id', 'bin_id', 'timestamp', 'fill_level', 'latitude', 'longitude')
+
+    previous = {}
+    scanned = found = 0
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(Q(timestamp__gt=last[0]) | Q(timestamp=last[0], id__gt=last[1]))
+        rows = list(chunk.order_by('timestamp', 'id').values(*fields)[:chunk_size])
+        if not rows:
+            break
+        drops = detector.find_drops(rows, previous)
+        with transaction.atomic():
+            found += len(detector.save(drops))
+        scanned += len(rows)
+        last = (rows[-1]['timestamp'], rows[-1]['id'])
+        logger.info(f"📦 Scanned {scanned} readings, {found} collections so far")
+    return scanned, found
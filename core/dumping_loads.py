@@ -0,0 +1,154 @@
+"""
+Dumping-spot load accounting and overflow forecasting.
+
+Trucks collect bins (CollectionEvent rows) and unload at a dumping spot.
+unload_collections() adds every collection the truck carried that was not
+yet accounted. The load is the collected fill (percent of a bin) times
+DUMPING_BIN_VOLUME, split by the bin's organic/plastic/metal percentages.
+The spot row is locked, and its contents and stored fill_level are
+updated in the same transaction as the DumpingSpotLoad rows. The load
+row is unique per collection, so a collection is counted once.
+
+Unloads are reported by the geofence service (a truck stopping at a
+dumping spot, account_unloads) or through
+POST /api/dumping-spots/{id}/unload/. A collection whose reading arrives
+after the truck unloaded is counted at that truck's next unload.
+
+forecast_overflows() projects when each spot overflows, from the volume
+unloaded there over the last DUMPING_FORECAST_DAYS.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def unload_collections(spot, collections, truck=None, at=None, bin_volume=None):
+    """
+    Account the not yet unloaded CollectionEvents of the `collections`
+    queryset to `spot`. Returns the created DumpingSpotLoad rows.
+    """
+    from .models import Bin, DumpingSpot, DumpingSpotLoad
+
+    at = at or timezone.now()
+    if bin_volume is None:
+        bin_volume = getattr(settings, 'DUMPING_BIN_VOLUME', 1.0)
+
+    with transaction.atomic():
+        # The lock serializes unloads at one spot, so the contents never lose an update
+        spot = DumpingSpot.objects.select_for_update().get(pk=spot.pk)
+        pending = list(collections.filter(load__isnull=True).order_by('collected_at'))
+        if not pending:
+            return []
+        bins = Bin.objects.in_bulk({event.bin_id for event in pending}, field_name='bin_id')
+        loads = []
+        for event in pending:
+            bin = bins.get(event.bin_id)
+            if bin is None:
+                logger.warning(f"⚠️ Collection {event.id} of unknown bin {event.bin_id} not unloaded")
+                continue
+            volume = max(event.collected_amount, 0.0) / 100 * bin_volume
+            loads.append(DumpingSpotLoad(
+                spot=spot,
+                collection_event=event,
+                truck_id=truck.pk if truck is not None else event.truck_id,
+                organic=volume * bin.organic_percentage / 100,
+                plastic=volume * bin.plastic_percentage / 100,
+                metal=volume * bin.metal_percentage / 100,
+                volume=volume,
+                unloaded_at=at,
+            ))
+        DumpingSpotLoad.objects.bulk_create(loads)
+        spot.organic_content += sum(load.organic for load in loads)
+        spot.plastic_content += sum(load.plastic for load in loads)
+        spot.metal_content += sum(load.metal for load in loads)
+        spot.save(update_fields=['organic_content', 'plastic_content', 'metal_content'])
+
+    if spot.fill_level >= 100:
+        logger.warning(f"🚨 Dumping spot {spot.spot_id} is over capacity: {spot.fill_level:.1f}%")
+    logger.info(f"🚛 {len(loads)} collections unloaded at {spot.spot_id}, now {spot.fill_level:.1f}% full")
+    return loads
+
+
+def account_unloads(events, lookback_hours=None):
+    """
+    Geofence handler: a truck that stopped at a dumping spot (DWELL)
+    unloads the collections it made in the preceding lookback_hours
+    """
+    from .models import CollectionEvent, DumpingSpot, Truck
+
+    dwells = [event for event in events if event.kind == 'DUMPING_SPOT' and event.event == 'DWELL']
+    if not dwells:
+        return 0
+    if lookback_hours is None:
+        lookback_hours = getattr(settings, 'DUMPING_UNLOAD_LOOKBACK_HOURS', 24)
+    spots = DumpingSpot.objects.in_bulk({event.fence_id for event in dwells}, field_name='spot_id')
+    trucks = Truck.objects.in_bulk({event.truck_id for event in dwells}, field_name='truck_id')
+    unloaded = 0
+    for event in dwells:
+        spot, truck = spots.get(event.fence_id), trucks.get(event.truck_id)
+        if spot is None or truck is None:
+            continue
+        collections = CollectionEvent.objects.filter(
+            truck=truck,
+            collected_at__gte=event.timestamp - timedelta(hours=lookback_hours),
+            collected_at__lte=event.timestamp,
+        )
+        unloaded += len(unload_collections(spot, collections, truck=truck, at=event.timestamp))
+    return unloaded
+
+
+def fill_rates(spots=None, now=None, window_days=None):
+    """Volume unloaded per day at each spot over the window, as {spot pk: rate}"""
+    from .models import DumpingSpotLoad
+
+    now = now or timezone.now()
+    if window_days is None:
+        window_days = getattr(settings, 'DUMPING_FORECAST_DAYS', 7)
+    loads = DumpingSpotLoad.objects.filter(unloaded_at__gte=now - timedelta(days=window_days), unloaded_at__lte=now)
+    if spots is not None:
+        loads = loads.filter(spot__in=[spot.pk for spot in spots])
+    rates = {}
+    for spot_pk, volume, first in loads.values('spot').annotate(volume=Sum('volume'), first=Min('unloaded_at')).values_list('spot', 'volume', 'first'):
+        # Spots with a short history are measured over that history, but at least a day
+        days = max((now - first).total_seconds() / 86400, 1.0)
+        rates[spot_pk] = volume / days
+    return rates
+
+
+def project(spot, rate_per_day, now=None):
+    """Overflow forecast of one spot at a constant fill rate"""
+    now = now or timezone.now()
+    remaining = spot.total_capacity - (spot.organic_content + spot.plastic_content + spot.metal_content)
+    if remaining <= 0:
+        days = 0.0
+    elif rate_per_day > 0:
+        days = remaining / rate_per_day
+    else:
+        days = None
+    return {
+        'spot_id': spot.spot_id,
+        'fill_level': round(spot.fill_level, 2),
+        'remaining_capacity': round(max(remaining, 0.0), 3),
+        'fill_rate_per_day': round(rate_per_day, 3),
+        'days_to_overflow': round(days, 2) if days is not None else None,
+        'overflow_at': now + timedelta(days=days) if days is not None else None,
+    }
+
+
+def forecast_overflows(spots=None, now=None, window_days=None):
+    """Overflow forecast of every spot, soonest first; spots that do not fill come last"""
+    from .models import DumpingSpot
+
+    now = now or timezone.now()
+    spots = list(spots) if spots is not None else list(DumpingSpot.objects.all())
+    rates = fill_rates(spots, now=now, window_days=window_days)
+    projections = [project(spot, rates.get(spot.pk, 0.0), now=now) for spot in spots]
+    projections.sort(key=lambda item: (item['days_to_overflow'] is None, item['days_to_overflow'] or 0.0, item['spot_id']))
+    return projections
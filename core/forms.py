@@ -4,11 +4,16 @@ Custom forms for the Smart Waste Management system
 """
 
 from django import forms
+from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
-from .models import CameraImage, Camera
+from concurrent.futures import ThreadPoolExecutor
+from .models import CameraImage, Camera, ImageUploadJob
 from PIL import Image
 import io
 
+# Threads hashing and storing bulk-uploaded files (I/O bound, hashlib releases the GIL)
+BULK_UPLOAD_IO_WORKERS = 4
+
 class MultipleFileInput(forms.ClearableFileInput):
     """Custom widget for multiple file uploads"""
     allow_multiple_selected = True
@@ -59,8 +64,9 @@ class BulkImageUploadForm(forms.Form):
         if not images:
             raise forms.ValidationError("Please select at least one image to upload.")
         
-        if len(images) > 20:
-            raise forms.ValidationError("You can upload a maximum of 20 images at once.")
+        max_files = getattr(settings, 'BULK_UPLOAD_MAX_FILES', 500)
+        if len(images) > max_files:
+            raise forms.ValidationError(f"You can upload a maximum of {max_files} images at once.")
         
         valid_extensions = ['.jpg', '.jpeg', '.png', '.gif']
         valid_mime_types = ['image/jpeg', 'image/png', 'image/gif']
@@ -80,25 +86,105 @@ class BulkImageUploadForm(forms.Form):
         
         return images
     
-    def save(self):
-        """Save all uploaded images"""
+    def save(self, user=None):
+        """
+        Store all uploaded files and create their rows in bulk.
+        Thumbnails and analysis are left to the background workers; the
+        returned ImageUploadJob tracks their progress.
+        """
+        from .image_pipeline import read_image_info, enqueue_derivatives
+        from .image_dedup import find_blob, share_blob
+        
         camera = self.cleaned_data['camera']
         images = self.cleaned_data['images']
         analysis_type = self.cleaned_data['analysis_type']
         
-        created_images = []
+        job = ImageUploadJob.objects.create(
+            camera=camera,
+            analysis_type=analysis_type,
+            created_by=user,
+            total_files=len(images)
+        )
+        
+        def read_info(image_file):
+            try:
+                return read_image_info(image_file)
+            except Exception as e:
+                return e
+        
+        def store(item):
+            camera_image, image_file = item
+            try:
+                # Temporary uploads are moved into place rather than copied
+                camera_image.image.save(image_file.name, image_file, save=False)
+                return None
+            except Exception as e:
+                return e
+        
+        with ThreadPoolExecutor(max_workers=BULK_UPLOAD_IO_WORKERS) as executor:
+            infos = list(executor.map(read_info, images))
+            
+            rows = []
+            to_store = []
+            batch_duplicates = []
+            first_by_hash = {}
+            for image_file, info in zip(images, infos):
+                if isinstance(info, Exception) or not info['width']:
+                    reason = info if isinstance(info, Exception) else 'not a readable image'
+                    job.errors.append(f"{image_file.name}: {reason}")
+                    job.failed_files += 1
+                    continue
+                camera_image = CameraImage(
+                    camera=camera,
+                    analysis_type=analysis_type,
+                    upload_job=job,
+                    metadata={
+                        'upload_method': 'ADMIN_BULK',
+                        'original_name': image_file.name,
+                        'file_size': info['byte_size'],
+                    },
+                    **info
+                )
+                content_hash = info['content_hash']
+                if content_hash in first_by_hash:
+                    # Same file twice in this upload: store it once
+                    batch_duplicates.append((camera_image, first_by_hash[content_hash]))
+                    continue
+                existing = find_blob(content_hash)
+                if existing:
+                    share_blob(camera_image, existing)
+                    job.duplicate_files += 1
+                else:
+                    to_store.append((camera_image, image_file))
+                first_by_hash[content_hash] = camera_image
+                rows.append(camera_image)
+            
+            failed = set()
+            for (camera_image, image_file), error in zip(to_store, executor.map(store, to_store)):
+                if error:
+                    job.errors.append(f"{image_file.name}: {error}")
+                    job.failed_files += 1
+                    failed.add(id(camera_image))
+        
+        for camera_image, source in batch_duplicates:
+            if id(source) in failed:
+                job.failed_files += 1
+                continue
+            camera_image.image = source.image.name
+            camera_image.deduplicated = True
+            job.duplicate_files += 1
+            rows.append(camera_image)
+        rows = [row for row in rows if id(row) not in failed]
+        
+        # bulk_create skips CameraImage.save(), so derivatives are queued explicitly below
+        CameraImage.objects.bulk_create(rows, batch_size=200)
+        job.stored_files = len(rows)
+        job.save(update_fields=['stored_files', 'duplicate_files', 'failed_files', 'errors'])
         
-        for image_file in images:
-            # Create CameraImage instance
-            camera_image = CameraImage(
-                camera=camera,
-                analysis_type=analysis_type,
-                image=image_file
-            )
-            camera_image.save()
-            created_images.append(camera_image)
+        for image_id in job.images.filter(processing_status='PENDING').values_list('id', flat=True):
+            enqueue_derivatives(image_id)
         
-        return created_images
+        return job
 
 class SingleImageUploadForm(forms.ModelForm):
     """Enhanced single image upload form"""
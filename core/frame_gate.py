@@ -0,0 +1,157 @@
+"""
+Frame-change gating for periodic camera uploads.
+
+Each camera keeps a tiny grayscale copy of the last frame that was kept.
+New frames are decoded at reduced scale, compared against it, and the
+fraction of changed pixels decides whether the scene changed. The
+camera's `change_gating` policy then decides what happens to frames that
+show an unchanged scene. Comparing against the last *kept* frame means
+slow changes still accumulate until they cross the threshold.
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:  # gating is disabled without numpy
+    np = None
+
+try:
+    import cv2
+except ImportError:  # falls back to Pillow decoding
+    cv2 = None
+
+REFERENCE_SIZE = (64, 48)
+# Per-pixel gray-level difference that counts as a change (absorbs sensor noise and JPEG artefacts)
+PIXEL_DELTA = 15
+METRICS_TTL = 7 * 24 * 3600
+METRIC_NAMES = ('kept', 'dropped', 'tagged')
+
+
+class GateResult:
+    """Outcome of gating one frame"""
+
+    def __init__(self, keep, changed, score):
+        self.keep = keep
+        self.changed = changed
+        self.score = score
+
+    def as_metadata(self):
+        return {
+            'scene_changed': self.changed,
+            'change_score': None if self.score is None else round(self.score, 4),
+        }
+
+
+def _decode_small_gray(data):
+    """Decode JPEG bytes straight to a small grayscale array"""
+    if cv2 is not None:
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        # libjpeg scales during decode, so only 1/8 of the pixels are produced
+        frame = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if frame is None:
+            return None
+        return cv2.resize(frame, REFERENCE_SIZE, interpolation=cv2.INTER_AREA)
+
+    from io import BytesIO
+    from PIL import Image
+    with Image.open(BytesIO(data)) as img:
+        img.draft('L', (REFERENCE_SIZE[0] * 4, REFERENCE_SIZE[1] * 4))
+        return np.asarray(img.convert('L').resize(REFERENCE_SIZE, Image.Resampling.BOX))
+
+
+def change_score(reference, frame):
+    """Fraction of pixels that differ, after removing global brightness shifts (auto exposure)"""
+    reference = reference.astype(np.int16)
+    frame = frame.astype(np.int16)
+    difference = np.abs((frame - int(frame.mean())) - (reference - int(reference.mean())))
+    return float(np.count_nonzero(difference > PIXEL_DELTA)) / difference.size
+
+
+class FrameChangeGate:
+    """Keeps per-camera reference frames in memory and applies each camera's gating policy"""
+
+    def __init__(self):
+        self._references = {}
+        self._lock = threading.Lock()
+
+    def evaluate(self, camera, fileobj):
+        """Decide whether a frame should be stored; fileobj is rewound afterwards"""
+        policy = camera.change_gating
+        if policy == 'OFF' or np is None:
+            return GateResult(keep=True, changed=True, score=None)
+
+        fileobj.seek(0)
+        data = fileobj.read()
+        fileobj.seek(0)
+        try:
+            frame = _decode_small_gray(data)
+        except Exception as e:
+            logger.warning(f"Frame gate could not decode frame from {camera.camera_id}: {e}")
+            frame = None
+        if frame is None:
+            # Never drop what we cannot inspect
+            return GateResult(keep=True, changed=True, score=None)
+
+        now = time.monotonic()
+        with self._lock:
+            reference, last_kept = self._references.get(camera.camera_id, (None, 0.0))
+            score = None if reference is None else change_score(reference, frame)
+            changed = score is None or score >= camera.change_threshold
+
+            if changed or policy == 'TAG':
+                keep = True
+            elif policy == 'DOWNSAMPLE':
+                keep = now - last_kept >= camera.unchanged_keep_interval
+            else:  # DROP
+                keep = False
+
+            if keep:
+                self._references[camera.camera_id] = (frame, now)
+
+        result = GateResult(keep=keep, changed=changed, score=score)
+        self._record(camera.camera_id, result)
+        return result
+
+    def reset(self, camera_id=None):
+        """Forget reference frames (e.g. after a camera is moved)"""
+        with self._lock:
+            if camera_id is None:
+                self._references.clear()
+            else:
+                self._references.pop(camera_id, None)
+
+    def _record(self, camera_id, result):
+        names = ['kept' if result.keep else 'dropped']
+        if result.keep and not result.changed:
+            names.append('tagged')
+        for name in names:
+            key = f"frame_gate:{camera_id}:{name}"
+            # add() is a no-op if the counter exists; incr() is atomic on shared caches
+            cache.add(key, 0, METRICS_TTL)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, METRICS_TTL)
+
+
+def gating_metrics(camera_ids):
+    """Kept/dropped/tagged frame counters per camera"""
+    keys = [f"frame_gate:{camera_id}:{name}" for camera_id in camera_ids for name in METRIC_NAMES]
+    values = cache.get_many(keys)
+    metrics = {}
+    for camera_id in camera_ids:
+        counts = {name: values.get(f"frame_gate:{camera_id}:{name}", 0) for name in METRIC_NAMES}
+        total = counts['kept'] + counts['dropped']
+        counts['drop_rate'] = round(counts['dropped'] / total * 100, 1) if total else 0.0
+        metrics[camera_id] = counts
+    return metrics
+
+
+frame_gate = FrameChangeGate()
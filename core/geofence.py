@@ -0,0 +1,291 @@
+"""
+Geofences around bins and dumping spots.
+
+GeofenceGrid hashes every fence into a uniform grid of cells at least as
+large as the biggest fence. A position then only has to be checked
+against the fences of its own cell and the 8 around it, so the cost of a
+position update depends on how many fences are nearby, not on how many
+bins exist.
+
+GeofenceEngine keeps, per truck, the fences it is inside and since when:
+- ENTER when a truck comes within a fence's radius
+- DWELL once per visit after it stayed dwell_seconds
+- EXIT when it is beyond radius * exit_margin (the margin absorbs GPS
+  jitter at the edge)
+
+GeofenceService runs the engine over new TruckPosition rows after a
+persisted id watermark, stores the events as GeofenceEvent rows and
+passes them to handlers: attach_collection_trucks (bin stops) and
+dumping_loads.account_unloads (dumping spot stops). Concurrent inserts
+can commit a lower id after a higher one was read, so the last
+GEOFENCE_ID_OVERLAP ids below the watermark are checked again on every
+poll and fixes that became visible late are fed in then (ids below the
+watermark at startup are taken as processed). A fix older than the last
+one processed for its truck, whether uploaded or committed late, only
+extends the track: it produces no events.
+One process owns the in-memory state: run it as the `geofence` job of
+run_services.
+"""
+
+import logging
+import math
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .dumping_loads import account_unloads
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_DEGREE = 111320.0
+
+Fence = namedtuple('Fence', 'kind fence_id latitude longitude radius')
+Event = namedtuple('Event', 'truck_id kind fence_id event timestamp latitude longitude')
+
+
+class GeofenceGrid:
+    """Uniform lat/lon grid of fences for O(nearby) lookups"""
+
+    def __init__(self, fences, cell_size_m=250.0):
+        self.fences = list(fences)
+        largest = max((fence.radius for fence in self.fences), default=0.0)
+        # A fence is stored in one cell, so cells must be at least as large as any fence
+        self.cell_size_m = max(cell_size_m, largest)
+        reference = sum(fence.latitude for fence in self.fences) / len(self.fences) if self.fences else 0.0
+        self.lon_scale = math.cos(math.radians(reference))
+        self.cells = {}
+        for fence in self.fences:
+            self.cells.setdefault(self.cell(fence.latitude, fence.longitude), []).append(fence)
+
+    def cell(self, latitude, longitude):
+        return (
+            math.floor(latitude * METERS_PER_DEGREE / self.cell_size_m),
+            math.floor(longitude * METERS_PER_DEGREE * self.lon_scale / self.cell_size_m),
+        )
+
+    def distance_m(self, latitude, longitude, fence):
+        """Equirectangular distance, accurate to centimeters at fence scale"""
+        dy = (latitude - fence.latitude) * METERS_PER_DEGREE
+        dx = (longitude - fence.longitude) * METERS_PER_DEGREE * math.cos(math.radians(fence.latitude))
+        return math.hypot(dx, dy)
+
+    def nearby(self, latitude, longitude):
+        """Fences in the cell of the position and the 8 around it"""
+        row, column = self.cell(latitude, longitude)
+        for cell in ((row + i, column + j) for i in (-1, 0, 1) for j in (-1, 0, 1)):
+            yield from self.cells.get(cell, ())
+
+    def containing(self, latitude, longitude):
+        """Fences whose radius covers the position, as {(kind, fence_id): fence}"""
+        return {
+            (fence.kind, fence.fence_id): fence for fence in self.nearby(latitude, longitude)
+            if self.distance_m(latitude, longitude, fence) <= fence.radius
+        }
+
+
+class GeofenceEngine:
+    """Turns truck positions into ENTER/DWELL/EXIT events"""
+
+    def __init__(self, grid, dwell_seconds=60, exit_margin=1.2):
+        self.grid = grid
+        self.dwell_seconds = dwell_seconds
+        self.exit_margin = exit_margin
+        # truck_id -> {(kind, fence_id): [fence, entered_at, dwell_reported]}
+        self.inside = {}
+        self.last_seen = {}
+
+    def update(self, truck_id, latitude, longitude, timestamp):
+        """Events caused by one position; fixes older than the truck's last one produce no events"""
+        last = self.last_seen.get(truck_id)
+        if last is not None and timestamp <= last:
+            return []
+        self.last_seen[truck_id] = timestamp
+
+        events = []
+        visits = self.inside.setdefault(truck_id, {})
+        for key, visit in list(visits.items()):
+            fence = visit[0]
+            if self.grid.distance_m(latitude, longitude, fence) > fence.radius * self.exit_margin:
+                del visits[key]
+                events.append(Event(truck_id, fence.kind, fence.fence_id, 'EXIT', timestamp, latitude, longitude))
+            elif not visit[2] and (timestamp - visit[1]).total_seconds() >= self.dwell_seconds:
+                visit[2] = True
+                events.append(Event(truck_id, fence.kind, fence.fence_id, 'DWELL', timestamp, latitude, longitude))
+        for key, fence in self.grid.containing(latitude, longitude).items():
+            if key not in visits:
+                visits[key] = [fence, timestamp, False]
+                events.append(Event(truck_id, fence.kind, fence.fence_id, 'ENTER', timestamp, latitude, longitude))
+        return events
+
+    def set_grid(self, grid):
+        """Swap in rebuilt fences; open visits of fences that disappeared are kept until the truck leaves"""
+        self.grid = grid
+
+    def restore(self, events):
+        """Rebuild open visits from stored events in time order (after a restart)"""
+        fences = {(fence.kind, fence.fence_id): fence for fence in self.grid.fences}
+        for event in events:
+            key = (event.kind, event.fence_id)
+            visits = self.inside.setdefault(event.truck_id, {})
+            if event.event == 'ENTER' and key in fences:
+                visits[key] = [fences[key], event.timestamp, False]
+            elif event.event == 'DWELL' and key in visits:
+                visits[key][2] = True
+            elif event.event == 'EXIT':
+                visits.pop(key, None)
+            self.last_seen[event.truck_id] = max(self.last_seen.get(event.truck_id, event.timestamp), event.timestamp)
+
+
+def load_fences(bin_radius_m=None, spot_radius_m=None):
+    """Fences for every bin and dumping spot"""
+    from .models import Bin, DumpingSpot
+
+    bin_radius_m = bin_radius_m if bin_radius_m is not None else getattr(settings, 'GEOFENCE_BIN_RADIUS_M', 30.0)
+    spot_radius_m = spot_radius_m if spot_radius_m is not None else getattr(settings, 'GEOFENCE_SPOT_RADIUS_M', 150.0)
+    fences = [
+        Fence('BIN', bin_id, latitude, longitude, bin_radius_m)
+        for bin_id, latitude, longitude in Bin.objects.values_list('bin_id', 'latitude', 'longitude').iterator()
+    ]
+    fences.extend(
+        Fence('DUMPING_SPOT', spot_id, latitude, longitude, spot_radius_m)
+        for spot_id, latitude, longitude in DumpingSpot.objects.values_list('spot_id', 'latitude', 'longitude')
+    )
+    return fences
+
+
+def attach_collection_trucks(events, window_minutes=None):
+    """
+    Collection logging: a truck that stopped at a bin (DWELL) is recorded on
+    the CollectionEvents of that bin around that time that have no truck yet
+    """
+    from .models import CollectionEvent, Truck
+
+    dwells = [event for event in events if event.kind == 'BIN' and event.event == 'DWELL']
+    if not dwells:
+        return 0
+    if window_minutes is None:
+        window_minutes = getattr(settings, 'COLLECTION_TRUCK_WINDOW_MINUTES', 10)
+    window = timedelta(minutes=window_minutes)
+    trucks = Truck.objects.in_bulk({event.truck_id for event in dwells}, field_name='truck_id')
+    attached = 0
+    for event in dwells:
+        attached += CollectionEvent.objects.filter(
+            bin_id=event.fence_id, truck__isnull=True,
+            collected_at__gte=event.timestamp - window, collected_at__lte=event.timestamp + window,
+        ).update(truck=trucks[event.truck_id], truck_distance_m=None)
+    return attached
+
+
+class GeofenceService:
+    """Feeds new TruckPosition rows through the engine and stores the events"""
+
+    def __init__(self, checkpoint='geofence', batch_size=5000, reload_seconds=300, handlers=None):
+        self.checkpoint_name = checkpoint
+        self.batch_size = batch_size
+        # Bins are added or moved rarely; the grid is rebuilt on this period
+        self.reload_seconds = reload_seconds
+        self.handlers = list(handlers) if handlers is not None else [attach_collection_trucks, account_unloads]
+        self.engine = None
+        self.loaded_at = None
+        self.last_id = 0
+        # Ids already fed within the overlap window below last_id
+        self.overlap = getattr(settings, 'GEOFENCE_ID_OVERLAP', 1000)
+        self.seen = set()
+        self.backlog = False
+        self.stats = {'fixes': 0, 'events': 0, 'fences': 0}
+
+    def start(self, now=None):
+        from django.utils import timezone
+        from .models import GeofenceEvent, SensorFetcherCheckpoint, TruckPosition
+
+        checkpoint = SensorFetcherCheckpoint.objects.filter(name=self.checkpoint_name).first()
+        self.last_id = checkpoint.last_id if checkpoint else 0
+        self.seen = set(
+            TruckPosition.objects.filter(id__gt=self.last_id - self.overlap, id__lte=self.last_id)
+            .values_list('id', flat=True)
+        )
+        self.engine = GeofenceEngine(self.build_grid(), dwell_seconds=getattr(settings, 'GEOFENCE_DWELL_SECONDS', 60))
+        self.loaded_at = now or timezone.now()
+        # Visits still open from before a restart (trucks rarely stay in a fence for a day)
+        recent = GeofenceEvent.objects.filter(timestamp__gte=self.loaded_at - timedelta(days=1)).order_by('timestamp', 'id')
+        self.engine.restore(
+            Event(row.truck.truck_id, row.fence_type, row.fence_id, row.event, row.timestamp, row.latitude, row.longitude)
+            for row in recent.select_related('truck')
+        )
+
+    def build_grid(self):
+        fences = load_fences()
+        self.stats['fences'] = len(fences)
+        return GeofenceGrid(fences, cell_size_m=getattr(settings, 'GEOFENCE_CELL_SIZE_M', 250.0))
+
+    def process_new_positions(self):
+        """Run the engine over fixes stored since the last call; returns the events"""
+        from django.utils import timezone
+        from .models import GeofenceEvent, SensorFetcherCheckpoint, TruckPosition
+
+        if self.engine is None:
+            self.start()
+        elif (timezone.now() - self.loaded_at).total_seconds() >= self.reload_seconds:
+            self.engine.set_grid(self.build_grid())
+            self.loaded_at = timezone.now()
+
+        window = TruckPosition.objects.filter(id__gt=self.last_id - self.overlap, id__lte=self.last_id)
+        late = [pk for pk in window.values_list('id', flat=True) if pk not in self.seen]
+        fixes = list(
+            TruckPosition.objects.filter(Q(id__in=late) | Q(id__gt=self.last_id)).order_by('id')
+            .values_list('id', 'truck_id', 'truck__truck_id', 'timestamp', 'latitude', 'longitude')[:self.batch_size]
+        )
+        self.backlog = len(fixes) == self.batch_size
+        if not fixes:
+            return []
+        events = []
+        truck_pks = {}
+        # Within a batch each truck's fixes are replayed in time order
+        for _, truck_pk, truck_id, timestamp, latitude, longitude in sorted(fixes, key=lambda fix: (fix[2], fix[3])):
+            truck_pks[truck_id] = truck_pk
+            events.extend(self.engine.update(truck_id, latitude, longitude, timestamp))
+
+        with transaction.atomic():
+            GeofenceEvent.objects.bulk_create([
+                GeofenceEvent(truck_id=truck_pks[event.truck_id], fence_type=event.kind, fence_id=event.fence_id,
+                              event=event.event, timestamp=event.timestamp,
+                              latitude=event.latitude, longitude=event.longitude)
+                for event in events
+            ])
+            for handler in self.handlers:
+                handler(events)
+            self.last_id = max(self.last_id, fixes[-1][0])
+            SensorFetcherCheckpoint.objects.update_or_create(
+                name=self.checkpoint_name, defaults={'last_timestamp': fixes[-1][3], 'last_id': self.last_id}
+            )
+        self.seen.update(fix[0] for fix in fixes)
+        self.seen = {pk for pk in self.seen if pk > self.last_id - self.overlap}
+        if late:
+            logger.info(f"📍 {len(late)} late truck fixes picked up below the watermark")
+        self.stats['fixes'] += len(fixes)
+        self.stats['events'] += len(events)
+        for event in events:
+            logger.debug(f"📍 Truck {event.truck_id} {event.event} {event.kind} {event.fence_id}")
+        return events
+
+
+def open_visits(since=None):
+    """Open visits from the stored events: [(truck_id, fence_type, fence_id, entered_at)]"""
+    from django.utils import timezone
+    from .models import GeofenceEvent
+
+    since = since or timezone.now() - timedelta(days=1)
+    visits = {}
+    for truck_id, fence_type, fence_id, event, timestamp in (
+        GeofenceEvent.objects.filter(timestamp__gte=since).order_by('timestamp', 'id')
+        .values_list('truck__truck_id', 'fence_type', 'fence_id', 'event', 'timestamp')
+    ):
+        key = (truck_id, fence_type, fence_id)
+        if event == 'ENTER':
+            visits[key] = timestamp
+        elif event == 'EXIT':
+            visits.pop(key, None)
+    return [key + (entered_at,) for key, entered_at in visits.items()]
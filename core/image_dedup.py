@@ -0,0 +1,124 @@
+"""
+Content-addressed deduplication of camera images.
+
+Originals are stored under a path derived from their SHA-256, so a
+byte-identical frame is never written twice: the new CameraImage row just
+points at the existing file (and its derivatives). Optionally, a 64-bit
+difference hash (dHash) catches near-identical frames from the same
+camera within a time window, which can be skipped or linked.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DHASH_SIZE = 8
+
+# Near-duplicate policies
+POLICY_OFF = 'off'
+POLICY_LINK = 'link'
+POLICY_SKIP = 'skip'
+
+
+def get_near_duplicate_policy():
+    return getattr(settings, 'CAMERA_NEAR_DUPLICATE_POLICY', POLICY_OFF)
+
+
+def find_blob(content_hash, exclude_pk=None):
+    """Return an existing CameraImage whose stored file has this content hash"""
+    from .models import CameraImage
+
+    if not content_hash:
+        return None
+    queryset = CameraImage.objects.filter(content_hash=content_hash).exclude(image='')
+    if exclude_pk:
+        queryset = queryset.exclude(pk=exclude_pk)
+    existing = queryset.only('image', 'thumbnail', 'medium', 'processing_status').order_by('id').first()
+    if existing and existing.image.storage.exists(existing.image.name):
+        return existing
+    return None
+
+
+def compute_dhash(fileobj):
+    """64-bit difference hash as 16 hex characters"""
+    from PIL import Image
+
+    fileobj.seek(0)
+    try:
+        with Image.open(fileobj) as img:
+            # JPEG draft mode decodes at 1/8 scale, which is plenty for a 9x8 hash
+            img.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))
+            small = img.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.BILINEAR)
+            pixels = list(small.getdata())
+    finally:
+        fileobj.seek(0)
+
+    value = 0
+    for row in range(DHASH_SIZE):
+        offset = row * (DHASH_SIZE + 1)
+        for col in range(DHASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:016x}"
+
+
+def hamming_distance(hash_a, hash_b):
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+def find_near_duplicate(camera, perceptual_hash):
+    """Most recent image from the same camera, inside the time window, that looks the same"""
+    from .models import CameraImage
+
+    window = getattr(settings, 'CAMERA_NEAR_DUPLICATE_WINDOW', 300)
+    max_distance = getattr(settings, 'CAMERA_NEAR_DUPLICATE_DISTANCE', 4)
+    since = timezone.now() - timedelta(seconds=window)
+
+    candidates = (
+        CameraImage.objects.filter(camera=camera, created_at__gte=since, duplicate_of__isnull=True)
+        .exclude(perceptual_hash='')
+        .order_by('-created_at')
+        .only('id', 'perceptual_hash', 'image', 'thumbnail', 'medium', 'processing_status',
+              'width', 'height', 'byte_size', 'content_hash')[:20]
+    )
+    for candidate in candidates:
+        if hamming_distance(candidate.perceptual_hash, perceptual_hash) <= max_distance:
+            return candidate
+    return None
+
+
+def share_blob(camera_image, source):
+    """Point camera_image at the stored file and derivatives of source"""
+    camera_image.image = source.image.name
+    camera_image.deduplicated = True
+    if source.processing_status == 'DONE':
+        camera_image.thumbnail = source.thumbnail.name
+        camera_image.medium = source.medium.name
+        camera_image.processing_status = 'DONE'
+
+
+def storage_savings():
+    """Bytes stored vs. bytes that would have been stored without deduplication"""
+    from .models import CameraImage
+
+    totals = CameraImage.objects.aggregate(
+        stored_bytes=Sum('byte_size', filter=Q(deduplicated=False)),
+        saved_bytes=Sum('byte_size', filter=Q(deduplicated=True)),
+        deduplicated_images=Count('id', filter=Q(deduplicated=True)),
+        total_images=Count('id'),
+    )
+    stored = totals['stored_bytes'] or 0
+    saved = totals['saved_bytes'] or 0
+    logical = stored + saved
+    return {
+        'stored_bytes': stored,
+        'saved_bytes': saved,
+        'logical_bytes': logical,
+        'saved_percentage': round(saved / logical * 100, 1) if logical else 0.0,
+        'deduplicated_images': totals['deduplicated_images'],
+        'total_images': totals['total_images'],
+    }
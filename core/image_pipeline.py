@@ -0,0 +1,150 @@
+"""
+Background generation of camera image derivatives.
+
+Uploads only store the original file and leave the row in the PENDING
+state. Derivatives (a JPEG thumbnail and a medium WebP variant) are
+produced from a single decode, either by the in-process worker pool
+below or by the `process_image_derivatives` management command, which
+drains the same PENDING rows from the database.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (300, 300)
+MEDIUM_SIZE = (1024, 1024)
+THUMBNAIL_QUALITY = 85
+MEDIUM_QUALITY = 80
+HASH_CHUNK_SIZE = 64 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide worker pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-pipeline')
+        return _executor
+
+
+def enqueue_derivatives(image_id):
+    """
+    Queue derivative generation for an image once the current transaction commits.
+    With IMAGE_PIPELINE_WORKERS = 0 the row simply stays PENDING for an
+    external `process_image_derivatives` worker.
+    """
+    if getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2) <= 0:
+        return
+    transaction.on_commit(lambda: get_executor().submit(run_job, image_id))
+
+
+def run_job(image_id):
+    """Worker thread entry point"""
+    close_old_connections()
+    try:
+        process_image(image_id)
+    finally:
+        close_old_connections()
+
+
+def process_image(image_id):
+    """Claim a PENDING image and build its derivatives. Returns True on success."""
+    from .models import CameraImage
+
+    # Atomic claim so the in-process pool and the command never double-process a row
+    claimed = CameraImage.objects.filter(pk=image_id, processing_status='PENDING').update(
+        processing_status='PROCESSING'
+    )
+    if not claimed:
+        return False
+
+    camera_image = CameraImage.objects.get(pk=image_id)
+    try:
+        generate_derivatives(camera_image)
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to generate derivatives for image {image_id}: {e}")
+        CameraImage.objects.filter(pk=image_id).update(processing_status='FAILED')
+        return False
+
+
+def read_image_info(fileobj):
+    """
+    Hash a file in chunks and read its dimensions from the image header
+    (no pixel decode). Returns CameraImage field values.
+    """
+    from PIL import Image
+
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    byte_size = 0
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        byte_size += len(chunk)
+
+    width = height = None
+    fileobj.seek(0)
+    try:
+        with Image.open(fileobj) as img:
+            width, height = img.size
+    except Exception as e:
+        logger.warning(f"Could not read image dimensions: {e}")
+    fileobj.seek(0)
+
+    return {
+        'width': width,
+        'height': height,
+        'byte_size': byte_size,
+        'content_hash': digest.hexdigest(),
+    }
+
+
+def render_derivatives(fileobj):
+    """Decode an image once and return (thumbnail_jpeg_bytes, medium_webp_bytes)"""
+    from PIL import Image
+
+    with Image.open(fileobj) as img:
+        # Let the JPEG decoder scale down while decoding (DCT scaling)
+        img.draft('RGB', MEDIUM_SIZE)
+        img = img.convert('RGB')
+
+        img.thumbnail(MEDIUM_SIZE, Image.Resampling.LANCZOS)
+        medium_io = BytesIO()
+        img.save(medium_io, format='WEBP', quality=MEDIUM_QUALITY)
+
+        # The thumbnail is derived from the already reduced medium frame
+        img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+        thumb_io = BytesIO()
+        img.save(thumb_io, format='JPEG', quality=THUMBNAIL_QUALITY)
+
+    return thumb_io.getvalue(), medium_io.getvalue()
+
+
+def generate_derivatives(camera_image):
+    """Build thumbnail and medium variant for a CameraImage and save them in one write"""
+    camera_image.image.open('rb')
+    try:
+        thumb_bytes, medium_bytes = render_derivatives(camera_image.image)
+    finally:
+        camera_image.image.close()
+
+    name = os.path.splitext(os.path.basename(camera_image.image.name))[0]
+    camera_image.thumbnail.save(f"thumb_{name}.jpg", ContentFile(thumb_bytes), save=False)
+    camera_image.medium.save(f"medium_{name}.webp", ContentFile(medium_bytes), save=False)
+    camera_image.processing_status = 'DONE'
+    camera_image.save(update_fields=['thumbnail', 'medium', 'processing_status'])
+    logger.info(f"Derivatives created for image {camera_image.pk}")
@@ -0,0 +1,363 @@
+"""
+Tiered retention for camera images.
+
+Originals move through three tiers as they age:
+
+- COMPACTED: re-encoded at lower JPEG quality and capped resolution.
+- ARCHIVED: packed into one ZIP per capture day (camera_archives/YYYY/MM/
+  YYYY-MM-DD.zip) with an index.json member. The loose file is removed
+  and the image is served from the archive by the API.
+- Deleted: the row and any files no other row references are removed.
+
+Each tier works one capture day at a time, and every step leaves the
+database pointing at files that exist, so an interrupted run can simply
+be started again. Thumbnails and medium variants stay as loose files
+until the image is deleted, so galleries keep working for archived days.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 256 * 1024
+ARCHIVE_ROOT = 'camera_archives'
+INDEX_MEMBER = 'index.json'
+# Compaction is only kept if it saves at least this fraction of the file
+MIN_COMPACTION_SAVING = 0.1
+INFO_FIELDS = ('width', 'height', 'byte_size', 'content_hash')
+
+
+class RetentionPolicy:
+    """Age thresholds (in days, 0 disables a tier) and compaction settings"""
+
+    def __init__(self, compact_after_days=None, archive_after_days=None, delete_after_days=None,
+                 compact_quality=None, compact_max_dimension=None, require_analyzed=None):
+        def setting(value, name, default):
+            return value if value is not None else getattr(settings, name, default)
+
+        self.compact_after_days = setting(compact_after_days, 'CAMERA_COMPACT_AFTER_DAYS', 14)
+        self.archive_after_days = setting(archive_after_days, 'CAMERA_ARCHIVE_AFTER_DAYS', 60)
+        self.delete_after_days = setting(delete_after_days, 'CAMERA_DELETE_AFTER_DAYS', 365)
+        self.compact_quality = setting(compact_quality, 'CAMERA_COMPACT_QUALITY', 70)
+        self.compact_max_dimension = setting(compact_max_dimension, 'CAMERA_COMPACT_MAX_DIMENSION', 1280)
+        # Unanalyzed images keep their full-resolution original until classified
+        self.require_analyzed = setting(require_analyzed, 'CAMERA_RETENTION_REQUIRE_ANALYZED', True)
+
+    def cutoff(self, days):
+        return timezone.now() - timedelta(days=days)
+
+    def eligible(self, tier):
+        """Queryset of images due for a tier, or None if the tier is disabled"""
+        from .models import CameraImage
+
+        days = getattr(self, f'{tier}_after_days')
+        if not days:
+            return None
+        queryset = CameraImage.objects.filter(created_at__lt=self.cutoff(days))
+        if tier == 'delete':
+            return queryset
+        queryset = queryset.exclude(image='')
+        if self.require_analyzed:
+            queryset = queryset.filter(is_analyzed=True)
+        if tier == 'compact':
+            return queryset.filter(storage_tier='ORIGINAL')
+        return queryset.exclude(storage_tier='ARCHIVED')
+
+    def days(self, tier):
+        """Capture days (aware midnights) that have images due for a tier"""
+        queryset = self.eligible(tier)
+        if queryset is None:
+            return []
+        return list(queryset.order_by().datetimes('created_at', 'day'))
+
+
+def day_range(day):
+    return {'created_at__gte': day, 'created_at__lt': day + timedelta(days=1)}
+
+
+def _remove_unreferenced(names):
+    """Delete files that no CameraImage references any more"""
+    from .models import CameraImage
+
+    names = {name for name in names if name}
+    if not names:
+        return 0
+    referenced = set()
+    for field in ('image', 'thumbnail', 'medium', 'archive_name'):
+        referenced.update(
+            CameraImage.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True)
+        )
+    removed = 0
+    for name in names - referenced:
+        try:
+            default_storage.delete(name)
+            removed += 1
+        except Exception as e:
+            logger.warning(f"Could not delete {name}: {e}")
+    return removed
+
+
+def compact_day(day, policy, dry_run=False):
+    """Re-encode every eligible original captured on this day"""
+    queryset = policy.eligible('compact').filter(**day_range(day))
+    names = list(queryset.order_by().values_list('image', flat=True).distinct())
+    stats = {'files': 0, 'bytes_before': 0, 'bytes_after': 0, 'skipped': 0}
+    if dry_run:
+        stats['files'] = len(names)
+        stats['bytes_before'] = queryset.aggregate(total=Sum('byte_size'))['total'] or 0
+        return stats
+
+    cutoff = policy.cutoff(policy.compact_after_days)
+    for name in names:
+        try:
+            result = compact_blob(name, policy, cutoff)
+        except Exception as e:
+            logger.warning(f"Compaction failed for {name}: {e}")
+            result = None
+        if result is None:
+            stats['skipped'] += 1
+            continue
+        stats['files'] += 1
+        stats['bytes_before'] += result[0]
+        stats['bytes_after'] += result[1]
+    return stats
+
+
+def compact_blob(name, policy, cutoff):
+    """
+    Re-encode one stored original and repoint every row that shares it.
+    Returns (bytes_before, bytes_after), or None if the file was skipped.
+    """
+    from PIL import Image
+    from .models import CameraImage, camera_image_upload_to
+    from .image_pipeline import read_image_info
+
+    refs = CameraImage.objects.filter(image=name)
+    # A deduplicated file is only compacted once every image sharing it is due
+    blocked = Q(created_at__gte=cutoff) | ~Q(storage_tier='ORIGINAL')
+    if policy.require_analyzed:
+        blocked |= Q(is_analyzed=False)
+    if not refs.exists() or refs.filter(blocked).exists():
+        return None
+
+    limit = (policy.compact_max_dimension, policy.compact_max_dimension)
+    with default_storage.open(name, 'rb') as source, tempfile.TemporaryFile() as encoded:
+        bytes_before = source.size
+        with Image.open(source) as img:
+            # JPEG draft mode scales down while decoding
+            img.draft('RGB', limit)
+            img = img.convert('RGB')
+            img.thumbnail(limit, Image.Resampling.LANCZOS)
+            img.save(encoded, 'JPEG', quality=policy.compact_quality, optimize=True, progressive=True)
+
+        info = read_image_info(encoded)
+        if info['byte_size'] > bytes_before * (1 - MIN_COMPACTION_SAVING):
+            # Already small enough: record the tier without touching the file
+            refs.filter(storage_tier='ORIGINAL').update(storage_tier='COMPACTED')
+            return bytes_before, bytes_before
+
+        new_name = camera_image_upload_to(SimpleNamespace(content_hash=info['content_hash']), 'compacted.jpg')
+        if not default_storage.exists(new_name):
+            new_name = default_storage.save(new_name, File(encoded))
+
+    refs.filter(storage_tier='ORIGINAL').update(image=new_name, storage_tier='COMPACTED', **info)
+    _remove_unreferenced([name])
+    return bytes_before, info['byte_size']
+
+
+def archive_base_name(day):
+    return day.strftime(f'{ARCHIVE_ROOT}/%Y/%m/%Y-%m-%d.zip')
+
+
+def _copy_member(zip_out, member_name, source):
+    info = zipfile.ZipInfo(member_name)
+    # JPEG/WebP do not compress further, and stored members can be read without inflating
+    info.compress_type = zipfile.ZIP_STORED
+    with zip_out.open(info, 'w', force_zip64=True) as target:
+        shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
+
+
+def _missing_info():
+    return Q(width__isnull=True) | Q(height__isnull=True) | Q(byte_size__isnull=True) | Q(content_hash='')
+
+
+def archive_day(day, policy, dry_run=False):
+    """Pack the originals of one capture day into that day's archive"""
+    from .models import CameraImage
+    from .image_pipeline import read_image_info
+
+    new_rows = list(
+        policy.eligible('archive').filter(**day_range(day))
+        .order_by('id').values_list('id', 'image')
+    )
+    stats = {'images': len(new_rows), 'archives': 0, 'missing': 0}
+    if dry_run or not new_rows:
+        return stats
+
+    # Images of this day archived by an earlier run are carried over into the new archive
+    archived_rows = CameraImage.objects.filter(storage_tier='ARCHIVED', **day_range(day))
+    previous_archives = set(archived_rows.exclude(archive_name='').values_list('archive_name', flat=True))
+    # Rows never backfilled get their file info while their original is read anyway:
+    # once the loose file is gone, nothing can stat it any more
+    day_rows = Q(id__in=[image_id for image_id, _ in new_rows]) | Q(storage_tier='ARCHIVED', **day_range(day))
+    needs_info = set(
+        CameraImage.objects.filter(day_rows).filter(_missing_info()).values_list('image', flat=True)
+    )
+    file_info = {}
+
+    members = set()
+    archived_ids = []
+    with tempfile.TemporaryFile() as spool:
+        with zipfile.ZipFile(spool, 'w', allowZip64=True) as zip_out:
+            for archive_name in previous_archives:
+                with default_storage.open(archive_name, 'rb') as archive_file, zipfile.ZipFile(archive_file) as zip_in:
+                    for member in zip_in.namelist():
+                        if member == INDEX_MEMBER or member in members:
+                            continue
+                        with zip_in.open(member) as source:
+                            if member in needs_info:
+                                file_info[member] = read_image_info(source)
+                            _copy_member(zip_out, member, source)
+                        members.add(member)
+
+            for image_id, name in new_rows:
+                if name not in members:
+                    try:
+                        with default_storage.open(name, 'rb') as source:
+                            if name in needs_info:
+                                file_info[name] = read_image_info(source)
+                            _copy_member(zip_out, name, source)
+                    except FileNotFoundError:
+                        logger.warning(f"Original for image {image_id} is missing: {name}")
+                        stats['missing'] += 1
+                        continue
+                    members.add(name)
+                archived_ids.append(image_id)
+
+            all_ids = archived_ids + list(archived_rows.values_list('id', flat=True))
+            missing_rows = CameraImage.objects.filter(id__in=all_ids, image__in=list(file_info)).filter(_missing_info())
+            for row in missing_rows.values('id', 'image', *INFO_FIELDS):
+                info = file_info[row['image']]
+                missing = {
+                    field: info[field] for field in INFO_FIELDS
+                    if row[field] in (None, '') and info[field] is not None
+                }
+                if missing:
+                    CameraImage.objects.filter(id=row['id']).update(**missing)
+            index = [
+                {
+                    'id': row['id'],
+                    'member': row['image'],
+                    'camera_id': row['camera__camera_id'],
+                    'created_at': row['created_at'].isoformat(),
+                    'byte_size': row['byte_size'],
+                    'content_hash': row['content_hash'],
+                    'is_analyzed': row['is_analyzed'],
+                    'confidence_score': row['confidence_score'],
+                }
+                for row in CameraImage.objects.filter(id__in=all_ids).order_by('created_at').values(
+                    'id', 'image', 'camera__camera_id', 'created_at', 'byte_size',
+                    'content_hash', 'is_analyzed', 'confidence_score'
+                )
+            ]
+            zip_out.writestr(INDEX_MEMBER, json.dumps({'day': day.date().isoformat(), 'images': index}, indent=1))
+
+        if not archived_ids:
+            return stats
+        spool.seek(0)
+        # The storage picks a fresh name if the day already has an archive, so the
+        # old one stays valid until every row points at the new one
+        archive_name = default_storage.save(archive_base_name(day), File(spool))
+
+    CameraImage.objects.filter(id__in=all_ids).update(storage_tier='ARCHIVED', archive_name=archive_name)
+    stats['archives'] = 1
+
+    # Loose originals go once nothing outside an archive needs them
+    still_loose = set(
+        CameraImage.objects.filter(image__in=members).exclude(storage_tier='ARCHIVED')
+        .values_list('image', flat=True)
+    )
+    for name in members - still_loose:
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            logger.warning(f"Could not delete archived original {name}: {e}")
+    _remove_stale_archives(day)
+    return stats
+
+
+def _remove_stale_archives(day):
+    """Delete earlier or half-written archives of a day that no row references"""
+    base = archive_base_name(day)
+    directory, filename = os.path.split(base)
+    prefix = os.path.splitext(filename)[0]
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    _remove_unreferenced(
+        f'{directory}/{name}' for name in files if name.startswith(prefix) and name.endswith('.zip')
+    )
+
+
+class ArchiveMemberFile:
+    """Readable stream of one archived original; closing it closes the archive too"""
+
+    def __init__(self, archive_name, member):
+        self._archive = default_storage.open(archive_name, 'rb')
+        try:
+            self._zip = zipfile.ZipFile(self._archive)
+            self._member = self._zip.open(member)
+        except Exception:
+            self._archive.close()
+            raise
+        self.name = member
+
+    def read(self, size=-1):
+        return self._member.read(size)
+
+    def close(self):
+        self._member.close()
+        self._zip.close()
+        self._archive.close()
+
+
+def open_original(camera_image):
+    """Open the original image wherever its tier keeps it"""
+    if camera_image.storage_tier == 'ARCHIVED':
+        return ArchiveMemberFile(camera_image.archive_name, camera_image.image.name)
+    return default_storage.open(camera_image.image.name, 'rb')
+
+
+def delete_day(day, policy, dry_run=False):
+    """Delete images of one capture day past the retention limit, with their files"""
+    queryset = policy.eligible('delete').filter(**day_range(day))
+    if dry_run:
+        return {'images': queryset.count(), 'files': 0}
+
+    names = set()
+    for row in queryset.values_list('image', 'thumbnail', 'medium', 'archive_name'):
+        names.update(row)
+    # Files shared with images that are kept (deduplication) survive the delete
+    _, deleted = queryset.delete()
+    return {'images': deleted.get('core.CameraImage', 0), 'files': _remove_unreferenced(names)}
+
+
+TIER_FUNCTIONS = {
+    'compact': compact_day,
+    'archive': archive_day,
+    'delete': delete_day,
+}
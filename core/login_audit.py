@@ -0,0 +1,125 @@
+"""
+Login audit log backed by the LoginAttempt table.
+
+Each process buffers its login attempts and writes them with one
+bulk_create. The buffer is flushed when it reaches LOGIN_AUDIT_BATCH_SIZE,
+LOGIN_AUDIT_FLUSH_SECONDS after its first entry, before it is read, and
+at exit. A burst of failed logins therefore costs one insert per batch
+instead of a rewrite of the whole log per attempt. Rows older than
+LOGIN_AUDIT_RETENTION_DAYS are pruned at most once an hour, which keeps
+the table bounded.
+
+page() reads newest first with keyset pagination on the id, so an
+older page costs the same as the first one.
+"""
+
+import atexit
+import ipaddress
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class LoginAuditLog:
+    """Batched, bounded writer and keyset-paged reader of LoginAttempt rows"""
+
+    PRUNE_INTERVAL = timedelta(hours=1)
+
+    def __init__(self, batch_size=None, flush_seconds=None, retention_days=None):
+        self.batch_size = batch_size or getattr(settings, 'LOGIN_AUDIT_BATCH_SIZE', 20)
+        self.flush_seconds = flush_seconds if flush_seconds is not None else getattr(settings, 'LOGIN_AUDIT_FLUSH_SECONDS', 2.0)
+        self.retention_days = retention_days or getattr(settings, 'LOGIN_AUDIT_RETENTION_DAYS', 90)
+        self.pending = []
+        self.lock = threading.Lock()
+        self.timer = None
+        self.pruned_at = None
+
+    def record(self, username, ip_address, success, timestamp=None):
+        from .models import LoginAttempt
+
+        try:
+            ip_address = str(ipaddress.ip_address((ip_address or '').strip()))
+        except ValueError:
+            ip_address = None
+        attempt = LoginAttempt(username=username[:150], ip_address=ip_address, success=success,
+                               timestamp=timestamp or timezone.now())
+        with self.lock:
+            self.pending.append(attempt)
+            full = len(self.pending) >= self.batch_size
+            if not full and self.timer is None:
+                self.timer = threading.Timer(self.flush_seconds, self._flush_in_background)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread has its own database connection
+            connection.close()
+
+    def flush(self):
+        """Write the buffered attempts; returns how many were written"""
+        from .models import LoginAttempt
+
+        with self.lock:
+            batch, self.pending = self.pending, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not batch:
+            return 0
+        try:
+            LoginAttempt.objects.bulk_create(batch)
+            self.prune()
+        except DatabaseError as e:
+            logger.error(f"❌ Could not write {len(batch)} login audit entries: {e}")
+            return 0
+        return len(batch)
+
+    def prune(self, now=None):
+        """Delete attempts past the retention period (at most once per PRUNE_INTERVAL)"""
+        from .models import LoginAttempt
+
+        now = now or timezone.now()
+        if self.pruned_at is not None and now - self.pruned_at < self.PRUNE_INTERVAL:
+            return 0
+        self.pruned_at = now
+        deleted, _ = LoginAttempt.objects.filter(timestamp__lt=now - timedelta(days=self.retention_days)).delete()
+        return deleted
+
+    def page(self, username=None, ip_address=None, success=None, before=None, limit=50):
+        """
+        Attempts newest first, optionally filtered. Returns the rows and the
+        `before` id of the next (older) page, or None on the last page.
+        """
+        from .models import LoginAttempt
+
+        self.flush()
+        attempts = LoginAttempt.objects.order_by('-id')
+        if username:
+            attempts = attempts.filter(username=username)
+        if ip_address:
+            try:
+                attempts = attempts.filter(ip_address=str(ipaddress.ip_address(ip_address.strip())))
+            except ValueError:
+                return [], None
+        if success is not None:
+            attempts = attempts.filter(success=success)
+        if before:
+            attempts = attempts.filter(id__lt=before)
+        rows = list(attempts[:limit + 1])
+        next_before = rows[limit - 1].id if len(rows) > limit else None
+        return rows[:limit], next_before
+
+
+login_audit = LoginAuditLog()
+atexit.register(login_audit.flush)
@@ -0,0 +1,195 @@
+"""
+Failed-login throttling per client IP and per username.
+
+Each identifier is counted over a sliding window built from two fixed
+buckets: the current window and the previous one. The sliding count
+is the current bucket plus the previous bucket weighted by how much
+of it is still inside the window, which is how Redis/nginx-style rate
+limiters approximate a true sliding log.
+
+Buckets only ever go up through cache.incr. It is atomic on the
+locmem, redis and memcached backends, so concurrent failures are never
+lost there. DatabaseCache and FileBasedCache inherit BaseCache.incr (a
+get then a set): their increments are serialized with a lock, which
+keeps counts exact within one process but not across several workers,
+so use a shared redis or memcached cache for multi-process deployments.
+A login costs one get_many for all counters and lock flags; a failure
+adds one incr per counter, plus one set when a limit is reached.
+
+Tracked identifiers are indexed per time bucket: the failure that
+opens an identifier's bucket appends it to that bucket's index (an
+incr'd slot count plus one key per slot). Only the indexes of the
+current and previous bucket are read, and older ones expire with
+their buckets, so the index prunes itself without a keyspace scan.
+
+The index costs about four cache entries per identifier that failed in
+the last two windows (its counter bucket and index slot, for both
+windows). A cache that evicts entries (LocMemCache culls once it
+reaches MAX_ENTRIES, see CACHES) loses index slots: tracked() reports
+how many it could not read instead of silently listing fewer.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache, caches
+from django.core.cache.backends.base import BaseCache
+
+logger = logging.getLogger(__name__)
+
+# Serializes incr on backends whose incr is a plain get + set
+_incr_lock = threading.Lock()
+
+
+class LoginThrottle:
+    """Sliding-window failure counters with IP blocking and account locking"""
+
+    def __init__(self, window=None, ip_limit=None, user_limit=None,
+                 ip_block_seconds=None, user_lock_seconds=None, cache=None):
+        self.window = window or getattr(settings, 'LOGIN_THROTTLE_WINDOW_SECONDS', 3600)
+        self.ip_limit = ip_limit or getattr(settings, 'LOGIN_IP_ATTEMPT_LIMIT', 10)
+        self.user_limit = user_limit or getattr(settings, 'LOGIN_USER_ATTEMPT_LIMIT', 5)
+        self.ip_block_seconds = ip_block_seconds or getattr(settings, 'LOGIN_IP_BLOCK_SECONDS', 3600)
+        self.user_lock_seconds = user_lock_seconds or getattr(settings, 'LOGIN_USER_LOCK_SECONDS', 1800)
+        self.cache = cache or default_cache
+
+    def bucket_keys(self, prefix, identifier, now):
+        """Keys of the current and the previous bucket"""
+        bucket = int(now // self.window)
+        return f"{prefix}:{identifier}:{bucket}", f"{prefix}:{identifier}:{bucket - 1}"
+
+    def status(self, ip, username, now=None):
+        """Lock flags and sliding counts of an IP and a username, in one cache call"""
+        now = now if now is not None else time.time()
+        ip_current, ip_previous = self.bucket_keys('ip_attempts', ip, now)
+        user_current, user_previous = self.bucket_keys('user_attempts', username, now)
+        values = self.cache.get_many([
+            f'ip_blocked:{ip}', f'account_locked:{username}', ip_current, ip_previous, user_current, user_previous,
+        ])
+        weight = 1 - (now % self.window) / self.window
+        return {
+            'now': now,
+            'ip_blocked': bool(values.get(f'ip_blocked:{ip}')),
+            'account_locked': bool(values.get(f'account_locked:{username}')),
+            'ip_attempts': values.get(ip_current, 0) + values.get(ip_previous, 0) * weight,
+            'user_attempts': values.get(user_current, 0) + values.get(user_previous, 0) * weight,
+            'weight': weight,
+            'previous': {'ip': values.get(ip_previous, 0), 'user': values.get(user_previous, 0)},
+        }
+
+    def incr_is_atomic(self):
+        backend = caches['default'] if self.cache is default_cache else self.cache
+        return getattr(type(backend), 'incr', None) is not BaseCache.incr
+
+    def incr(self, key):
+        """
+        Atomic increment that creates the key; keys live two windows so a
+        bucket can serve as the previous one. Returns (value, created).
+        """
+        if not self.incr_is_atomic():
+            with _incr_lock:
+                return self._incr(key)
+        return self._incr(key)
+
+    def _incr(self, key):
+        try:
+            return self.cache.incr(key), False
+        except ValueError:
+            # Missing key: only one concurrent add wins, the others increment its value
+            if self.cache.add(key, 1, self.window * 2):
+                return 1, True
+            return self.cache.incr(key), False
+
+    def count(self, prefix, identifier, now):
+        """Bump the current bucket; an identifier is indexed when it opens a bucket"""
+        bucket = int(now // self.window)
+        attempts, created = self.incr(f"{prefix}:{identifier}:{bucket}")
+        if created:
+            slot, _ = self.incr(f"{prefix}_index:{bucket}")
+            self.cache.set(f"{prefix}_index:{bucket}:{slot}", identifier, self.window * 2)
+        return attempts
+
+    def register_failure(self, ip, username, status=None):
+        """
+        Count a failed login; returns the sliding counts and whether this
+        failure blocked the IP or locked the account
+        """
+        status = status or self.status(ip, username)
+        now, weight = status['now'], status['weight']
+        ip_attempts = self.count('ip_attempts', ip, now) + status['previous']['ip'] * weight
+        user_attempts = self.count('user_attempts', username, now) + status['previous']['user'] * weight
+
+        ip_blocked = ip_attempts >= self.ip_limit and not status['ip_blocked']
+        account_locked = user_attempts >= self.user_limit and not status['account_locked']
+        if ip_blocked:
+            self.cache.set(f'ip_blocked:{ip}', True, self.ip_block_seconds)
+        if account_locked:
+            self.cache.set(f'account_locked:{username}', True, self.user_lock_seconds)
+        return {
+            'ip_attempts': ip_attempts,
+            'user_attempts': user_attempts,
+            'ip_blocked': ip_blocked,
+            'account_locked': account_locked,
+        }
+
+    def reset(self, ip=None, username=None, now=None):
+        """Forget the counters and lock of an IP and/or a username"""
+        now = now if now is not None else time.time()
+        keys = []
+        if ip is not None:
+            keys.extend(self.bucket_keys('ip_attempts', ip, now))
+            keys.append(f'ip_blocked:{ip}')
+        if username is not None:
+            keys.extend(self.bucket_keys('user_attempts', username, now))
+            keys.append(f'account_locked:{username}')
+        self.cache.delete_many(keys)
+
+    def tracked(self, now=None, limit=None):
+        """
+        IPs and usernames with failed attempts in the window, most attempts
+        first, from the bucket indexes: three cache calls however many
+        identifiers are tracked. Returns (entries, missing), missing being
+        the number of index slots the cache no longer holds.
+        """
+        now = now if now is not None else time.time()
+        bucket = int(now // self.window)
+        weight = 1 - (now % self.window) / self.window
+        kinds = {'ip_attempts': ('ip', 'ip_blocked'), 'user_attempts': ('user', 'account_locked')}
+
+        index_keys = {f"{prefix}_index:{b}": prefix for prefix in kinds for b in (bucket, bucket - 1)}
+        slots = {}
+        for index_key, size in self.cache.get_many(list(index_keys)).items():
+            for slot in range(1, size + 1):
+                slots[f"{index_key}:{slot}"] = index_keys[index_key]
+        # An identifier reset and failing again is indexed twice in a bucket
+        found = self.cache.get_many(list(slots))
+        missing = len(slots) - len(found)
+        if missing:
+            logger.warning(f"🔐 {missing} login throttle index slots were evicted from the cache; "
+                           f"tracked identifiers are incomplete (raise CACHES MAX_ENTRIES or use a shared cache)")
+        identifiers = {(slots[key], identifier) for key, identifier in found.items()}
+
+        keys = []
+        for prefix, identifier in identifiers:
+            keys.extend(self.bucket_keys(prefix, identifier, now))
+            keys.append(f"{kinds[prefix][1]}:{identifier}")
+        values = self.cache.get_many(keys)
+        entries = []
+        for prefix, identifier in identifiers:
+            current, previous = self.bucket_keys(prefix, identifier, now)
+            attempts = values.get(current, 0) + values.get(previous, 0) * weight
+            if attempts <= 0:
+                continue  # reset since it was indexed
+            entries.append({
+                'kind': kinds[prefix][0],
+                'identifier': identifier,
+                'attempts': round(attempts, 1),
+                'blocked': bool(values.get(f"{kinds[prefix][1]}:{identifier}")),
+            })
+        entries.sort(key=lambda entry: (-entry['attempts'], entry['kind'], entry['identifier']))
+        return (entries[:limit] if limit else entries), missing
+
+
+login_throttle = LoginThrottle()
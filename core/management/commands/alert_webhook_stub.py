@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+
+
+class Command(BaseCommand):
+    help = 'Local stand-in for an alerting webhook: prints the alerts POSTed by the rule engine (ALERT_WEBHOOK_URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            type=str,
+            default='127.0.0.1',
+            help='Address to listen on (default: 127.0.0.1)'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Port to listen on (default: 8765)'
+        )
+
+    def handle(self, *args, **options):
+        command = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                try:
+                    alerts = json.loads(body).get('alerts', [])
+                except (ValueError, AttributeError):
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                for alert in alerts:
+                    command.stdout.write(
+                        f"🚨 {alert.get('timestamp')} [{alert.get('severity')}] {alert.get('rule')} "
+                        f"{alert.get('entity_type')} {alert.get('entity_id')}: {alert.get('message')}"
+                    )
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                # Alerts are printed above; skip the per-request access log
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(
+            self.style.SUCCESS(f"🚀 Alert webhook stub listening on http://{options['host']}:{options['port']}/")
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('🛑 Alert webhook stub stopped'))
+        finally:
+            server.server_close()
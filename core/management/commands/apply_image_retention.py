@@ -0,0 +1,120 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from concurrent.futures import ThreadPoolExecutor
+import time
+import logging
+from core.image_retention import RetentionPolicy, TIER_FUNCTIONS
+
+logger = logging.getLogger(__name__)
+
+TIERS = ['compact', 'archive', 'delete']
+
+class Command(BaseCommand):
+    help = 'Compact, archive and delete old camera images according to the retention policy'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tier',
+            action='append',
+            choices=TIERS,
+            help='Only run this tier (repeatable; default: all tiers in order)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of capture days processed in parallel (default: 4)'
+        )
+        parser.add_argument(
+            '--compact-after',
+            type=int,
+            default=None,
+            help='Days before originals are re-encoded (default: CAMERA_COMPACT_AFTER_DAYS, 0 disables)'
+        )
+        parser.add_argument(
+            '--archive-after',
+            type=int,
+            default=None,
+            help='Days before originals are packed into day archives (default: CAMERA_ARCHIVE_AFTER_DAYS, 0 disables)'
+        )
+        parser.add_argument(
+            '--delete-after',
+            type=int,
+            default=None,
+            help='Days before images are deleted (default: CAMERA_DELETE_AFTER_DAYS, 0 disables)'
+        )
+        parser.add_argument(
+            '--include-unanalyzed',
+            action='store_true',
+            help='Also compact and archive images the classifier has not processed yet'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be processed without changing anything'
+        )
+
+    def handle(self, *args, **options):
+        policy = RetentionPolicy(
+            compact_after_days=options['compact_after'],
+            archive_after_days=options['archive_after'],
+            delete_after_days=options['delete_after'],
+            require_analyzed=False if options['include_unanalyzed'] else None,
+        )
+        tiers = [tier for tier in TIERS if tier in (options['tier'] or TIERS)]
+        dry_run = options['dry_run']
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'🚀 Applying image retention{" (dry run)" if dry_run else ""}...\n'
+                f'   Compact after: {policy.compact_after_days or "off"} days '
+                f'(quality {policy.compact_quality}, max {policy.compact_max_dimension}px)\n'
+                f'   Archive after: {policy.archive_after_days or "off"} days\n'
+                f'   Delete after: {policy.delete_after_days or "off"} days'
+            )
+        )
+
+        # Tiers run one after another; days within a tier run in parallel
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='image-retention') as executor:
+            for tier in tiers:
+                days = policy.days(tier)
+                if not days:
+                    self.stdout.write(f'✅ {tier}: nothing to do')
+                    continue
+
+                start_time = time.time()
+                totals = {}
+                jobs = [executor.submit(self.run_day, tier, day, policy, dry_run) for day in days]
+                for day, job in zip(days, jobs):
+                    stats = job.result()
+                    if stats is None:
+                        self.stdout.write(self.style.ERROR(f'❌ {tier} {day.date()}: failed (will be retried next run)'))
+                        continue
+                    for key, value in stats.items():
+                        totals[key] = totals.get(key, 0) + value
+                    self.stdout.write(f'   {tier} {day.date()}: {self.format_stats(stats)}')
+
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'✅ {tier}: {len(days)} day(s) in {time.time() - start_time:.1f}s - {self.format_stats(totals)}'
+                    )
+                )
+
+    def run_day(self, tier, day, policy, dry_run):
+        """Worker thread entry point; a failed day is logged and left for the next run"""
+        close_old_connections()
+        try:
+            return TIER_FUNCTIONS[tier](day, policy, dry_run=dry_run)
+        except Exception as e:
+            logger.error(f"Image retention {tier} failed for {day.date()}: {e}")
+            return None
+        finally:
+            close_old_connections()
+
+    def format_stats(self, stats):
+        parts = []
+        for key, value in stats.items():
+            if key.startswith('bytes_'):
+                value = f'{value / (1024 * 1024):.1f} MB'
+            parts.append(f'{key.replace("_", " ")}: {value}')
+        return ', '.join(parts)
@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand
+from concurrent.futures import ThreadPoolExecutor
+import time
+import logging
+from core.models import CameraImage
+from core.image_pipeline import read_image_info
+
+logger = logging.getLogger(__name__)
+
+INFO_FIELDS = ['width', 'height', 'byte_size', 'content_hash']
+
+class Command(BaseCommand):
+    help = 'Populate width, height, byte size and content hash for existing camera images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Number of worker threads reading files (default: 8)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows read and updated per batch (default: 500)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recompute info for rows that already have it'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = CameraImage.objects.only('id', 'image', *INFO_FIELDS).order_by('id')
+        if not options['force']:
+            queryset = queryset.filter(content_hash='')
+
+        total = queryset.count()
+        self.stdout.write(
+            self.style.SUCCESS(f'🚀 Backfilling file info for {total} images with {options["workers"]} worker(s)')
+        )
+
+        updated = 0
+        failed = 0
+        last_id = 0
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='image-backfill') as executor:
+            while True:
+                # Keyset pagination so already processed rows are never rescanned
+                batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+
+                results = list(executor.map(self._read_info, batch))
+                changed = []
+                for camera_image, info in zip(batch, results):
+                    if info is None:
+                        failed += 1
+                        continue
+                    for field, value in info.items():
+                        setattr(camera_image, field, value)
+                    changed.append(camera_image)
+
+                CameraImage.objects.bulk_update(changed, INFO_FIELDS)
+                updated += len(changed)
+                self.stdout.write(f'📊 {updated}/{total} images updated')
+
+        elapsed = time.time() - start_time
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Updated {updated} images in {elapsed:.1f}s, {failed} failed'
+            )
+        )
+
+    def _read_info(self, camera_image):
+        """Read file info for one image in a worker thread"""
+        try:
+            camera_image.image.open('rb')
+            try:
+                return read_image_info(camera_image.image)
+            finally:
+                camera_image.image.close()
+        except Exception as e:
+            logger.warning(f"Could not read file info for image {camera_image.id}: {e}")
+            return None
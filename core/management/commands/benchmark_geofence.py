@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from datetime import datetime, timedelta, timezone as dt_timezone
+from core.geofence import Fence, GeofenceEngine, GeofenceGrid, METERS_PER_DEGREE
+import math
+import random
+import time
+
+class Command(BaseCommand):
+    help = 'Benchmark the geofence engine on synthetic trucks and bins (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trucks', type=int, default=500, help='Number of trucks (default: 500)')
+        parser.add_argument('--bins', type=int, default=50000, help='Number of bin fences (default: 50000)')
+        parser.add_argument('--steps', type=int, default=20, help='Position updates per truck (default: 20)')
+        parser.add_argument('--area-km', type=float, default=30.0, help='Side of the square city in km (default: 30)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        origin_lat, origin_lon = 4.05, 9.70
+        side = options['area_km'] * 1000 / METERS_PER_DEGREE
+        lon_side = side / math.cos(math.radians(origin_lat))
+
+        fences = [
+            Fence('BIN', f'BIN{i:06d}', origin_lat + rng.random() * side, origin_lon + rng.random() * lon_side, 30.0)
+            for i in range(options['bins'])
+        ]
+        started = time.perf_counter()
+        grid = GeofenceGrid(fences)
+        build_seconds = time.perf_counter() - started
+
+        # Trucks drive from bin to bin, so fences are actually entered and left
+        trucks = {}
+        for i in range(options['trucks']):
+            target = rng.choice(fences)
+            trucks[f'TRUCK{i:04d}'] = [target.latitude + 0.002, target.longitude + 0.002, rng.choice(fences)]
+        updates = []
+        clock = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        for step in range(options['steps']):
+            clock += timedelta(seconds=15)
+            for truck_id, state in trucks.items():
+                latitude, longitude, target = state
+                # About 10 m/s towards the next bin
+                d_lat, d_lon = target.latitude - latitude, target.longitude - longitude
+                distance = math.hypot(d_lat, d_lon) or 1e-9
+                move = min(1.0, 150 / METERS_PER_DEGREE / distance)
+                latitude, longitude = latitude + d_lat * move, longitude + d_lon * move
+                if move == 1.0:
+                    target = rng.choice(fences)
+                state[:] = [latitude, longitude, target]
+                updates.append((truck_id, latitude, longitude, clock))
+
+        engine = GeofenceEngine(grid, dwell_seconds=30)
+        started = time.perf_counter()
+        events = 0
+        for update in updates:
+            events += len(engine.update(*update))
+        grid_seconds = time.perf_counter() - started
+
+        # Baseline: every position checked against every fence
+        sample = updates[:min(len(updates), 200)]
+        started = time.perf_counter()
+        for _, latitude, longitude, _ in sample:
+            [fence for fence in fences if grid.distance_m(latitude, longitude, fence) <= fence.radius]
+        brute_seconds = (time.perf_counter() - started) / len(sample) * len(updates)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"📍 {options['trucks']} trucks x {options['bins']} bins, {len(updates)} position updates\n"
+            f"   Grid build: {build_seconds:.2f}s ({len(grid.cells)} cells of {grid.cell_size_m:.0f} m)\n"
+            f"   Grid engine: {grid_seconds:.3f}s, {len(updates) / grid_seconds:,.0f} updates/s, "
+            f"{grid_seconds / len(updates) * 1e6:.1f} us/update, {events} events\n"
+            f"   Brute force (estimated from {len(sample)} updates): {brute_seconds:.1f}s, "
+            f"{len(updates) / brute_seconds:,.0f} updates/s\n"
+            f"   Speed-up: {brute_seconds / grid_seconds:,.0f}x"
+        ))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.cache import caches
+from core.login_throttle import LoginThrottle
+from core.management.commands.benchmark_login_throttle import CountingCache
+import time
+import uuid
+
+class Command(BaseCommand):
+    help = 'Track failed logins from many IPs and time listing them through the throttle index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ips', type=int, default=10000, help='Distinct IPs with a failed login (default: 10000)')
+        parser.add_argument(
+            '--cache',
+            type=str,
+            default='default',
+            help='Cache alias to run against, as configured in CACHES (default: default)'
+        )
+
+    def handle(self, *args, **options):
+        count = options['ips']
+        counting = CountingCache(caches[options['cache']])
+        throttle = LoginThrottle(cache=counting)
+        run = uuid.uuid4().hex[:6]
+        now = time.time()
+
+        started = time.perf_counter()
+        for i in range(count):
+            ip = f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}-{run}'
+            throttle.register_failure(ip, f'user-{run}', throttle.status(ip, f'user-{run}', now=now))
+        record_seconds = time.perf_counter() - started
+        record_calls = counting.calls
+
+        counting.calls = 0
+        started = time.perf_counter()
+        tracked, missing = throttle.tracked(now=now)
+        list_seconds = time.perf_counter() - started
+        list_calls = counting.calls
+
+        ips = [entry for entry in tracked if entry['kind'] == 'ip' and entry['identifier'].endswith(run)]
+        users = [entry for entry in tracked if entry['kind'] == 'user' and entry['identifier'] == f'user-{run}']
+
+        self.stdout.write(
+            f"🔐 {count} IPs with a failed login\n"
+            f"   Recording: {record_seconds:.2f}s, {record_calls / count:.1f} cache calls per failed login\n"
+            f"   Listing: {list_seconds:.2f}s in {list_calls} cache calls, "
+            f"{len(ips)} IPs and {len(users)} user tracked (user at {users[0]['attempts'] if users else 0} attempts), "
+            f"{missing} index slots evicted"
+        )
+        for entry in ips:
+            throttle.reset(ip=entry['identifier'], now=now)
+        throttle.reset(username=f'user-{run}', now=now)
+        if len(ips) != count or not users:
+            raise CommandError(
+                f'Expected {count} tracked IPs and the user, listed {len(ips)} and {len(users)}: '
+                f'the cache is too small for the index (raise MAX_ENTRIES in CACHES)'
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Every tracked IP was listed'))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.core.cache import cache
+from concurrent.futures import ThreadPoolExecutor
+from core.login_throttle import LoginThrottle
+import threading
+import time
+import uuid
+
+class CountingCache:
+    """Delegates to the real cache and counts the calls (round-trips on a shared backend)"""
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def __getattr__(self, name):
+        method = getattr(self._cache, name)
+
+        def counted(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+            return method(*args, **kwargs)
+        return counted
+
+class Command(BaseCommand):
+    help = 'Time the login throttle under concurrent failed logins, against the old get+set counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent threads (default: 16)')
+        parser.add_argument('--attempts', type=int, default=2000, help='Failed logins in total (default: 2000)')
+
+    def handle(self, *args, **options):
+        threads, attempts = options['threads'], options['attempts']
+        run = uuid.uuid4().hex[:8]
+        ip, username = f'bench-{run}', f'bench-user-{run}'
+
+        # Sliding-window throttle: one get_many to check, one atomic incr per counter
+        counting = CountingCache(cache)
+        throttle = LoginThrottle(cache=counting)
+
+        def failed_login(_):
+            throttle.register_failure(ip, username, throttle.status(ip, username))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(failed_login, range(attempts)))
+        elapsed = time.perf_counter() - started
+        calls = counting.calls
+
+        # Both buckets, in case the run crossed a window boundary
+        now = time.time()
+        ip_count = sum(cache.get(key, 0) for key in throttle.bucket_keys('ip_attempts', ip, now))
+        user_count = sum(cache.get(key, 0) for key in throttle.bucket_keys('user_attempts', username, now))
+        throttle.reset(ip=ip, username=username, now=now)
+
+        # The previous read-modify-write counters, for comparison
+        legacy_key = f'bench_legacy_attempts:{run}'
+
+        def legacy_failed_login(_):
+            cache.set(legacy_key, cache.get(legacy_key, 0) + 1, 3600)
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(legacy_failed_login, range(attempts)))
+        legacy_count = cache.get(legacy_key, 0)
+        cache.delete(legacy_key)
+
+        self.stdout.write(
+            f"🔐 {attempts} failed logins from {threads} threads\n"
+            f"   Sliding window: IP counted {ip_count}, user counted {user_count}, "
+            f"{calls / attempts:.1f} cache calls per login, {attempts / elapsed:,.0f} logins/s\n"
+            f"   get+set counters: counted {legacy_count} ({attempts - legacy_count} lost)"
+        )
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete (exact counts are covered by core.tests)'))
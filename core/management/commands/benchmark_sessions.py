@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from unittest import mock
+import time
+import uuid
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Count session writes per N requests of a logged-in dashboard, with and without write coalescing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per run (default: 1000)')
+        parser.add_argument('--poll-seconds', type=float, default=5.0, help='Simulated time between requests (default: 5)')
+        parser.add_argument('--path', type=str, default='/api/trucks/', help='Endpoint to poll (default: /api/trucks/)')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f'session-bench-{uuid.uuid4().hex[:8]}', password=uuid.uuid4().hex)
+        every_request = [entry for entry in settings.MIDDLEWARE if entry != 'core.session_middleware.SessionRefreshMiddleware']
+        try:
+            with override_settings(SESSION_SAVE_EVERY_REQUEST=True, MIDDLEWARE=every_request):
+                before = self.run(user, options)
+            after = self.run(user, options)
+        finally:
+            user.delete()
+
+        self.stdout.write(
+            f"🍪 {options['requests']} requests to {options['path']} every {options['poll_seconds']:g}s "
+            f"({settings.SESSION_ENGINE.rsplit('.', 1)[-1]} sessions)\n"
+            f"   SESSION_SAVE_EVERY_REQUEST: {before} session writes\n"
+            f"   SessionRefreshMiddleware: {after} session writes"
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {before - after} session writes saved'))
+
+    def run(self, user, options):
+        """Session writes (INSERT/UPDATE/DELETE on django_session) during the polling, after login"""
+        started = time.time()
+        clock = mock.Mock()
+        with override_settings(ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver']), \
+                mock.patch('core.session_middleware.time', clock):
+            client = Client()
+            clock.time.return_value = started
+            client.force_login(user)
+            with CaptureQueriesContext(connection) as queries:
+                for i in range(options['requests']):
+                    clock.time.return_value = started + i * options['poll_seconds']
+                    client.get(options['path'])
+            client.logout()
+        return sum(
+            1 for query in queries.captured_queries
+            if 'django_session' in query['sql'] and query['sql'].lstrip().split(' ', 1)[0] in ('INSERT', 'UPDATE', 'DELETE')
+        )
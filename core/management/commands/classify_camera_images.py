@@ -0,0 +1,210 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+import time
+import logging
+import numpy as np
+from core.models import CameraImage
+from core.waste_classifier import get_classifier, load_image_array, Throughput
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+RESULT_FIELDS = ['confidence_score', 'detected_objects', 'analysis_result', 'is_analyzed']
+
+class Command(BaseCommand):
+    help = 'Classify unanalyzed camera images in batches on the CPU'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=32,
+            help='Number of images claimed and classified per batch (default: 32)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of threads decoding images (default: 4)'
+        )
+        parser.add_argument(
+            '--model',
+            type=str,
+            default=None,
+            help='Path to an ONNX classifier; the built-in colour/texture classifier is used if omitted'
+        )
+        parser.add_argument(
+            '--labels',
+            type=str,
+            default=None,
+            help='Comma-separated class labels for the ONNX model outputs'
+        )
+        parser.add_argument(
+            '--continuous',
+            action='store_true',
+            help='Keep polling for new images instead of exiting when none are left'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Polling interval in seconds when running continuously (default: 5.0)'
+        )
+        parser.add_argument(
+            '--benchmark',
+            type=str,
+            default=None,
+            metavar='DIR',
+            help='Benchmark the classifier over a local image folder without touching the database'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Number of passes over the benchmark folder (default: 1)'
+        )
+
+    def handle(self, *args, **options):
+        labels = options['labels'].split(',') if options['labels'] else None
+        self.classifier = get_classifier(options['model'], labels)
+        self.batch_size = options['batch_size']
+        self.executor = ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='classifier-decode')
+
+        try:
+            if options['benchmark']:
+                self.run_benchmark(Path(options['benchmark']), options['repeat'])
+            else:
+                self.run_worker(options['continuous'], options['interval'])
+        finally:
+            self.executor.shutdown()
+
+    def run_worker(self, continuous, interval):
+        self.stdout.write(
+            self.style.SUCCESS(f'🚀 Classifying camera images with {self.classifier.name} (batch size {self.batch_size})')
+        )
+        throughput = Throughput()
+        try:
+            while True:
+                processed = self.process_batch(throughput)
+                if processed:
+                    stats = throughput.summary()
+                    self.stdout.write(
+                        f"📊 {stats['images']} images classified, {stats['images_per_sec']} images/sec "
+                        f"(decode {stats['decode_images_per_sec']}/s, inference {stats['inference_images_per_sec']}/s)"
+                    )
+                    continue
+                if not continuous:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('🛑 Stopped by user'))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Done. {throughput.images} images classified'))
+
+    def process_batch(self, throughput):
+        """Claim, classify and save one batch. Returns the number of images handled."""
+        queryset = (
+            CameraImage.objects.filter(is_analyzed=False)
+            .exclude(image='')
+            .order_by('created_at')
+            .only('id', 'image', *RESULT_FIELDS)
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            # Rows stay locked until the results are written, so parallel
+            # workers skip each other's batches instead of waiting on them
+            claim = transaction.atomic()
+            queryset = queryset.select_for_update(skip_locked=True)
+        else:
+            # SQLite has no row locks; holding a write transaction across
+            # decode and inference would only block the upload endpoint
+            claim = nullcontext()
+
+        with claim:
+            batch = list(queryset[:self.batch_size])
+            if not batch:
+                return 0
+
+            decode_start = time.perf_counter()
+            arrays = list(self.executor.map(self._decode, batch))
+            decode_seconds = time.perf_counter() - decode_start
+
+            decoded = [(image, array) for image, array in zip(batch, arrays) if array is not None]
+            inference_start = time.perf_counter()
+            predictions = self.classifier.predict(np.stack([array for _, array in decoded])) if decoded else []
+            inference_seconds = time.perf_counter() - inference_start
+
+            for (camera_image, _), prediction in zip(decoded, predictions):
+                camera_image.confidence_score = prediction['confidence']
+                camera_image.detected_objects = prediction['scores']
+                camera_image.analysis_result = prediction
+                camera_image.is_analyzed = True
+            for camera_image, array in zip(batch, arrays):
+                if array is None:
+                    # Don't retry unreadable files forever
+                    camera_image.analysis_result = {'model': self.classifier.name, 'error': 'Image could not be decoded'}
+                    camera_image.is_analyzed = True
+
+            CameraImage.objects.bulk_update(batch, RESULT_FIELDS)
+
+        throughput.add(len(decoded), decode_seconds, inference_seconds)
+        return len(batch)
+
+    def _decode(self, camera_image):
+        try:
+            camera_image.image.open('rb')
+            try:
+                return load_image_array(camera_image.image)
+            finally:
+                camera_image.image.close()
+        except Exception as e:
+            logger.warning(f"Could not decode image {camera_image.id}: {e}")
+            return None
+
+    def run_benchmark(self, folder, repeat):
+        if not folder.is_dir():
+            raise CommandError(f'Benchmark folder not found: {folder}')
+        paths = sorted(p for p in folder.rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS)
+        if not paths:
+            raise CommandError(f'No images found in {folder}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'🏁 Benchmarking {self.classifier.name} on {len(paths)} images '
+                f'x {repeat} pass(es), batch size {self.batch_size}'
+            )
+        )
+        throughput = Throughput()
+        labels = {}
+        for _ in range(repeat):
+            for start in range(0, len(paths), self.batch_size):
+                chunk = paths[start:start + self.batch_size]
+                decode_start = time.perf_counter()
+                arrays = [a for a in self.executor.map(self._decode_path, chunk) if a is not None]
+                decode_seconds = time.perf_counter() - decode_start
+                if not arrays:
+                    continue
+                inference_start = time.perf_counter()
+                predictions = self.classifier.predict(np.stack(arrays))
+                inference_seconds = time.perf_counter() - inference_start
+                throughput.add(len(arrays), decode_seconds, inference_seconds)
+                for prediction in predictions:
+                    labels[prediction['label']] = labels.get(prediction['label'], 0) + 1
+
+        stats = throughput.summary()
+        self.stdout.write(f"   Images:        {stats['images']}")
+        self.stdout.write(f"   Wall time:     {stats['wall_seconds']}s")
+        self.stdout.write(f"   Throughput:    {stats['images_per_sec']} images/sec")
+        self.stdout.write(f"   Decode only:   {stats['decode_images_per_sec']} images/sec")
+        self.stdout.write(f"   Inference:     {stats['inference_images_per_sec']} images/sec")
+        self.stdout.write(f"   Labels:        {labels}")
+
+    def _decode_path(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return load_image_array(f)
+        except Exception as e:
+            logger.warning(f"Could not decode {path}: {e}")
+            return None
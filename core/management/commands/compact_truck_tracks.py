@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Truck
+from core.truck_tracks import compact_tracks
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Simplify old truck GPS tracks with Douglas-Peucker, keeping their shape within a tolerance'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='Only compact fixes older than this many days (default: TRUCK_TRACK_COMPACT_AFTER_DAYS)'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=None,
+            help='Maximum deviation from the original track in meters (default: TRUCK_TRACK_TOLERANCE_M)'
+        )
+        parser.add_argument(
+            '--truck-id',
+            type=str,
+            default=None,
+            help='Only compact the track of this truck'
+        )
+
+    def handle(self, *args, **options):
+        truck = None
+        if options['truck_id']:
+            truck = Truck.objects.filter(truck_id=options['truck_id']).first()
+            if truck is None:
+                raise CommandError(f'Truck "{options["truck_id"]}" does not exist')
+
+        started = time.time()
+        examined, deleted = compact_tracks(
+            older_than_days=options['older_than_days'], tolerance_m=options['tolerance'], truck=truck
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Compacted {examined} fixes in {time.time() - started:.1f}s: '
+                f'{deleted} removed, {examined - deleted} kept'
+            )
+        )
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from core.collection_events import CollectionDetector, backfill
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Backfill CollectionEvents (emptied bins) from the stored sensor readings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=str,
+            default=None,
+            help='Only scan readings from this ISO timestamp on'
+        )
+        parser.add_argument(
+            '--until',
+            type=str,
+            default=None,
+            help='Only scan readings before this ISO timestamp'
+        )
+        parser.add_argument(
+            '--bin-id',
+            type=str,
+            default=None,
+            help='Only scan the readings of this bin'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='Readings loaded and scanned at a time (default: 50000)'
+        )
+        parser.add_argument(
+            '--min-drop',
+            type=float,
+            default=None,
+            help='Fill points a bin must lose between two readings (default: COLLECTION_MIN_DROP)'
+        )
+
+    def handle(self, *args, **options):
+        since = self.parse_timestamp(options['since'], '--since')
+        until = self.parse_timestamp(options['until'], '--until')
+
+        started = time.time()
+        scanned, found = backfill(
+            since=since, until=until, bin_id=options['bin_id'], chunk_size=options['chunk_size'],
+            detector=CollectionDetector(min_drop=options['min_drop'])
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Scanned {scanned} readings in {time.time() - started:.1f}s, '
+                f'{found} collections found (already recorded ones are kept as they are)'
+            )
+        )
+
+    def parse_timestamp(self, value, option):
+        if value is None:
+            return None
+        timestamp = parse_datetime(value)
+        if timestamp is None:
+            raise CommandError(f'{option} must be an ISO timestamp, got "{value}"')
+        return timestamp
@@ -1,13 +1,20 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 import time
-import requests
+import random
 import logging
 from datetime import datetime
-from core.models import Bin, SensorData
+from statistics import median
+from core.models import Bin, SensorData, SensorFetcherCheckpoint
+from core.sensor_sources import SOURCES, get_sensor_source
 
 logger = logging.getLogger(__name__)
 
+BENCHMARK_PREFIX = 'BENCH-'
+WRITE_BATCH_SIZE = 500
+
 class Command(BaseCommand):
     help = 'Fetch sensor data every second and update bin information in real-time'
     
@@ -29,20 +36,75 @@ class Command(BaseCommand):
             action='store_true',
             help='Run continuously (default: False)'
         )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default='sensor-fetcher',
+            help='Name of the persisted watermark to resume from (default: sensor-fetcher)'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=500,
+            help='Sensor readings requested per API page (default: 500)'
+        )
+        parser.add_argument(
+            '--max-pages',
+            type=int,
+            default=20,
+            help='Maximum pages fetched per run; a larger backlog is fetched on the next run (default: 20)'
+        )
+        parser.add_argument(
+            '--source',
+            type=str,
+            default='http',
+            choices=SOURCES,
+            help='Read through the REST API (http) or straight from the database (db) (default: http)'
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Compare the sources on synthetic bins instead of fetching (needs the API server on the same database)'
+        )
+        parser.add_argument(
+            '--bins',
+            type=int,
+            default=10000,
+            help='Number of synthetic bins (one new reading each) for --benchmark (default: 10000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Number of benchmark passes per source (default: 3)'
+        )
     
     def handle(self, *args, **options):
         interval = options['interval']
         api_url = options['api_url']
         continuous = options['continuous']
         
+        if options['benchmark']:
+            self.run_benchmark(api_url, options['bins'], options['repeat'], options['page_size'])
+            return
+        
         self.stdout.write(
             self.style.SUCCESS(
                 f'🚀 Starting sensor data fetcher every {interval} second(s)'
             )
         )
-        self.stdout.write(f'📡 API URL: {api_url}')
+        if options['source'] == 'db':
+            self.stdout.write('🗄️ Source: database')
+        else:
+            self.stdout.write(f'📡 API URL: {api_url}')
         
-        fetcher = RealTimeSensorFetcher(api_url)
+        fetcher = RealTimeSensorFetcher(
+            api_url,
+            checkpoint_name=options['checkpoint'],
+            page_size=options['page_size'],
+            max_pages=options['max_pages'],
+            source=options['source']
+        )
         
         if continuous:
             fetcher.run_continuous_fetch(interval)
@@ -53,102 +115,212 @@ class Command(BaseCommand):
                 updated_count = fetcher.process_sensor_data(sensor_data)
                 self.stdout.write(
                     self.style.SUCCESS(
-                        f'✅ Fetched {len(sensor_data)} sensor readings, updated {updated_count} bins'
+                        f'✅ Fetched {len(sensor_data)} sensor readings, updated {updated_count} bins '
+                        f'({fetcher.stats["pending"]} pending, lag {fetcher.stats["lag_seconds"]}s)'
                     )
                 )
             else:
                 self.stdout.write(
-                    self.style.WARNING('⚠️ No sensor data received')
+                    self.style.WARNING('⚠️ No new sensor data')
+                )
+
+    def run_benchmark(self, api_url, bin_count, repeat, page_size):
+        if Bin.objects.filter(bin_id__startswith=BENCHMARK_PREFIX).exists():
+            raise CommandError(f'Bins named {BENCHMARK_PREFIX}* already exist; remove them before benchmarking')
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'🏁 Benchmarking sensor sources at {bin_count} bins (one new reading each) x {repeat} pass(es)'
+            )
+        )
+        # The benchmark reads only the readings it seeds
+        watermark = SensorData.objects.order_by('-timestamp', '-id').values_list('timestamp', 'id').first() or (None, 0)
+        self.seed_benchmark(bin_count)
+        max_pages = bin_count // page_size + 1
+        try:
+            for source in SOURCES:
+                timings = {'readings': [], 'apply': [], 'bins': []}
+                for _ in range(repeat):
+                    fetcher = RealTimeSensorFetcher(
+                        api_url, checkpoint_name=f'{BENCHMARK_PREFIX}{source}',
+                        page_size=page_size, max_pages=max_pages, source=source
+                    )
+                    fetcher.watermark = watermark
+                    
+                    start = time.perf_counter()
+                    readings = fetcher.fetch_sensor_data()
+                    timings['readings'].append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    updated = fetcher.process_sensor_data(readings)
+                    timings['apply'].append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    bins_data = fetcher.fetch_bin_data()
+                    timings['bins'].append(time.perf_counter() - start)
+                
+                if len(readings) < bin_count:
+                    self.stdout.write(self.style.WARNING(
+                        f'⚠️ {source}: read only {len(readings)} of {bin_count} readings'
+                    ))
+                self.stdout.write(
+                    f'   {source:<5} read {len(readings)} readings in {median(timings["readings"]):.3f}s, '
+                    f'applied {updated} bins in {median(timings["apply"]):.3f}s, '
+                    f'read {len(bins_data)} bins in {median(timings["bins"]):.3f}s (median)'
                 )
+        finally:
+            SensorData.objects.filter(sensor_id__startswith=BENCHMARK_PREFIX).delete()
+            Bin.objects.filter(bin_id__startswith=BENCHMARK_PREFIX).delete()
+            SensorFetcherCheckpoint.objects.filter(name__startswith=BENCHMARK_PREFIX).delete()
+    
+    def seed_benchmark(self, bin_count):
+        bins = []
+        readings = []
+        for i in range(bin_count):
+            bin_id = f'{BENCHMARK_PREFIX}{i:05d}'
+            latitude = random.uniform(-1.35, -1.25)
+            longitude = random.uniform(36.75, 36.85)
+            bins.append(Bin(
+                bin_id=bin_id, fill_level=0, latitude=latitude, longitude=longitude,
+                organic_percentage=40, plastic_percentage=35, metal_percentage=25
+            ))
+            readings.append(SensorData(
+                sensor_id=f'{BENCHMARK_PREFIX}S{i:05d}', bin_id=bin_id, fill_level=random.uniform(0, 100),
+                latitude=latitude, longitude=longitude
+            ))
+        Bin.objects.bulk_create(bins, batch_size=1000)
+        SensorData.objects.bulk_create(readings, batch_size=1000)
 
 class RealTimeSensorFetcher:
     """
-    Real-time sensor data fetcher that updates bin information
+    Real-time sensor data fetcher that updates bin information.
+
+    Readings are consumed incrementally: the fetcher keeps a persisted
+    high-water mark (timestamp, id) of the last reading it applied and only
+    reads newer ones, oldest first. Each batch is collapsed to the newest
+    reading per bin and applied with one bulk_update, so an idle second
+    costs one read and no writes. Readings come from a pluggable source:
+    the REST API (default) or the database directly (see core.sensor_sources).
     """
     
-    def __init__(self, api_base_url="http://localhost:8000"):
+    BIN_FIELDS = ['fill_level', 'latitude', 'longitude', 'organic_percentage',
+                  'plastic_percentage', 'metal_percentage', 'last_updated']
+    
+    def __init__(self, api_base_url="http://localhost:8000", checkpoint_name='sensor-fetcher',
+                 page_size=500, max_pages=20, source='http'):
         self.api_base_url = api_base_url
-        self.sensor_data_url = f"{api_base_url}/api/sensor-data/"
-        self.bin_data_url = f"{api_base_url}/api/bin-data/"
-        self.session = requests.Session()
-        self.session.timeout = 5
+        self.source = get_sensor_source(source, api_base_url, page_size=page_size, max_pages=max_pages)
+        self.max_pages = max_pages
+        self.checkpoint_name = checkpoint_name
+        self.watermark = None
+        self.stats = {'fetched': 0, 'applied': 0, 'pending': 0, 'lag_seconds': 0.0}
         
+    def load_watermark(self):
+        """(timestamp, id) of the last applied reading; (None, 0) before the first run"""
+        if self.watermark is None:
+            checkpoint = SensorFetcherCheckpoint.objects.filter(name=self.checkpoint_name).first()
+            self.watermark = (checkpoint.last_timestamp, checkpoint.last_id) if checkpoint else (None, 0)
+        return self.watermark
+    
     def fetch_sensor_data(self):
-        """Fetch latest sensor data from the API"""
-        try:
-            response = self.session.get(self.sensor_data_url)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('results', [])
-            else:
-                logger.warning(f"Failed to fetch sensor data: {response.status_code}")
-                return []
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching sensor data: {e}")
-            return []
+        """Fetch readings newer than the watermark from the source"""
+        readings = self.source.fetch_readings(self.load_watermark())
+        self.stats['pending'] = self.source.pending
+        return readings
     
     def fetch_bin_data(self):
-        """Fetch current bin data from the API"""
-        try:
-            response = self.session.get(self.bin_data_url)
-            if response.status_code == 200:
-                data = response.json()
-                return data
-            else:
-                logger.warning(f"Failed to fetch bin data: {response.status_code}")
-                return []
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching bin data: {e}")
-            return []
+        """Fetch current bin data from the source"""
+        return self.source.fetch_bins()
     
-    def update_bin_from_sensor(self, sensor_data):
-        """Update bin information based on latest sensor data"""
-        try:
+    def latest_per_bin(self, sensor_data_list):
+        """
+        Newest reading per bin among those after the watermark, and the
+        (timestamp, id) of the newest reading seen.
+        """
+        last_timestamp, last_id = self.load_watermark()
+        latest = {}
+        newest = None
+        for sensor_data in sensor_data_list:
+            timestamp = sensor_data.get('timestamp')
+            if isinstance(timestamp, str):
+                # API readings carry ISO strings, database readings datetimes
+                timestamp = parse_datetime(timestamp)
+            key = (timestamp, sensor_data.get('id') or 0)
+            if timestamp is None or (last_timestamp and key <= (last_timestamp, last_id)):
+                continue
+            if newest is None or key > newest:
+                newest = key
             bin_id = sensor_data.get('bin_id')
-            if not bin_id:
-                return False
-                
-            # Get the bin instance
-            try:
-                bin_instance = Bin.objects.get(bin_id=bin_id)
-            except Bin.DoesNotExist:
+            if bin_id and (bin_id not in latest or key > latest[bin_id][0]):
+                latest[bin_id] = (key, sensor_data)
+        return {bin_id: sensor_data for bin_id, (key, sensor_data) in latest.items()}, newest
+    
+    def apply_to_bins(self, latest):
+        """Write the newest reading of each bin with one bulk_update (and bulk_create for new bins)"""
+        now = timezone.now()
+        bins = Bin.objects.in_bulk(list(latest), field_name='bin_id')
+        new_bins = []
+        for bin_id, sensor_data in latest.items():
+            bin_instance = bins.get(bin_id)
+            if bin_instance is None:
                 logger.warning(f"Bin {bin_id} not found, creating new bin...")
                 bin_instance = Bin(
                     bin_id=bin_id,
-                    fill_level=sensor_data.get('fill_level', 0),
-                    latitude=sensor_data.get('latitude', 0),
-                    longitude=sensor_data.get('longitude', 0),
-                    organic_percentage=sensor_data.get('organic_percentage', 40),
-                    plastic_percentage=sensor_data.get('plastic_percentage', 35),
-                    metal_percentage=sensor_data.get('metal_percentage', 25)
+                    fill_level=0,
+                    latitude=0,
+                    longitude=0,
+                    organic_percentage=40,
+                    plastic_percentage=35,
+                    metal_percentage=25
                 )
-            
-            # Update bin with sensor data
-            bin_instance.fill_level = sensor_data.get('fill_level', bin_instance.fill_level)
-            bin_instance.latitude = sensor_data.get('latitude', bin_instance.latitude)
-            bin_instance.longitude = sensor_data.get('longitude', bin_instance.longitude)
-            bin_instance.organic_percentage = sensor_data.get('organic_percentage', bin_instance.organic_percentage)
-            bin_instance.plastic_percentage = sensor_data.get('plastic_percentage', bin_instance.plastic_percentage)
-            bin_instance.metal_percentage = sensor_data.get('metal_percentage', bin_instance.metal_percentage)
-            bin_instance.last_updated = timezone.now()
-            
-            bin_instance.save()
-            logger.info(f"✅ Bin {bin_id} updated: Fill level {bin_instance.fill_level}%, Location ({bin_instance.latitude}, {bin_instance.longitude})")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error updating bin {bin_id}: {e}")
-            return False
+                new_bins.append(bin_instance)
+            for field in self.BIN_FIELDS[:-1]:
+                setattr(bin_instance, field, sensor_data.get(field, getattr(bin_instance, field)))
+            bin_instance.last_updated = now
+        
+        # Bounded batches keep the CASE WHEN statements of bulk_update small
+        if bins:
+            Bin.objects.bulk_update(bins.values(), self.BIN_FIELDS, batch_size=WRITE_BATCH_SIZE)
+        if new_bins:
+            Bin.objects.bulk_create(new_bins, batch_size=WRITE_BATCH_SIZE)
+        return len(latest)
+    
+    def save_watermark(self, watermark):
+        SensorFetcherCheckpoint.objects.update_or_create(
+            name=self.checkpoint_name,
+            defaults={'last_timestamp': watermark[0], 'last_id': watermark[1]}
+        )
+        self.watermark = watermark
     
     def process_sensor_data(self, sensor_data_list):
-        """Process all sensor data and update bins"""
+        """Apply new sensor readings to their bins and advance the watermark"""
+        latest, newest = self.latest_per_bin(sensor_data_list)
         updated_bins = 0
-        for sensor_data in sensor_data_list:
-            if self.update_bin_from_sensor(sensor_data):
-                updated_bins += 1
+        if newest is not None:
+            try:
+                # Bins and watermark move together, so a failed batch is fetched again
+                with transaction.atomic():
+                    updated_bins = self.apply_to_bins(latest)
+                    self.save_watermark(newest)
+            except Exception as e:
+                # The in-memory watermark may be ahead of the rolled back one
+                self.watermark = None
+                logger.error(f"Error updating bins from sensor data: {e}")
+                return 0
+        
+        self.stats['fetched'] = len(sensor_data_list)
+        self.stats['applied'] = updated_bins
+        self.stats['pending'] = max(self.stats['pending'] - len(sensor_data_list), 0)
+        # Lag: how far the applied state trails the newest ingested reading
+        last_timestamp = self.load_watermark()[0]
+        if self.stats['pending'] and last_timestamp:
+            self.stats['lag_seconds'] = round((timezone.now() - last_timestamp).total_seconds(), 1)
+        else:
+            self.stats['lag_seconds'] = 0.0
         
         if updated_bins > 0:
-            logger.info(f"🔄 Updated {updated_bins} bins with sensor data")
+            logger.info(
+                f"🔄 Updated {updated_bins} bins from {len(sensor_data_list)} sensor readings"
+                f" ({self.stats['pending']} pending, lag {self.stats['lag_seconds']}s)"
+            )
         return updated_bins
     
     def run_continuous_fetch(self, interval_seconds=1):
@@ -160,7 +332,7 @@ class RealTimeSensorFetcher:
             while True:
                 start_time = time.time()
                 
-                # Fetch latest sensor data
+                # Fetch sensor data newer than the watermark
                 sensor_data = self.fetch_sensor_data()
                 
                 if sensor_data:
@@ -169,9 +341,13 @@ class RealTimeSensorFetcher:
                     
                     # Log status
                     current_time = datetime.now().strftime("%H:%M:%S")
-                    logger.info(f"⏰ {current_time} - Fetched {len(sensor_data)} sensor readings, updated {updated_count} bins")
+                    logger.info(
+                        f"⏰ {current_time} - Fetched {len(sensor_data)} sensor readings, updated {updated_count} bins "
+                        f"({self.stats['pending']} pending, lag {self.stats['lag_seconds']}s)"
+                    )
                 else:
-                    logger.warning("⚠️ No sensor data received")
+                    # Nothing newer than the watermark; the normal idle case
+                    logger.debug("No new sensor data")
                 
                 # Calculate sleep time to maintain interval
                 elapsed = time.time() - start_time
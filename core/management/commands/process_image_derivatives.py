@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand
+from concurrent.futures import ThreadPoolExecutor
+import time
+import logging
+from core.models import CameraImage
+from core.image_pipeline import run_job
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and medium variants for camera images queued as PENDING'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of worker threads (default: 4)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of images claimed per batch (default: 100)'
+        )
+        parser.add_argument(
+            '--continuous',
+            action='store_true',
+            help='Keep polling for new images instead of exiting when the queue is empty'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Polling interval in seconds when running continuously (default: 2.0)'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Re-queue images whose previous processing attempt failed'
+        )
+        parser.add_argument(
+            '--requeue-stuck',
+            action='store_true',
+            help='Re-queue images left in PROCESSING (only use when no other worker is running)'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        batch_size = options['batch_size']
+
+        if options['retry_failed']:
+            count = CameraImage.objects.filter(processing_status='FAILED').update(processing_status='PENDING')
+            self.stdout.write(f'🔁 Re-queued {count} failed images')
+        if options['requeue_stuck']:
+            count = CameraImage.objects.filter(processing_status='PROCESSING').update(processing_status='PENDING')
+            self.stdout.write(f'🔁 Re-queued {count} stuck images')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'🚀 Processing image derivatives with {workers} worker(s)')
+        )
+
+        total_processed = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-derivatives') as executor:
+            try:
+                while True:
+                    image_ids = list(
+                        CameraImage.objects.filter(processing_status='PENDING')
+                        .order_by('created_at')
+                        .values_list('id', flat=True)[:batch_size]
+                    )
+
+                    if image_ids:
+                        start_time = time.time()
+                        list(executor.map(run_job, image_ids))
+                        elapsed = time.time() - start_time
+                        total_processed += len(image_ids)
+                        self.stdout.write(
+                            f'📸 Processed {len(image_ids)} images in {elapsed:.2f}s '
+                            f'({len(image_ids) / elapsed if elapsed else 0:.1f} images/sec)'
+                        )
+                        continue
+
+                    if not options['continuous']:
+                        break
+                    time.sleep(options['interval'])
+
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('🛑 Stopped by user'))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Done. {total_processed} images processed'))
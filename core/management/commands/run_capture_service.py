@@ -0,0 +1,157 @@
+from django.core.management.base import BaseCommand, CommandError
+import sys
+import os
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(project_root)
+
+from core.models import Camera
+from core.capture_service import CaptureService, parse_source, source_type
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CAMERA_TYPES_BY_SOURCE = {'device': 'USB', 'file': 'USB'}
+
+class Command(BaseCommand):
+    help = 'Capture frames from local cameras, video files or RTSP streams and ingest them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--camera',
+            action='append',
+            default=[],
+            metavar='CAMERA_ID=SOURCE',
+            help='Camera to capture, with a device index, video file or stream URL (repeatable)'
+        )
+        parser.add_argument(
+            '--rtsp',
+            action='store_true',
+            help='Also capture every active camera that has an RTSP URL configured'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10.0,
+            help='Seconds between sampled frames per camera (default: 10.0)'
+        )
+        parser.add_argument(
+            '--buffer-size',
+            type=int,
+            default=30,
+            help='Recent frames kept in each camera ring buffer (default: 30)'
+        )
+        parser.add_argument(
+            '--encode-workers',
+            type=int,
+            default=2,
+            help='Threads encoding and ingesting sampled frames (default: 2)'
+        )
+        parser.add_argument(
+            '--quality',
+            type=int,
+            default=85,
+            help='JPEG quality for stored frames (default: 85)'
+        )
+        parser.add_argument(
+            '--no-realtime',
+            action='store_true',
+            help='Read video files as fast as possible instead of at their frame rate'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Restart video files when they end'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=0,
+            help='Stop after this many seconds (default: run until stopped)'
+        )
+        parser.add_argument(
+            '--stats-interval',
+            type=float,
+            default=30.0,
+            help='Seconds between statistics reports (default: 30.0)'
+        )
+
+    def handle(self, *args, **options):
+        sources = self.resolve_sources(options['camera'], options['rtsp'])
+        if not sources:
+            raise CommandError('No cameras to capture. Use --camera CAMERA_ID=SOURCE or --rtsp')
+
+        service = CaptureService(encode_workers=options['encode_workers'], jpeg_quality=options['quality'])
+        for camera, source in sources:
+            service.add_camera(
+                camera, source,
+                sample_interval=options['interval'],
+                buffer_size=options['buffer_size'],
+                realtime=not options['no_realtime'],
+                loop=options['loop']
+            )
+            self.stdout.write(f'📷 {camera.camera_id}: {source_type(source)} source')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'🚀 Starting capture service for {len(sources)} camera(s)...\n'
+                f'   Sample Interval: {options["interval"]} seconds\n'
+                f'   Encode Workers: {options["encode_workers"]}'
+            )
+        )
+
+        started = time.monotonic()
+        last_report = started
+        service.start()
+        try:
+            # Runs until stopped, the duration elapses, or every file source has ended
+            while service.is_running():
+                time.sleep(0.5)
+                now = time.monotonic()
+                if options['duration'] and now - started >= options['duration']:
+                    break
+                if now - last_report >= options['stats_interval']:
+                    self.report(service)
+                    last_report = now
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\n🛑 Stopping capture service...'))
+        finally:
+            service.stop()
+
+        self.report(service)
+        self.stdout.write(self.style.SUCCESS('✅ Capture service stopped'))
+
+    def resolve_sources(self, camera_options, include_rtsp):
+        sources = []
+        for value in camera_options:
+            if '=' not in value:
+                raise CommandError(f'Invalid --camera value "{value}", expected CAMERA_ID=SOURCE')
+            camera_id, source = value.split('=', 1)
+            source = parse_source(source)
+            camera, created = Camera.objects.get_or_create(
+                camera_id=camera_id,
+                defaults={
+                    'name': f'Camera {camera_id}',
+                    'camera_type': CAMERA_TYPES_BY_SOURCE.get(source_type(source), 'IP'),
+                    'location': 'Unknown'
+                }
+            )
+            sources.append((camera, source))
+
+        if include_rtsp:
+            configured = {camera.camera_id for camera, _ in sources}
+            for camera in Camera.objects.filter(status='ACTIVE').exclude(rtsp_url__isnull=True).exclude(rtsp_url=''):
+                if camera.camera_id not in configured:
+                    sources.append((camera, camera.rtsp_url))
+        return sources
+
+    def report(self, service):
+        for camera_id, counts in sorted(service.stats().items()):
+            self.stdout.write(
+                f"📊 {camera_id}: {counts.get('frames_read', 0)} frames read, "
+                f"{counts.get('sampled', 0)} sampled, {counts.get('created', 0)} stored, "
+                f"{counts.get('dropped', 0)} dropped, {counts.get('duplicate', 0)} duplicates, "
+                f"{counts.get('skipped_backlog', 0)} skipped (backlog), {counts.get('failed', 0)} failed"
+            )
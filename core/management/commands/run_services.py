@@ -0,0 +1,278 @@
+from django.core.management.base import BaseCommand, CommandError
+import sys
+import os
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(project_root)
+
+from core.service_runner import AsyncHttpClient, PeriodicJob, ServiceRunner, run_orm
+from core.management.commands.fetch_sensor_data import RealTimeSensorFetcher
+from core.sensor_sources import SOURCES, DatabaseSensorSource
+from core.sensor_anomaly import sweep
+from core.alert_rules import engine_from_settings
+from core.geofence import GeofenceService
+import asyncio
+import signal
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+AVAILABLE_JOBS = ['sensors', 'bins', 'alerts', 'geofence']
+
+class Command(BaseCommand):
+    help = 'Run the polling services (sensor fetcher, bin monitor, alert sweep, geofence) together in one asyncio process'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jobs',
+            type=str,
+            default=','.join(AVAILABLE_JOBS),
+            help=f'Comma-separated jobs to run (default: {",".join(AVAILABLE_JOBS)})'
+        )
+        parser.add_argument(
+            '--api-url',
+            type=str,
+            default='http://localhost:8000',
+            help='Base API URL (default: http://localhost:8000)'
+        )
+        parser.add_argument(
+            '--source',
+            type=str,
+            default='http',
+            choices=SOURCES,
+            help='Read through the REST API (http) or straight from the database (db) (default: http)'
+        )
+        parser.add_argument(
+            '--sensor-interval',
+            type=float,
+            default=1.0,
+            help='Seconds between sensor data fetches (default: 1.0)'
+        )
+        parser.add_argument(
+            '--bin-interval',
+            type=float,
+            default=1.0,
+            help='Seconds between bin data fetches (default: 1.0)'
+        )
+        parser.add_argument(
+            '--context-interval',
+            type=float,
+            default=30.0,
+            help='Seconds between dumping spot and sensor state polls for the alert rules (default: 30.0)'
+        )
+        parser.add_argument(
+            '--alert-interval',
+            type=float,
+            default=60.0,
+            help='Seconds between sensor alert sweeps (missing heartbeats) (default: 60.0)'
+        )
+        parser.add_argument(
+            '--geofence-interval',
+            type=float,
+            default=1.0,
+            help='Seconds between geofence runs over new truck GPS fixes (default: 1.0)'
+        )
+        parser.add_argument(
+            '--pool-size',
+            type=int,
+            default=10,
+            help='HTTP connections kept alive and shared by all jobs (default: 10)'
+        )
+        parser.add_argument(
+            '--connect-timeout',
+            type=float,
+            default=3.05,
+            help='HTTP connect timeout in seconds (default: 3.05)'
+        )
+        parser.add_argument(
+            '--read-timeout',
+            type=float,
+            default=5.0,
+            help='HTTP read timeout in seconds (default: 5.0)'
+        )
+        parser.add_argument(
+            '--stats-interval',
+            type=float,
+            default=60.0,
+            help='Seconds between statistics reports, 0 to disable (default: 60.0)'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=0,
+            help='Stop after this many seconds (default: run until stopped)'
+        )
+
+    def handle(self, *args, **options):
+        job_names = [name.strip() for name in options['jobs'].split(',') if name.strip()]
+        unknown = set(job_names) - set(AVAILABLE_JOBS)
+        if unknown:
+            raise CommandError(f'Unknown job(s): {", ".join(sorted(unknown))}. Available: {", ".join(AVAILABLE_JOBS)}')
+
+        api_url = options['api_url'].rstrip('/')
+        client = AsyncHttpClient(
+            api_url,
+            pool_size=options['pool_size'],
+            timeout=(options['connect_timeout'], options['read_timeout'])
+        )
+
+        source = options['source']
+        jobs = []
+        self.sensor_fetcher = None
+        self.geofence = None
+        if 'sensors' in job_names:
+            jobs.append(PeriodicJob('sensors', options['sensor_interval'], self.sensor_job(api_url, source)))
+        if 'bins' in job_names:
+            jobs.append(PeriodicJob('bins', options['bin_interval'], self.bin_job(api_url, source, options['context_interval'])))
+        if 'alerts' in job_names:
+            jobs.append(PeriodicJob('alerts', options['alert_interval'], self.alert_job()))
+        if 'geofence' in job_names:
+            jobs.append(PeriodicJob('geofence', options['geofence_interval'], self.geofence_job()))
+        if options['stats_interval']:
+            jobs.append(PeriodicJob('stats', options['stats_interval'], self.stats_job()))
+
+        self.runner = ServiceRunner(client, jobs)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'🚀 Starting service runner...\n'
+                f'   API URL: {api_url}\n'
+                f'   Source: {source}\n'
+                f'   Jobs: {", ".join(job_names)}\n'
+                f'   Connection Pool: {options["pool_size"]}'
+            )
+        )
+        asyncio.run(self.serve(options['duration']))
+        self.report()
+        self.stdout.write(self.style.SUCCESS('✅ Service runner stopped'))
+
+    async def serve(self, duration):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.runner.stop)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on this platform or outside the main thread
+                pass
+        await self.runner.run(duration=duration or None)
+
+    def sensor_job(self, api_url, source):
+        fetcher = self.sensor_fetcher = RealTimeSensorFetcher(api_url, source=source)
+
+        async def fetch_readings(client):
+            if source == 'db':
+                return await run_orm(fetcher.fetch_sensor_data)
+            # Only readings newer than the fetcher's persisted watermark, across pages
+            http = fetcher.source
+            params = http.query_params(await run_orm(fetcher.load_watermark))
+            readings = []
+            url = '/api/sensor-data/'
+            for page in range(fetcher.max_pages):
+                data = await client.get_json(url, params)
+                url, params = http.record_page(data, readings, page == 0), None
+                if not url:
+                    break
+            fetcher.stats['pending'] = http.pending
+            return readings
+
+        async def fetch_sensors(client):
+            readings = await fetch_readings(client)
+            if readings:
+                updated = await run_orm(fetcher.process_sensor_data, readings)
+                logger.debug(
+                    f"Fetched {len(readings)} sensor readings, updated {updated} bins "
+                    f"({fetcher.stats['pending']} pending, lag {fetcher.stats['lag_seconds']}s)"
+                )
+
+        return fetch_sensors
+
+    def bin_job(self, api_url, source, context_interval):
+        from real_time_updater import RealTimeBinUpdater
+        updater = RealTimeBinUpdater(
+            api_base_url=f'{api_url}/api', engine=engine_from_settings(), context_interval=context_interval
+        )
+        database = DatabaseSensorSource()
+
+        async def fetch_all(client, url):
+            rows = []
+            while url:
+                data = await client.get_json(url)
+                if not isinstance(data, dict):
+                    return rows + data
+                rows.extend(data.get('results', []))
+                url = data.get('next')
+            return rows
+
+        async def monitor_bins(client):
+            if updater.context_due():
+                updater.last_context_update = time.time()
+                if source == 'db':
+                    spots, sensors = await run_orm(
+                        lambda: (database.fetch_dumping_spots(), database.fetch_sensor_states())
+                    )
+                else:
+                    spots = await fetch_all(client, '/api/dumping-spots/')
+                    sensors = await fetch_all(client, '/api/sensors/latest/')
+                # The database sink writes from here, so rules are evaluated off the event loop
+                await run_orm(updater.process_dumping_spots, spots)
+                await run_orm(updater.process_sensor_states, sensors)
+            if source == 'db':
+                bins_data = await run_orm(database.fetch_bins)
+            else:
+                bins_data = await client.get_json('/api/bin-data/')
+            await run_orm(updater.process_bins, bins_data)
+
+        return monitor_bins
+
+    def alert_job(self):
+        async def sweep_alerts(client):
+            stats = await run_orm(sweep)
+            if stats['opened'] or stats['expired']:
+                logger.info(f"🚨 {stats['opened']} silent sensor(s) flagged, {stats['expired']} quiet alert(s) closed")
+
+        return sweep_alerts
+
+    def geofence_job(self):
+        service = self.geofence = GeofenceService()
+
+        async def track_fences(client):
+            await run_orm(service.process_new_positions)
+            # A full batch means more fixes are waiting; drain them before the next tick
+            while service.backlog:
+                await run_orm(service.process_new_positions)
+
+        return track_fences
+
+    def stats_job(self):
+        first_run = True
+
+        async def report(client):
+            nonlocal first_run
+            # The first tick fires at start-up, before anything has happened
+            if not first_run:
+                self.report()
+            first_run = False
+
+        return report
+
+    def report(self):
+        for name, stats in self.runner.statistics().items():
+            if name == 'stats':
+                continue
+            self.stdout.write(
+                f"📊 {name}: {stats['runs']} runs, {stats['failures']} failures, "
+                f"{stats['skipped_ticks']} skipped ticks, last run {stats['last_duration']}s"
+            )
+        if self.sensor_fetcher is not None:
+            fetcher_stats = self.sensor_fetcher.stats
+            self.stdout.write(
+                f"📡 sensors: {fetcher_stats['pending']} readings pending, lag {fetcher_stats['lag_seconds']}s"
+            )
+        if self.geofence is not None:
+            geofence_stats = self.geofence.stats
+            self.stdout.write(
+                f"📍 geofence: {geofence_stats['fixes']} fixes, {geofence_stats['events']} events, "
+                f"{geofence_stats['fences']} fences"
+            )
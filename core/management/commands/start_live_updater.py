@@ -8,6 +8,8 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(o
 sys.path.append(project_root)
 
 from real_time_updater import RealTimeBinUpdater
+from core.sensor_sources import SOURCES, DatabaseSensorSource
+from core.alert_rules import engine_from_settings
 import time
 import logging
 
@@ -36,6 +38,19 @@ class Command(BaseCommand):
             choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
             help='Logging level (default: INFO)'
         )
+        parser.add_argument(
+            '--source',
+            type=str,
+            default='http',
+            choices=SOURCES,
+            help='Read bins through the REST API (http) or straight from the database (db) (default: http)'
+        )
+        parser.add_argument(
+            '--context-interval',
+            type=float,
+            default=30.0,
+            help='Seconds between dumping spot and sensor state polls for the alert rules (default: 30.0)'
+        )
     
     def handle(self, *args, **options):
         interval = options['interval']
@@ -49,6 +64,7 @@ class Command(BaseCommand):
             self.style.SUCCESS(
                 f'🚀 Starting Real-Time Bin Updater...\n'
                 f'   API URL: {api_url}\n'
+                f'   Source: {options["source"]}\n'
                 f'   Update Interval: {interval} seconds\n'
                 f'   Log Level: {log_level}'
             )
@@ -57,7 +73,10 @@ class Command(BaseCommand):
         # Create and start updater
         updater = RealTimeBinUpdater(
             api_base_url=api_url,
-            update_interval=interval
+            update_interval=interval,
+            source=DatabaseSensorSource() if options['source'] == 'db' else None,
+            engine=engine_from_settings(),
+            context_interval=options['context_interval']
         )
         
         try:
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import time
+import logging
+from core.sensor_anomaly import sweep
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Flag sensors that stopped reporting and close one-off sensor alerts that stayed quiet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuous',
+            action='store_true',
+            help='Keep sweeping instead of running once'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds between sweeps when running continuously (default: 60.0)'
+        )
+        parser.add_argument(
+            '--event-ttl-hours',
+            type=int,
+            default=None,
+            help='Close spike/jump/battery alerts quiet for this many hours (default: SENSOR_ALERT_EVENT_TTL_HOURS)'
+        )
+
+    def handle(self, *args, **options):
+        if not options['continuous']:
+            self.report(sweep(event_ttl_hours=options['event_ttl_hours']))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'🚀 Sweeping sensor alerts every {options["interval"]}s'))
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    stats = sweep(event_ttl_hours=options['event_ttl_hours'])
+                    if stats['opened'] or stats['expired']:
+                        self.report(stats)
+                except Exception as e:
+                    logger.error(f"❌ Sensor alert sweep failed: {e}")
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('🛑 Sensor alert sweep stopped'))
+
+    def report(self, stats):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {stats['opened']} sensor(s) flagged as silent, {stats['expired']} quiet alert(s) closed"
+            )
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:42
+
+from django.db import migrations, models
+
+
+def mark_existing_thumbnails_done(apps, schema_editor):
+    # Images that already have a thumbnail don't need to go through the pipeline again
+    CameraImage = apps.get_model('core', 'CameraImage')
+    CameraImage.objects.exclude(thumbnail='').exclude(thumbnail__isnull=True).update(processing_status='DONE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_camera_cameraimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cameraimage',
+            name='medium',
+            field=models.ImageField(blank=True, help_text='Medium-size WebP variant for gallery viewing', null=True, upload_to='camera_medium/%Y/%m/%d/'),
+        ),
+        migrations.AddField(
+            model_name='cameraimage',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', help_text='Status of background thumbnail/derivative generation', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='cameraimage',
+            index=models.Index(fields=['processing_status', 'created_at'], name='core_camera_process_d5858d_idx'),
+        ),
+        migrations.RunPython(mark_existing_thumbnails_done, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_cameraimage_medium_cameraimage_processing_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cameraimage',
+            name='byte_size',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Original file size in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='cameraimage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the original file', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='cameraimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, help_text='Image height in pixels', null=True),
+        ),
+        migrations.AddField(
+            model_name='cameraimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, help_text='Image width in pixels', null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:45
+
+import core.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_cameraimage_byte_size_cameraimage_content_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cameraimage',
+            name='deduplicated',
+            field=models.BooleanField(default=False, help_text='Image file is shared with an earlier upload'),
+        ),
+        migrations.AddField(
+            model_name='cameraimage',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Earlier image this near-identical frame was linked to', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='near_duplicates', to='core.cameraimage'),
+        ),
+        migrations.AddField(
+            model_name='cameraimage',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, help_text='64-bit difference hash for near-duplicate detection', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='cameraimage',
+            name='image',
+            field=models.ImageField(upload_to=core.models.camera_image_upload_to),
+        ),
+    ]
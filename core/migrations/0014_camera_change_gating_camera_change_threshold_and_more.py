@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:47
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_cameraimage_deduplicated_cameraimage_duplicate_of_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='change_gating',
+            field=models.CharField(choices=[('OFF', 'Off - store every frame'), ('TAG', 'Tag unchanged frames'), ('DOWNSAMPLE', 'Keep one unchanged frame per interval'), ('DROP', 'Drop unchanged frames')], default='OFF', help_text='What to do with uploaded frames that show an unchanged scene', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='change_threshold',
+            field=models.FloatField(default=0.02, help_text='Fraction of changed pixels at which a frame counts as a scene change', validators=[django.core.validators.MinValueValidator(0.0, message='Change threshold cannot be negative'), django.core.validators.MaxValueValidator(1.0, message='Change threshold cannot exceed 1.0')]),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='unchanged_keep_interval',
+            field=models.PositiveIntegerField(default=600, help_text='Seconds between kept unchanged frames when downsampling'),
+        ),
+    ]
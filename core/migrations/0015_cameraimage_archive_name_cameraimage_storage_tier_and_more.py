@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_camera_change_gating_camera_change_threshold_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cameraimage',
+            name='archive_name',
+            field=models.CharField(blank=True, help_text='Per-day archive holding the original once it is archived', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='cameraimage',
+            name='storage_tier',
+            field=models.CharField(choices=[('ORIGINAL', 'Original'), ('COMPACTED', 'Compacted'), ('ARCHIVED', 'Archived')], default='ORIGINAL', help_text='Retention tier of the original file (see apply_image_retention)', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='cameraimage',
+            index=models.Index(fields=['storage_tier', 'created_at'], name='core_camera_storage_102a64_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0015_cameraimage_archive_name_cameraimage_storage_tier_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageUploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('analysis_type', models.CharField(default='GENERAL', max_length=20)),
+                ('total_files', models.PositiveIntegerField(default=0)),
+                ('stored_files', models.PositiveIntegerField(default=0)),
+                ('duplicate_files', models.PositiveIntegerField(default=0, help_text='Files already stored by an earlier upload')),
+                ('failed_files', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('camera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_jobs', to='core.camera')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='image_upload_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Image Upload Job',
+                'verbose_name_plural': 'Image Upload Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='cameraimage',
+            name='upload_job',
+            field=models.ForeignKey(blank=True, help_text='Admin bulk upload this image came from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='images', to='core.imageuploadjob'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_imageuploadjob_cameraimage_upload_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorFetcherCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Consumer name', max_length=50, unique=True)),
+                ('last_timestamp', models.DateTimeField(blank=True, help_text='Timestamp of the last reading applied', null=True)),
+                ('last_id', models.BigIntegerField(default=0, help_text='ID of the last reading applied')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sensor Fetcher Checkpoint',
+                'verbose_name_plural': 'Sensor Fetcher Checkpoints',
+            },
+        ),
+    ]
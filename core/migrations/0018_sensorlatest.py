@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:07
+
+from django.db import migrations, models
+
+
+def backfill_sensor_latest(apps, schema_editor):
+    # One pass over the (sensor_id, timestamp) index, keeping the newest reading of each sensor
+    SensorData = apps.get_model('core', 'SensorData')
+    SensorLatest = apps.get_model('core', 'SensorLatest')
+    rows = []
+    previous = None
+    for reading in SensorData.objects.order_by('sensor_id', '-timestamp', '-id').iterator():
+        if reading.sensor_id == previous:
+            continue
+        previous = reading.sensor_id
+        rows.append(SensorLatest(
+            sensor_id=reading.sensor_id,
+            bin_id=reading.bin_id,
+            reading_id=reading.id,
+            fill_level=reading.fill_level,
+            latitude=reading.latitude,
+            longitude=reading.longitude,
+            sensor_status=reading.sensor_status,
+            battery_level=reading.battery_level,
+            signal_strength=reading.signal_strength,
+            last_seen=reading.timestamp,
+        ))
+    SensorLatest.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_sensorfetchercheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorLatest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_id', models.CharField(help_text='Unique identifier for the sensor device', max_length=50, unique=True)),
+                ('bin_id', models.CharField(db_index=True, help_text='Bin the sensor last reported for', max_length=50)),
+                ('reading_id', models.BigIntegerField(help_text='ID of the SensorData row this state was taken from')),
+                ('fill_level', models.FloatField(help_text='Last reported fill level percentage')),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('sensor_status', models.CharField(choices=[('ONLINE', 'Online'), ('OFFLINE', 'Offline'), ('ERROR', 'Error'), ('MAINTENANCE', 'Maintenance')], default='ONLINE', max_length=20)),
+                ('battery_level', models.FloatField(blank=True, help_text='Last reported battery level percentage', null=True)),
+                ('signal_strength', models.IntegerField(blank=True, help_text='Last reported WiFi signal strength in dBm', null=True)),
+                ('last_seen', models.DateTimeField(db_index=True, help_text='When the last reading was received')),
+            ],
+            options={
+                'verbose_name': 'Sensor Latest State',
+                'verbose_name_plural': 'Sensor Latest States',
+                'ordering': ['sensor_id'],
+            },
+        ),
+        migrations.RunPython(backfill_sensor_latest, migrations.RunPython.noop),
+    ]
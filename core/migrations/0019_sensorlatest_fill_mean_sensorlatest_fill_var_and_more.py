@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:09
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def schedule_heartbeats(apps, schema_editor):
+    # Existing sensors get the minimum silence allowance until their next reading
+    SensorLatest = apps.get_model('core', 'SensorLatest')
+    min_seconds = getattr(settings, 'SENSOR_HEARTBEAT_MIN_SECONDS', 300)
+    SensorLatest.objects.update(heartbeat_due=F('last_seen') + timedelta(seconds=min_seconds))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_sensorlatest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='fill_mean',
+            field=models.FloatField(blank=True, help_text='EWMA of the fill level', null=True),
+        ),
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='fill_var',
+            field=models.FloatField(default=0.0, help_text='EWMA variance of the fill level'),
+        ),
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='heartbeat_due',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='The sensor counts as silent if nothing arrives by then', null=True),
+        ),
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='interval_mean',
+            field=models.FloatField(blank=True, help_text='EWMA of seconds between readings', null=True),
+        ),
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='samples',
+            field=models.PositiveIntegerField(default=0, help_text='Readings folded into this state'),
+        ),
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='stuck_count',
+            field=models.PositiveIntegerField(default=0, help_text='Consecutive readings with an unchanged fill level'),
+        ),
+        migrations.CreateModel(
+            name='SensorAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_id', models.CharField(max_length=50)),
+                ('bin_id', models.CharField(db_index=True, max_length=50)),
+                ('kind', models.CharField(choices=[('SPIKE', 'Fill level spike'), ('FILL_JUMP', 'Impossible fill jump'), ('STUCK', 'Stuck value'), ('BATTERY_COLLAPSE', 'Battery collapse'), ('MISSING_HEARTBEAT', 'Missing heartbeat')], max_length=20)),
+                ('severity', models.CharField(choices=[('WARNING', 'Warning'), ('CRITICAL', 'Critical')], default='WARNING', max_length=10)),
+                ('value', models.FloatField(blank=True, help_text='Reading value that triggered the alert', null=True)),
+                ('message', models.CharField(blank=True, max_length=200)),
+                ('reading_id', models.BigIntegerField(blank=True, help_text='SensorData row that triggered the alert', null=True)),
+                ('occurrences', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Sensor Alert',
+                'verbose_name_plural': 'Sensor Alerts',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['sensor_id', 'resolved_at'], name='core_sensor_sensor__b5a36b_idx'), models.Index(fields=['resolved_at', 'created_at'], name='core_sensor_resolve_9aa02f_idx')],
+            },
+        ),
+        migrations.RunPython(schedule_heartbeats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_sensorlatest_fill_mean_sensorlatest_fill_var_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RuleAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule', models.CharField(max_length=50)),
+                ('severity', models.CharField(choices=[('WARNING', 'Warning'), ('CRITICAL', 'Critical')], default='WARNING', max_length=10)),
+                ('entity_type', models.CharField(help_text='bin, dumping_spot or sensor', max_length=20)),
+                ('entity_id', models.CharField(max_length=50)),
+                ('message', models.CharField(blank=True, max_length=200)),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('triggered_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Rule Alert',
+                'verbose_name_plural': 'Rule Alerts',
+                'ordering': ['-triggered_at'],
+                'indexes': [models.Index(fields=['entity_type', 'entity_id', 'triggered_at'], name='core_ruleal_entity__198c5d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_rulealert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bin_id', models.CharField(help_text='Bin that was emptied', max_length=50)),
+                ('sensor_id', models.CharField(max_length=50)),
+                ('reading_id', models.BigIntegerField(help_text='SensorData row that showed the emptied bin', unique=True)),
+                ('truck_distance_m', models.FloatField(blank=True, help_text='Distance of the truck from the bin', null=True)),
+                ('fill_before', models.FloatField(help_text='Fill level of the previous reading')),
+                ('fill_after', models.FloatField(help_text='Fill level after emptying')),
+                ('collected_at', models.DateTimeField(help_text='Timestamp of the reading that showed the emptied bin')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('truck', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='collection_events', to='core.truck')),
+            ],
+            options={
+                'verbose_name': 'Collection Event',
+                'verbose_name_plural': 'Collection Events',
+                'ordering': ['-collected_at'],
+                'indexes': [models.Index(fields=['bin_id', 'collected_at'], name='core_collec_bin_id_95b817_idx'), models.Index(fields=['collected_at'], name='core_collec_collect_226160_idx')],
+            },
+        ),
+    ]
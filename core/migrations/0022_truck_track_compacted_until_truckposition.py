@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:18
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_collectionevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='truck',
+            name='track_compacted_until',
+            field=models.DateTimeField(blank=True, help_text='Fixes before this time have been simplified', null=True),
+        ),
+        migrations.CreateModel(
+            name='TruckPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(help_text='When the fix was taken')),
+                ('latitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-90.0, message='Latitude must be between -90 and 90'), django.core.validators.MaxValueValidator(90.0, message='Latitude must be between -90 and 90')])),
+                ('longitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-180.0, message='Longitude must be between -180 and 180'), django.core.validators.MaxValueValidator(180.0, message='Longitude must be between -180 and 180')])),
+                ('speed', models.FloatField(blank=True, help_text='Speed in km/h', null=True)),
+                ('heading', models.FloatField(blank=True, help_text='Heading in degrees from north', null=True)),
+                ('truck', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='core.truck')),
+            ],
+            options={
+                'verbose_name': 'Truck Position',
+                'verbose_name_plural': 'Truck Positions',
+                'ordering': ['truck', 'timestamp'],
+                'indexes': [models.Index(fields=['timestamp'], name='core_truckp_timesta_1083ba_idx')],
+                'unique_together': {('truck', 'timestamp')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_truck_track_compacted_until_truckposition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeofenceEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fence_type', models.CharField(choices=[('BIN', 'Bin'), ('DUMPING_SPOT', 'Dumping spot')], max_length=20)),
+                ('fence_id', models.CharField(help_text='bin_id or spot_id', max_length=50)),
+                ('event', models.CharField(choices=[('ENTER', 'Enter'), ('DWELL', 'Dwell'), ('EXIT', 'Exit')], max_length=10)),
+                ('timestamp', models.DateTimeField(help_text='Time of the fix that caused the event')),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('truck', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='geofence_events', to='core.truck')),
+            ],
+            options={
+                'verbose_name': 'Geofence Event',
+                'verbose_name_plural': 'Geofence Events',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['timestamp'], name='core_geofen_timesta_16c56c_idx'), models.Index(fields=['fence_type', 'fence_id', 'timestamp'], name='core_geofen_fence_t_66366f_idx'), models.Index(fields=['truck', 'timestamp'], name='core_geofen_truck_i_b844e2_idx')],
+            },
+        ),
+    ]
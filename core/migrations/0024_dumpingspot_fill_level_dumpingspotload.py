@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_fill_level(apps, schema_editor):
+    DumpingSpot = apps.get_model('core', 'DumpingSpot')
+    spots = list(DumpingSpot.objects.all())
+    for spot in spots:
+        total_content = spot.organic_content + spot.plastic_content + spot.metal_content
+        spot.fill_level = (total_content / spot.total_capacity) * 100 if spot.total_capacity else 0.0
+    DumpingSpot.objects.bulk_update(spots, ['fill_level'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_geofenceevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dumpingspot',
+            name='fill_level',
+            field=models.FloatField(default=0.0, help_text='Current content as a percentage of total capacity, updated on save'),
+        ),
+        migrations.CreateModel(
+            name='DumpingSpotLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organic', models.FloatField(default=0.0)),
+                ('plastic', models.FloatField(default=0.0)),
+                ('metal', models.FloatField(default=0.0)),
+                ('volume', models.FloatField(help_text="Total unloaded, in the units of the spot's total capacity")),
+                ('unloaded_at', models.DateTimeField()),
+                ('collection_event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='load', to='core.collectionevent')),
+                ('spot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loads', to='core.dumpingspot')),
+                ('truck', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='unloads', to='core.truck')),
+            ],
+            options={
+                'verbose_name': 'Dumping Spot Load',
+                'verbose_name_plural': 'Dumping Spot Loads',
+                'ordering': ['-unloaded_at'],
+                'indexes': [models.Index(fields=['spot', 'unloaded_at'], name='core_dumpin_spot_id_652b0c_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_fill_level, migrations.RunPython.noop),
+    ]
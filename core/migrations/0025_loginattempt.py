@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_dumpingspot_fill_level_dumpingspotload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('success', models.BooleanField()),
+                ('timestamp', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Login Attempt',
+                'verbose_name_plural': 'Login Attempts',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['username', 'id'], name='core_logina_usernam_802c04_idx'), models.Index(fields=['ip_address', 'id'], name='core_logina_ip_addr_a300ab_idx'), models.Index(fields=['timestamp'], name='core_logina_timesta_c6289a_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.conf import settings
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 
@@ -109,15 +110,21 @@ class DumpingSpot(models.Model):
     organic_content = models.FloatField(default=0.0, help_text="Current organic waste content")
     plastic_content = models.FloatField(default=0.0, help_text="Current plastic waste content")
     metal_content = models.FloatField(default=0.0, help_text="Current metal waste content")
+    fill_level = models.FloatField(default=0.0, help_text="Current content as a percentage of total capacity, updated on save")
 
     def __str__(self):
         return f"Dumping Spot {self.spot_id}"
-    
-    def current_fill_level(self):
+
+    def save(self, *args, **kwargs):
         total_content = self.organic_content + self.plastic_content + self.metal_content
-        if self.total_capacity == 0:
-            return 0.0
-        return (total_content / self.total_capacity) * 100
+        self.fill_level = (total_content / self.total_capacity) * 100 if self.total_capacity else 0.0
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'fill_level' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['fill_level']
+        super().save(*args, **kwargs)
+
+    def current_fill_level(self):
+        return self.fill_level
 
     def organic_percentage(self):
         total_content = self.organic_content + self.plastic_content + self.metal_content
@@ -150,10 +157,83 @@ class Truck(models.Model):
     fuel_level = models.FloatField(default=0.0)
     status = models.CharField(max_length=20, choices=TRUCK_STATUS_CHOICES, default="IDLE")
     last_updated = models.DateTimeField(auto_now=True)
+    track_compacted_until = models.DateTimeField(null=True, blank=True,
+                                                 help_text="Fixes before this time have been simplified")
 
     def __str__(self):
         return f"Truck {self.truck_id}" 
 
+class TruckPosition(models.Model):
+    """
+    One GPS fix of a truck. Tracks are appended here in batches
+    (core.truck_tracks); the Truck row only carries the latest position.
+    """
+    truck = models.ForeignKey(Truck, on_delete=models.CASCADE, related_name='positions')
+    timestamp = models.DateTimeField(help_text="When the fix was taken")
+    latitude = models.FloatField(
+        validators=[
+            MinValueValidator(-90.0, message='Latitude must be between -90 and 90'),
+            MaxValueValidator(90.0, message='Latitude must be between -90 and 90')
+        ]
+    )
+    longitude = models.FloatField(
+        validators=[
+            MinValueValidator(-180.0, message='Longitude must be between -180 and 180'),
+            MaxValueValidator(180.0, message='Longitude must be between -180 and 180')
+        ]
+    )
+    speed = models.FloatField(null=True, blank=True, help_text="Speed in km/h")
+    heading = models.FloatField(null=True, blank=True, help_text="Heading in degrees from north")
+
+    class Meta:
+        ordering = ['truck', 'timestamp']
+        verbose_name = "Truck Position"
+        verbose_name_plural = "Truck Positions"
+        # Also the index for track queries; a fix sent twice is stored once
+        unique_together = [['truck', 'timestamp']]
+        indexes = [
+            models.Index(fields=['timestamp']),
+        ]
+
+    def __str__(self):
+        return f"Truck {self.truck_id} at ({self.latitude}, {self.longitude}) {self.timestamp}"
+
+class GeofenceEvent(models.Model):
+    """
+    A truck entering, staying at or leaving the fence around a bin or a
+    dumping spot, derived from its GPS fixes (core.geofence)
+    """
+    FENCE_TYPE_CHOICES = [
+        ('BIN', 'Bin'),
+        ('DUMPING_SPOT', 'Dumping spot'),
+    ]
+    EVENT_CHOICES = [
+        ('ENTER', 'Enter'),
+        ('DWELL', 'Dwell'),
+        ('EXIT', 'Exit'),
+    ]
+
+    truck = models.ForeignKey(Truck, on_delete=models.CASCADE, related_name='geofence_events')
+    fence_type = models.CharField(max_length=20, choices=FENCE_TYPE_CHOICES)
+    fence_id = models.CharField(max_length=50, help_text="bin_id or spot_id")
+    event = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    timestamp = models.DateTimeField(help_text="Time of the fix that caused the event")
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        ordering = ['-timestamp']
+        verbose_name = "Geofence Event"
+        verbose_name_plural = "Geofence Events"
+        indexes = [
+            models.Index(fields=['timestamp']),
+            models.Index(fields=['fence_type', 'fence_id', 'timestamp']),
+            models.Index(fields=['truck', 'timestamp']),
+        ]
+
+    def __str__(self):
+        return f"Truck {self.truck_id} {self.event} {self.fence_type} {self.fence_id} at {self.timestamp}"
+
 class SensorData(models.Model):
     """
     Real-time sensor data from ESP32 devices
@@ -312,6 +392,287 @@ class SensorData(models.Model):
         from datetime import timedelta
         return self.timestamp > timezone.now() - timedelta(minutes=minutes) 
 
+class SensorLatest(models.Model):
+    """
+    Latest reading of each sensor, upserted when readings are ingested.
+    Per-sensor state (last seen, battery, signal, fill) is read from here
+    in O(sensors) instead of being scanned out of the SensorData history.
+    """
+    UPSERT_FIELDS = ['bin_id', 'reading_id', 'fill_level', 'latitude', 'longitude', 'sensor_status',
+                     'battery_level', 'signal_strength', 'last_seen', 'samples', 'fill_mean', 'fill_var',
+                     'interval_mean', 'stuck_count', 'heartbeat_due']
+    
+    sensor_id = models.CharField(max_length=50, unique=True, help_text="Unique identifier for the sensor device")
+    bin_id = models.CharField(max_length=50, db_index=True, help_text="Bin the sensor last reported for")
+    reading_id = models.BigIntegerField(help_text="ID of the SensorData row this state was taken from")
+    fill_level = models.FloatField(help_text="Last reported fill level percentage")
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    sensor_status = models.CharField(max_length=20, choices=SensorData.SENSOR_STATUS_CHOICES, default='ONLINE')
+    battery_level = models.FloatField(null=True, blank=True, help_text="Last reported battery level percentage")
+    signal_strength = models.IntegerField(null=True, blank=True, help_text="Last reported WiFi signal strength in dBm")
+    last_seen = models.DateTimeField(db_index=True, help_text="When the last reading was received")
+    
+    # Online anomaly detector state (core.sensor_anomaly), O(1) per sensor
+    samples = models.PositiveIntegerField(default=0, help_text="Readings folded into this state")
+    fill_mean = models.FloatField(null=True, blank=True, help_text="EWMA of the fill level")
+    fill_var = models.FloatField(default=0.0, help_text="EWMA variance of the fill level")
+    interval_mean = models.FloatField(null=True, blank=True, help_text="EWMA of seconds between readings")
+    stuck_count = models.PositiveIntegerField(default=0, help_text="Consecutive readings with an unchanged fill level")
+    heartbeat_due = models.DateTimeField(null=True, blank=True, db_index=True,
+                                         help_text="The sensor counts as silent if nothing arrives by then")
+    
+    class Meta:
+        ordering = ['sensor_id']
+        verbose_name = "Sensor Latest State"
+        verbose_name_plural = "Sensor Latest States"
+    
+    # Same rules as for a single reading
+    get_fill_status = SensorData.get_fill_status
+    get_sensor_health = SensorData.get_sensor_health
+    
+    def __str__(self):
+        return f"Sensor {self.sensor_id} - Bin {self.bin_id} (last seen {self.last_seen})"
+    
+    def is_recent(self, minutes=5):
+        """Check if the sensor reported within the last few minutes"""
+        from django.utils import timezone
+        from datetime import timedelta
+        return self.last_seen > timezone.now() - timedelta(minutes=minutes)
+    
+    def apply(self, reading):
+        """Take the reported values of a reading"""
+        self.bin_id = reading.bin_id
+        self.reading_id = reading.id
+        self.fill_level = reading.fill_level
+        self.latitude = reading.latitude
+        self.longitude = reading.longitude
+        self.sensor_status = reading.sensor_status
+        self.battery_level = reading.battery_level
+        self.signal_strength = reading.signal_strength
+        self.last_seen = reading.timestamp
+    
+    @classmethod
+    def seed(cls, readings, new_ids, states, detector=None):
+        """
+        Create the rows of sensors seen for the first time from their first
+        reading, then lock them into `states`. A concurrent ingest may create
+        the same sensor first: its row is kept (ON CONFLICT DO NOTHING) and
+        our first reading is folded into it like any other. Returns the
+        detector findings of the first readings that made it in.
+        """
+        seeds = {}
+        for reading in readings:
+            if reading.sensor_id in new_ids and reading.sensor_id not in seeds:
+                state = cls(sensor_id=reading.sensor_id)
+                # A fresh state has no previous values, so the collector has nothing to compare
+                seed_findings = detector.observe(state, reading) if detector is not None else []
+                state.apply(reading)
+                seeds[reading.sensor_id] = (state, seed_findings)
+        cls.objects.bulk_create([state for state, _ in seeds.values()], ignore_conflicts=True)
+        states.update(cls.objects.select_for_update().in_bulk(new_ids, field_name='sensor_id'))
+        return [
+            finding
+            for sensor_id, (state, seed_findings) in seeds.items()
+            if states[sensor_id].reading_id == state.reading_id
+            for finding in seed_findings
+        ]
+
+    @classmethod
+    def record(cls, readings, detector=None, collector=None):
+        """
+        Fold readings into the latest state of their sensors and upsert it
+        (INSERT ... ON CONFLICT). Readings older than the stored state are
+        ignored. Returns whatever the detector reported for each reading;
+        the collector (core.collection_events) sees each reading against the
+        previous state too and keeps what it finds.
+
+        Must run inside a transaction: the state rows stay locked until it
+        commits, so concurrent ingests for a sensor apply one after the other.
+        """
+        readings = sorted(readings, key=lambda reading: (reading.timestamp, reading.id))
+        sensor_ids = {reading.sensor_id for reading in readings}
+        states = cls.objects.select_for_update().in_bulk(sensor_ids, field_name='sensor_id')
+        findings = []
+        new_ids = sensor_ids - set(states)
+        if new_ids:
+            findings.extend(cls.seed(readings, new_ids, states, detector))
+        changed = {}
+        for reading in readings:
+            state = states[reading.sensor_id]
+            if (reading.timestamp, reading.id) <= (state.last_seen, state.reading_id):
+                continue
+            if detector is not None:
+                findings.extend(detector.observe(state, reading))
+            if collector is not None:
+                collector.observe(state, reading)
+            state.apply(reading)
+            changed[reading.sensor_id] = state
+        if changed:
+            cls.objects.bulk_create(
+                list(changed.values()),
+                update_conflicts=True,
+                unique_fields=['sensor_id'],
+                update_fields=cls.UPSERT_FIELDS,
+            )
+        return findings
+
+
+class SensorAlert(models.Model):
+    """
+    Anomaly flagged for a sensor. One open row per sensor and kind: repeats
+    bump `occurrences` instead of adding rows, and the row is closed when the
+    condition clears (or, for one-off events, after a quiet period).
+    """
+    KIND_CHOICES = [
+        ('SPIKE', 'Fill level spike'),
+        ('FILL_JUMP', 'Impossible fill jump'),
+        ('STUCK', 'Stuck value'),
+        ('BATTERY_COLLAPSE', 'Battery collapse'),
+        ('MISSING_HEARTBEAT', 'Missing heartbeat'),
+    ]
+    SEVERITY_CHOICES = [
+        ('WARNING', 'Warning'),
+        ('CRITICAL', 'Critical'),
+    ]
+    
+    sensor_id = models.CharField(max_length=50)
+    bin_id = models.CharField(max_length=50, db_index=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES, default='WARNING')
+    value = models.FloatField(null=True, blank=True, help_text="Reading value that triggered the alert")
+    message = models.CharField(max_length=200, blank=True)
+    reading_id = models.BigIntegerField(null=True, blank=True, help_text="SensorData row that triggered the alert")
+    occurrences = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Sensor Alert"
+        verbose_name_plural = "Sensor Alerts"
+        indexes = [
+            models.Index(fields=['sensor_id', 'resolved_at']),
+            models.Index(fields=['resolved_at', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} on sensor {self.sensor_id} ({self.created_at})"
+    
+    @property
+    def is_active(self):
+        return self.resolved_at is None
+
+
+class RuleAlert(models.Model):
+    """
+    Alert raised by the rule engine (core.alert_rules) on a bin, dumping spot
+    or sensor change. Written by the database sink; rows are already
+    deduplicated by each rule's window.
+    """
+    SEVERITY_CHOICES = [
+        ('WARNING', 'Warning'),
+        ('CRITICAL', 'Critical'),
+    ]
+
+    rule = models.CharField(max_length=50)
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES, default='WARNING')
+    entity_type = models.CharField(max_length=20, help_text="bin, dumping_spot or sensor")
+    entity_id = models.CharField(max_length=50)
+    message = models.CharField(max_length=200, blank=True)
+    value = models.FloatField(null=True, blank=True)
+    triggered_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-triggered_at']
+        verbose_name = "Rule Alert"
+        verbose_name_plural = "Rule Alerts"
+        indexes = [
+            models.Index(fields=['entity_type', 'entity_id', 'triggered_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.rule} on {self.entity_type} {self.entity_id} ({self.triggered_at})"
+
+
+class CollectionEvent(models.Model):
+    """
+    A bin being emptied, recognized from a sharp fill drop in its sensor
+    data (core.collection_events), with the truck that was nearby if any.
+    """
+    bin_id = models.CharField(max_length=50, help_text="Bin that was emptied")
+    sensor_id = models.CharField(max_length=50)
+    reading_id = models.BigIntegerField(unique=True, help_text="SensorData row that showed the emptied bin")
+    truck = models.ForeignKey(Truck, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='collection_events')
+    truck_distance_m = models.FloatField(null=True, blank=True, help_text="Distance of the truck from the bin")
+    fill_before = models.FloatField(help_text="Fill level of the previous reading")
+    fill_after = models.FloatField(help_text="Fill level after emptying")
+    collected_at = models.DateTimeField(help_text="Timestamp of the reading that showed the emptied bin")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-collected_at']
+        verbose_name = "Collection Event"
+        verbose_name_plural = "Collection Events"
+        indexes = [
+            models.Index(fields=['bin_id', 'collected_at']),
+            models.Index(fields=['collected_at']),
+        ]
+
+    def __str__(self):
+        return f"Bin {self.bin_id} emptied at {self.collected_at}"
+
+    @property
+    def collected_amount(self):
+        return self.fill_before - self.fill_after
+
+class DumpingSpotLoad(models.Model):
+    """
+    The load of one collection unloaded at a dumping spot
+    (core.dumping_loads), split by the composition of the emptied bin.
+    A collection is accounted at most once.
+    """
+    spot = models.ForeignKey(DumpingSpot, on_delete=models.CASCADE, related_name='loads')
+    collection_event = models.OneToOneField(CollectionEvent, on_delete=models.CASCADE, related_name='load')
+    truck = models.ForeignKey(Truck, on_delete=models.SET_NULL, null=True, blank=True, related_name='unloads')
+    organic = models.FloatField(default=0.0)
+    plastic = models.FloatField(default=0.0)
+    metal = models.FloatField(default=0.0)
+    volume = models.FloatField(help_text="Total unloaded, in the units of the spot's total capacity")
+    unloaded_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-unloaded_at']
+        verbose_name = "Dumping Spot Load"
+        verbose_name_plural = "Dumping Spot Loads"
+        indexes = [
+            models.Index(fields=['spot', 'unloaded_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.volume:.2f} unloaded at {self.spot.spot_id} on {self.unloaded_at}"
+
+class SensorFetcherCheckpoint(models.Model):
+    """
+    High-water mark of a sensor data consumer: the (timestamp, id) of the
+    last reading it applied. Readings are consumed in that order, so the
+    consumer resumes after a restart without re-applying old readings.
+    The geofence service keeps its position in the truck fixes here too.
+    """
+    name = models.CharField(max_length=50, unique=True, help_text="Consumer name")
+    last_timestamp = models.DateTimeField(null=True, blank=True, help_text="Timestamp of the last reading applied")
+    last_id = models.BigIntegerField(default=0, help_text="ID of the last reading applied")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Sensor Fetcher Checkpoint"
+        verbose_name_plural = "Sensor Fetcher Checkpoints"
+    
+    def __str__(self):
+        return f"{self.name} at {self.last_timestamp} (#{self.last_id})"
+
 class Camera(models.Model):
     """Camera device model for ESP32-CAM and other cameras"""
     CAMERA_TYPES = [
@@ -328,6 +689,13 @@ class Camera(models.Model):
         ('ERROR', 'Error'),
     ]
     
+    CHANGE_GATING_CHOICES = [
+        ('OFF', 'Off - store every frame'),
+        ('TAG', 'Tag unchanged frames'),
+        ('DOWNSAMPLE', 'Keep one unchanged frame per interval'),
+        ('DROP', 'Drop unchanged frames'),
+    ]
+    
     camera_id = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=100)
     camera_type = models.CharField(max_length=20, choices=CAMERA_TYPES, default='ESP32_CAM')
@@ -336,6 +704,24 @@ class Camera(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     rtsp_url = models.URLField(null=True, blank=True)
     last_maintenance = models.DateTimeField(null=True, blank=True)
+    change_gating = models.CharField(
+        max_length=20,
+        choices=CHANGE_GATING_CHOICES,
+        default='OFF',
+        help_text="What to do with uploaded frames that show an unchanged scene"
+    )
+    change_threshold = models.FloatField(
+        default=0.02,
+        validators=[
+            MinValueValidator(0.0, message='Change threshold cannot be negative'),
+            MaxValueValidator(1.0, message='Change threshold cannot exceed 1.0')
+        ],
+        help_text="Fraction of changed pixels at which a frame counts as a scene change"
+    )
+    unchanged_keep_interval = models.PositiveIntegerField(
+        default=600,
+        help_text="Seconds between kept unchanged frames when downsampling"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -357,6 +743,16 @@ class Camera(models.Model):
         }
         return status_colors.get(self.status, 'gray')
 
+def camera_image_upload_to(instance, filename):
+    """Content-addressed path for originals, so identical bytes always map to one file"""
+    if instance.content_hash:
+        import os
+        digest = instance.content_hash
+        extension = os.path.splitext(filename)[1].lower() or '.jpg'
+        return f"camera_images/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+    from django.utils import timezone
+    return timezone.now().strftime('camera_images/%Y/%m/%d/') + filename
+
 class CameraImage(models.Model):
     """Model for storing camera captured images"""
     ANALYSIS_TYPES = [
@@ -366,9 +762,63 @@ class CameraImage(models.Model):
         ('GENERAL', 'General Monitoring'),
     ]
     
+    PROCESSING_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    STORAGE_TIER_CHOICES = [
+        ('ORIGINAL', 'Original'),
+        ('COMPACTED', 'Compacted'),
+        ('ARCHIVED', 'Archived'),
+    ]
+    
     camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='camera_images/%Y/%m/%d/')
+    image = models.ImageField(upload_to=camera_image_upload_to)
     thumbnail = models.ImageField(upload_to='camera_thumbnails/%Y/%m/%d/', null=True, blank=True)
+    medium = models.ImageField(upload_to='camera_medium/%Y/%m/%d/', null=True, blank=True,
+                               help_text="Medium-size WebP variant for gallery viewing")
+    processing_status = models.CharField(
+        max_length=20,
+        choices=PROCESSING_STATUS_CHOICES,
+        default='PENDING',
+        help_text="Status of background thumbnail/derivative generation"
+    )
+    width = models.PositiveIntegerField(null=True, blank=True, help_text="Image width in pixels")
+    height = models.PositiveIntegerField(null=True, blank=True, help_text="Image height in pixels")
+    byte_size = models.PositiveBigIntegerField(null=True, blank=True, help_text="Original file size in bytes")
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the original file")
+    perceptual_hash = models.CharField(max_length=16, blank=True, help_text="64-bit difference hash for near-duplicate detection")
+    deduplicated = models.BooleanField(default=False, help_text="Image file is shared with an earlier upload")
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='near_duplicates',
+        help_text="Earlier image this near-identical frame was linked to"
+    )
+    storage_tier = models.CharField(
+        max_length=20,
+        choices=STORAGE_TIER_CHOICES,
+        default='ORIGINAL',
+        help_text="Retention tier of the original file (see apply_image_retention)"
+    )
+    archive_name = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Per-day archive holding the original once it is archived"
+    )
+    upload_job = models.ForeignKey(
+        'ImageUploadJob',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='images',
+        help_text="Admin bulk upload this image came from"
+    )
     analysis_type = models.CharField(max_length=20, choices=ANALYSIS_TYPES, default='GENERAL')
     confidence_score = models.FloatField(null=True, blank=True)
     detected_objects = models.JSONField(default=dict, blank=True)
@@ -385,6 +835,8 @@ class CameraImage(models.Model):
             models.Index(fields=['camera', 'created_at']),
             models.Index(fields=['analysis_type', 'created_at']),
             models.Index(fields=['is_analyzed', 'created_at']),
+            models.Index(fields=['processing_status', 'created_at']),
+            models.Index(fields=['storage_tier', 'created_at']),
         ]
     
     def __str__(self):
@@ -393,6 +845,10 @@ class CameraImage(models.Model):
     def get_image_url(self):
         """Get full image URL"""
         if self.image:
+            if self.storage_tier == 'ARCHIVED':
+                # The original only exists inside its day archive; serve it through the API
+                from django.urls import reverse
+                return reverse('cameraimage-file', args=[self.pk])
             return self.image.url
         return None
     
@@ -403,18 +859,29 @@ class CameraImage(models.Model):
                 return self.thumbnail.url
             except:
                 # If thumbnail URL is invalid, return the main image URL
-                return self.image.url if self.image else None
-        return self.image.url if self.image else None
+                return self.get_image_url()
+        return self.get_image_url()
+    
+    def get_medium_url(self):
+        """Get medium WebP variant URL, falling back to the main image"""
+        if self.medium:
+            return self.medium.url
+        return self.get_image_url()
     
     def get_file_size_mb(self):
         """Get image file size in MB"""
-        if self.image:
+        if self.byte_size is not None:
+            return round(self.byte_size / (1024 * 1024), 2)
+        # An archived original is only inside its day archive, not at image.path
+        if self.image and self.storage_tier != 'ARCHIVED':
             return round(self.image.size / (1024 * 1024), 2)
         return 0
     
     def get_dimensions(self):
         """Get image dimensions"""
-        if self.image:
+        if self.width and self.height:
+            return f"{self.width} x {self.height}"
+        if self.image and self.storage_tier != 'ARCHIVED':
             try:
                 from PIL import Image
                 with Image.open(self.image.path) as img:
@@ -423,49 +890,118 @@ class CameraImage(models.Model):
                 return "Unknown"
         return "Unknown"
     
+    def populate_file_info(self):
+        """Fill width, height, byte_size and content_hash from the image file"""
+        from .image_pipeline import read_image_info
+        if self.image._committed:
+            self.image.open('rb')
+            try:
+                info = read_image_info(self.image)
+            finally:
+                self.image.close()
+        else:
+            info = read_image_info(self.image.file)
+        for field, value in info.items():
+            setattr(self, field, value)
+    
     def save(self, *args, **kwargs):
-        """Override save to create thumbnail"""
+        """Override save to record file info and queue thumbnail and derivative generation"""
+        # A freshly assigned file has not been written to storage yet; streamed
+        # uploads arrive with their file info already filled in
+        if self.image and not self.image._committed:
+            if not self.content_hash:
+                self.populate_file_info()
+            # Byte-identical file already stored: reference it instead of writing a copy
+            from .image_dedup import find_blob, share_blob
+            existing = find_blob(self.content_hash, exclude_pk=self.pk)
+            if existing:
+                share_blob(self, existing)
         super().save(*args, **kwargs)
-        if self.image and not self.thumbnail:
-            self.create_thumbnail()
+        if self.image and not self.thumbnail and self.processing_status == 'PENDING':
+            from .image_pipeline import enqueue_derivatives
+            enqueue_derivatives(self.pk)
     
     def create_thumbnail(self):
-        """Create thumbnail from main image"""
+        """Generate thumbnail and medium variant synchronously"""
+        from .image_pipeline import generate_derivatives
         try:
-            from PIL import Image
-            from io import BytesIO
-            from django.core.files import File
-            import os
-            
-            # Check if image exists
-            if not self.image or not os.path.exists(self.image.path):
-                print(f"Image file not found: {self.image.path if self.image else 'No image'}")
-                return
-            
-            # Open the image
-            with Image.open(self.image.path) as img:
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Create thumbnail
-                img.thumbnail((300, 300), Image.Resampling.LANCZOS)
-                
-                # Save thumbnail
-                thumb_io = BytesIO()
-                img.save(thumb_io, format='JPEG', quality=85)
-                thumb_io.seek(0)
-                
-                # Generate thumbnail filename
-                original_name = self.image.name.split('/')[-1]
-                name, ext = os.path.splitext(original_name)
-                thumb_name = f"thumb_{name}.jpg"
-                
-                # Save thumbnail
-                self.thumbnail.save(thumb_name, File(thumb_io), save=False)
-                self.save(update_fields=['thumbnail'])
-                print(f"Thumbnail created successfully: {thumb_name}")
-                
+            generate_derivatives(self)
         except Exception as e:
             print(f"Error creating thumbnail: {e}")
-            # Don't fail the save if thumbnail creation fails 
\ No newline at end of file
+            # Don't fail the save if thumbnail creation fails
+
+class ImageUploadJob(models.Model):
+    """Admin bulk upload whose thumbnails and analysis finish in the background"""
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='upload_jobs')
+    analysis_type = models.CharField(max_length=20, default='GENERAL')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='image_upload_jobs'
+    )
+    total_files = models.PositiveIntegerField(default=0)
+    stored_files = models.PositiveIntegerField(default=0)
+    duplicate_files = models.PositiveIntegerField(default=0, help_text="Files already stored by an earlier upload")
+    failed_files = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Image Upload Job"
+        verbose_name_plural = "Image Upload Jobs"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Upload of {self.total_files} images to {self.camera.name} at {self.created_at}"
+    
+    def get_progress(self):
+        """Derivative and analysis progress of the uploaded images, in one query"""
+        from django.db.models import Count, Q
+        counts = self.images.aggregate(
+            created=Count('id'),
+            processed=Count('id', filter=Q(processing_status__in=['DONE', 'FAILED'])),
+            failed=Count('id', filter=Q(processing_status='FAILED')),
+            analyzed=Count('id', filter=Q(is_analyzed=True)),
+        )
+        created = counts['created']
+        return {
+            'id': self.id,
+            'camera': self.camera.name,
+            'total_files': self.total_files,
+            'stored_files': self.stored_files,
+            'duplicate_files': self.duplicate_files,
+            'failed_files': self.failed_files,
+            'errors': self.errors,
+            'images': created,
+            'processed': counts['processed'],
+            'processing_failed': counts['failed'],
+            'analyzed': counts['analyzed'],
+            'percent_processed': round(counts['processed'] / created * 100, 1) if created else 100.0,
+            'is_complete': counts['processed'] >= created,
+        }
+
+class LoginAttempt(models.Model):
+    """
+    Audit log of logins through EnhancedAuthenticationBackend, written in
+    batches by core.login_audit and pruned after LOGIN_AUDIT_RETENTION_DAYS
+    """
+    username = models.CharField(max_length=150)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    success = models.BooleanField()
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = "Login Attempt"
+        verbose_name_plural = "Login Attempts"
+        indexes = [
+            models.Index(fields=['username', 'id']),
+            models.Index(fields=['ip_address', 'id']),
+            models.Index(fields=['timestamp']),
+        ]
+
+    def __str__(self):
+        result = "succeeded" if self.success else "failed"
+        return f"Login of {self.username} from {self.ip_address} {result} at {self.timestamp}"
@@ -0,0 +1,231 @@
+"""
+Online anomaly detection for sensor readings.
+
+Runs at ingestion on each sensor's SensorLatest row, which carries O(1)
+detector state: an EWMA mean and variance of the fill level, the
+inter-arrival EWMA, a run length of unchanged values and the time by
+which the next reading is due. Each reading is checked for:
+
+- SPIKE: fill level far outside the sensor's recent band (z-score on the
+  EWMA mean/variance, after a warm-up).
+- FILL_JUMP: fill rising faster than a bin can physically fill. Drops are
+  not flagged; an emptied bin is a collection, not a fault.
+- STUCK: the same fill level reported many times in a row.
+- BATTERY_COLLAPSE: the battery losing a large share between readings.
+
+Missing heartbeats cannot be seen at ingestion, so sweep() flags sensors
+whose heartbeat_due has passed, and closes one-off alerts that stayed quiet.
+
+Findings are turned into SensorAlert rows: one open row per sensor and kind.
+"""
+
+import logging
+import math
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Alerts for a single bad reading, closed by sweep() after a quiet period.
+# STUCK and MISSING_HEARTBEAT close as soon as the condition clears.
+EVENT_KINDS = ('SPIKE', 'FILL_JUMP', 'BATTERY_COLLAPSE')
+
+SEVERITIES = {
+    'SPIKE': 'WARNING',
+    'FILL_JUMP': 'WARNING',
+    'STUCK': 'WARNING',
+    'BATTERY_COLLAPSE': 'CRITICAL',
+    'MISSING_HEARTBEAT': 'CRITICAL',
+}
+
+# active=False reports that a condition no longer holds
+Finding = namedtuple('Finding', 'sensor_id bin_id kind active value message reading_id')
+
+
+class AnomalyDetector:
+    """Per-reading checks; all state lives on the SensorLatest row passed in"""
+
+    def __init__(self, alpha=0.1, warmup=10, spike_z=4.0, spike_min_delta=15.0,
+                 max_rise_per_minute=40.0, stuck_readings=30, battery_drop=20.0,
+                 heartbeat_factor=None, heartbeat_min_seconds=None):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.spike_z = spike_z
+        # Small absolute changes never count as spikes, however flat the history
+        self.spike_min_delta = spike_min_delta
+        self.max_rise_per_minute = max_rise_per_minute
+        self.stuck_readings = stuck_readings
+        self.battery_drop = battery_drop
+        self.heartbeat_factor = heartbeat_factor if heartbeat_factor is not None else getattr(
+            settings, 'SENSOR_HEARTBEAT_FACTOR', 5)
+        self.heartbeat_min_seconds = heartbeat_min_seconds if heartbeat_min_seconds is not None else getattr(
+            settings, 'SENSOR_HEARTBEAT_MIN_SECONDS', 300)
+
+    def observe(self, state, reading):
+        """Check a reading against the state and fold it in; returns findings"""
+        findings = []
+
+        def report(kind, active, message=''):
+            findings.append(Finding(reading.sensor_id, reading.bin_id, kind, active,
+                                    reading.fill_level, message, reading.id))
+
+        value = reading.fill_level
+        previous = state.fill_level if state.samples else None
+        seconds = (reading.timestamp - state.last_seen).total_seconds() if state.samples else None
+
+        if state.samples >= self.warmup and state.fill_mean is not None:
+            deviation = abs(value - state.fill_mean)
+            spread = math.sqrt(state.fill_var)
+            if deviation >= self.spike_min_delta and deviation > self.spike_z * spread:
+                report('SPIKE', True, f"Fill {value:.1f}% vs. recent mean {state.fill_mean:.1f}% "
+                                      f"(+/-{spread:.1f})")
+
+        if previous is not None:
+            minutes = max(seconds / 60.0, 1.0)
+            rise = value - previous
+            if rise > self.max_rise_per_minute * minutes:
+                report('FILL_JUMP', True, f"Fill rose {rise:.1f} points in {seconds:.0f}s")
+
+            if value == previous:
+                state.stuck_count += 1
+            else:
+                state.stuck_count = 0
+            if state.stuck_count + 1 >= self.stuck_readings:
+                report('STUCK', True, f"Fill {value:.1f}% unchanged for {state.stuck_count + 1} readings")
+            else:
+                report('STUCK', False)
+
+        if state.battery_level is not None and reading.battery_level is not None:
+            drop = state.battery_level - reading.battery_level
+            if drop >= self.battery_drop:
+                report('BATTERY_COLLAPSE', True,
+                       f"Battery fell from {state.battery_level:.0f}% to {reading.battery_level:.0f}%")
+
+        # Any reading means the sensor is alive
+        report('MISSING_HEARTBEAT', False)
+
+        self.update_state(state, value, seconds, reading.timestamp)
+        return findings
+
+    def update_state(self, state, value, seconds, timestamp):
+        if state.fill_mean is None:
+            state.fill_mean = value
+            state.fill_var = 0.0
+        else:
+            diff = value - state.fill_mean
+            increment = self.alpha * diff
+            state.fill_mean += increment
+            state.fill_var = (1 - self.alpha) * (state.fill_var + diff * increment)
+        if seconds is not None and seconds > 0:
+            if state.interval_mean is None:
+                state.interval_mean = seconds
+            else:
+                state.interval_mean += self.alpha * (seconds - state.interval_mean)
+        state.samples += 1
+        # A silence several times longer than usual (and never under the minimum) is flagged by sweep()
+        allowance = self.heartbeat_min_seconds
+        if state.interval_mean:
+            allowance = max(allowance, self.heartbeat_factor * state.interval_mean)
+        state.heartbeat_due = timestamp + timedelta(seconds=allowance)
+
+
+def sync_alerts(findings, now=None):
+    """Open, bump or close SensorAlert rows for a batch of findings"""
+    from .models import SensorAlert
+
+    if not findings:
+        return {'opened': 0, 'updated': 0, 'resolved': 0}
+    now = now or timezone.now()
+    open_alerts = {
+        (alert.sensor_id, alert.kind): alert
+        for alert in SensorAlert.objects.filter(
+            sensor_id__in={finding.sensor_id for finding in findings}, resolved_at__isnull=True
+        )
+    }
+    opened = {}
+    updated = {}
+    resolved = {}
+    for finding in findings:
+        key = (finding.sensor_id, finding.kind)
+        alert = open_alerts.get(key)
+        if not finding.active:
+            if alert is not None:
+                alert.resolved_at = now
+                open_alerts.pop(key)
+                if key not in opened:
+                    resolved[key] = alert
+            continue
+        if alert is None:
+            alert = open_alerts[key] = opened[key] = SensorAlert(
+                sensor_id=finding.sensor_id, kind=finding.kind, severity=SEVERITIES[finding.kind],
+                occurrences=0
+            )
+            logger.warning(f"🚨 Sensor {finding.sensor_id} ({finding.bin_id}): {finding.message}")
+        elif key not in opened:
+            updated[key] = alert
+        alert.occurrences += 1
+        alert.bin_id = finding.bin_id
+        alert.value = finding.value
+        alert.message = finding.message[:200]
+        alert.reading_id = finding.reading_id
+        alert.updated_at = now
+
+    if opened:
+        SensorAlert.objects.bulk_create(opened.values())
+    if updated:
+        SensorAlert.objects.bulk_update(
+            updated.values(), ['occurrences', 'bin_id', 'value', 'message', 'reading_id', 'updated_at']
+        )
+    if resolved:
+        SensorAlert.objects.bulk_update(resolved.values(), ['resolved_at'])
+    return {'opened': len(opened), 'updated': len(updated), 'resolved': len(resolved)}
+
+
+def ingest_readings(readings, detector=None, collector=None):
+    """
+    Update the latest state of each sensor and its alerts for newly stored
+    readings, and record the collections (emptied bins) among them
+    """
+    from .collection_events import CollectionDetector
+    from .models import SensorLatest
+
+    detector = detector or AnomalyDetector()
+    collector = collector or CollectionDetector()
+    with transaction.atomic():
+        findings = SensorLatest.record(readings, detector=detector, collector=collector)
+        stats = sync_alerts(findings)
+        stats['collections'] = collector.flush()
+        return stats
+
+
+def sweep(now=None, event_ttl_hours=None):
+    """
+    Flag sensors that went silent and close event alerts that stayed quiet.
+    Only touches overdue sensors and open alerts, never the whole history.
+    """
+    from .models import SensorAlert, SensorLatest
+
+    now = now or timezone.now()
+    if event_ttl_hours is None:
+        event_ttl_hours = getattr(settings, 'SENSOR_ALERT_EVENT_TTL_HOURS', 24)
+
+    silent = SensorLatest.objects.filter(heartbeat_due__lt=now).exclude(
+        sensor_id__in=SensorAlert.objects.filter(kind='MISSING_HEARTBEAT', resolved_at__isnull=True)
+        .values('sensor_id')
+    )
+    findings = [
+        Finding(state.sensor_id, state.bin_id, 'MISSING_HEARTBEAT', True, state.fill_level,
+                f"No reading since {state.last_seen:%Y-%m-%d %H:%M:%S}", state.reading_id)
+        for state in silent.only('sensor_id', 'bin_id', 'fill_level', 'last_seen', 'reading_id')
+    ]
+    with transaction.atomic():
+        stats = sync_alerts(findings, now=now)
+        stats['expired'] = SensorAlert.objects.filter(
+            kind__in=EVENT_KINDS, resolved_at__isnull=True,
+            updated_at__lt=now - timedelta(hours=event_ttl_hours)
+        ).update(resolved_at=now)
+    return stats
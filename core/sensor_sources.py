@@ -0,0 +1,182 @@
+"""
+Where the sensor fetcher and the bin updater read their data from.
+
+- HttpSensorSource goes through the REST API, like any external client.
+  Use it when the updater runs outside the cluster.
+- DatabaseSensorSource queries the tables directly with values(). Use it
+  when the updater runs next to the database with Django set up. It skips
+  serialization, throttling and pagination, and reads new readings through
+  the SensorData timestamp index.
+
+Both return plain dicts with the same keys the API uses, so callers do not
+care which one they were given.
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ['http', 'db']
+
+READING_FIELDS = ('id', 'sensor_id', 'bin_id', 'timestamp', 'fill_level', 'latitude', 'longitude',
+                  'organic_percentage', 'plastic_percentage', 'metal_percentage')
+BIN_FIELDS = ('id', 'bin_id', 'fill_level', 'latitude', 'longitude', 'organic_percentage',
+              'plastic_percentage', 'metal_percentage', 'last_updated')
+# Inputs of the alert rules (core.alert_rules) besides bins
+DUMPING_SPOT_FIELDS = ('spot_id', 'total_capacity', 'organic_content', 'plastic_content', 'metal_content', 'fill_level')
+SENSOR_STATE_FIELDS = ('sensor_id', 'bin_id', 'battery_level', 'signal_strength', 'sensor_status', 'last_seen')
+
+
+class HttpSensorSource:
+    """Reads readings and bins through the REST API"""
+
+    name = 'http'
+
+    def __init__(self, api_base_url="http://localhost:8000", session=None, timeout=5, page_size=500, max_pages=20):
+        self.sensor_data_url = f"{api_base_url}/api/sensor-data/"
+        self.bin_data_url = f"{api_base_url}/api/bin-data/"
+        self.dumping_spots_url = f"{api_base_url}/api/dumping-spots/"
+        self.sensor_states_url = f"{api_base_url}/api/sensors/latest/"
+        self.session = session or requests.Session()
+        # requests ignores a session-level timeout, so it is passed on every call
+        self.timeout = timeout
+        self.page_size = page_size
+        # Bounds one fetch; a larger backlog is picked up on the next run
+        self.max_pages = max_pages
+        self.pending = 0
+
+    def query_params(self, watermark):
+        """Query parameters for the first page of readings newer than the watermark"""
+        last_timestamp, last_id = watermark
+        # Without a watermark the whole history is replayed, oldest first
+        after = last_timestamp or datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+        return {'after_timestamp': after.isoformat(), 'after_id': last_id, 'page_size': self.page_size}
+
+    def record_page(self, data, readings, first_page):
+        """Add one API page to readings; returns the next page URL"""
+        if not isinstance(data, dict):
+            readings.extend(data)
+            return None
+        page = data.get('results', [])
+        readings.extend(page)
+        if first_page:
+            # The filtered count is everything not applied yet
+            self.pending = data.get('count', len(page))
+        return data.get('next')
+
+    def fetch_readings(self, watermark):
+        """Readings newer than the watermark, oldest first, across pages"""
+        readings = []
+        url, params = self.sensor_data_url, self.query_params(watermark)
+        try:
+            for page in range(self.max_pages):
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code != 200:
+                    logger.warning(f"Failed to fetch sensor data: {response.status_code}")
+                    break
+                # The next link already carries the query
+                url, params = self.record_page(response.json(), readings, page == 0), None
+                if not url:
+                    break
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching sensor data: {e}")
+        return readings
+
+    def fetch_bins(self):
+        """Current state of every bin"""
+        try:
+            response = self.session.get(self.bin_data_url, timeout=self.timeout)
+            if response.status_code == 200:
+                return response.json()
+            logger.warning(f"Failed to fetch bin data: {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching bin data: {e}")
+        return []
+
+    def fetch_all(self, url, params=None):
+        """Every row of a list endpoint, following the next links"""
+        rows = []
+        try:
+            while url:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code != 200:
+                    logger.warning(f"Failed to fetch {url}: {response.status_code}")
+                    break
+                data = response.json()
+                if not isinstance(data, dict):
+                    rows.extend(data)
+                    break
+                rows.extend(data.get('results', []))
+                url, params = data.get('next'), None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching {url}: {e}")
+        return rows
+
+    def fetch_dumping_spots(self):
+        """Current content of every dumping spot"""
+        return self.fetch_all(self.dumping_spots_url)
+
+    def fetch_sensor_states(self):
+        """Latest state of every sensor"""
+        return self.fetch_all(self.sensor_states_url, {'page_size': self.page_size})
+
+
+class DatabaseSensorSource:
+    """Reads readings and bins straight from the database"""
+
+    name = 'db'
+
+    def __init__(self, limit=10000):
+        # Same bound as page_size * max_pages of the HTTP source
+        self.limit = limit
+        self.pending = 0
+
+    def fetch_readings(self, watermark):
+        """Readings newer than the watermark, oldest first"""
+        from .models import SensorData
+
+        last_timestamp, last_id = watermark
+        queryset = SensorData.objects.all()
+        if last_timestamp:
+            queryset = queryset.filter(
+                Q(timestamp__gt=last_timestamp) | Q(timestamp=last_timestamp, id__gt=last_id)
+            )
+        # One row past the limit tells whether the backlog needs counting at all
+        readings = list(queryset.order_by('timestamp', 'id').values(*READING_FIELDS)[:self.limit + 1])
+        if len(readings) > self.limit:
+            readings = readings[:self.limit]
+            self.pending = queryset.count()
+        else:
+            self.pending = len(readings)
+        return readings
+
+    def fetch_bins(self):
+        """Current state of every bin"""
+        from .models import Bin
+
+        return list(Bin.objects.order_by('bin_id').values(*BIN_FIELDS))
+
+    def fetch_dumping_spots(self):
+        """Current content of every dumping spot"""
+        from .models import DumpingSpot
+
+        return list(DumpingSpot.objects.values(*DUMPING_SPOT_FIELDS))
+
+    def fetch_sensor_states(self):
+        """Latest state of every sensor"""
+        from .models import SensorLatest
+
+        return list(SensorLatest.objects.values(*SENSOR_STATE_FIELDS))
+
+
+def get_sensor_source(name, api_base_url="http://localhost:8000", page_size=500, max_pages=20):
+    """Build the source named on the command line"""
+    if name == 'db':
+        return DatabaseSensorSource(limit=page_size * max_pages)
+    if name == 'http':
+        return HttpSensorSource(api_base_url, page_size=page_size, max_pages=max_pages)
+    raise ValueError(f"Unknown sensor source '{name}'. Available: {', '.join(SOURCES)}")
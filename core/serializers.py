@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
-from .models import Bin, DumpingSpot, Truck, Role, SensorData, Camera, CameraImage
+from .models import Bin, DumpingSpot, Truck, TruckPosition, GeofenceEvent, Role, SensorData, SensorLatest, SensorAlert, CollectionEvent, Camera, CameraImage
+from .dumping_loads import fill_rates, project
 from django.utils import timezone
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -54,10 +55,20 @@ class BinSerializer(serializers.ModelSerializer):
         return value
 
 class DumpingSpotSerializer(serializers.ModelSerializer):
+    forecast = serializers.SerializerMethodField()
+
     class Meta:
         model = DumpingSpot
         fields = '__all__'
-        read_only_fields = ['last_updated']
+        read_only_fields = ['last_updated', 'fill_level']
+
+    def get_forecast(self, obj):
+        """Overflow forecast; the view passes the fill rates of all spots in the context"""
+        rates = self.context.get('fill_rates')
+        if rates is None:
+            rates = fill_rates([obj])
+        projection = project(obj, rates.get(obj.pk, 0.0))
+        return {key: projection[key] for key in ('remaining_capacity', 'fill_rate_per_day', 'days_to_overflow', 'overflow_at')}
 
     def validate_latitude(self, value):
         """Validate latitude"""
@@ -81,7 +92,7 @@ class TruckSerializer(serializers.ModelSerializer):
     class Meta:
         model = Truck
         fields = '__all__'
-        read_only_fields = ['last_updated']
+        read_only_fields = ['last_updated', 'track_compacted_until']
 
     def validate_latitude(self, value):
         """Validate latitude"""
@@ -107,6 +118,27 @@ class TruckSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Driver name must be at least 2 characters long")
         return value.strip()
 
+class TruckPositionSerializer(serializers.ModelSerializer):
+    """
+    One GPS fix in a batch sent to /api/trucks/positions/
+    """
+    # Resolved for the whole batch at once by the view, not one query per fix
+    truck_id = serializers.CharField(max_length=50)
+
+    class Meta:
+        model = TruckPosition
+        fields = ['truck_id', 'timestamp', 'latitude', 'longitude', 'speed', 'heading']
+
+class GeofenceEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for trucks entering, staying at and leaving bin and dumping spot fences
+    """
+    truck_id = serializers.CharField(source='truck.truck_id', read_only=True)
+
+    class Meta:
+        model = GeofenceEvent
+        exclude = ['truck']
+
 class SensorDataSerializer(serializers.ModelSerializer):
     """
     Serializer for real-time sensor data from ESP32 devices
@@ -167,6 +199,43 @@ class SensorDataSerializer(serializers.ModelSerializer):
         data['is_recent'] = instance.is_recent()
         return data 
 
+class SensorLatestSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the latest state of each sensor
+    """
+    class Meta:
+        model = SensorLatest
+        exclude = ['id', 'fill_mean', 'fill_var', 'stuck_count']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['fill_status'] = instance.get_fill_status()
+        data['sensor_health'] = instance.get_sensor_health()
+        data['is_recent'] = instance.is_recent()
+        return data
+
+class SensorAlertSerializer(serializers.ModelSerializer):
+    """
+    Serializer for anomalies flagged at ingestion
+    """
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    is_active = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = SensorAlert
+        fields = '__all__'
+
+class CollectionEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for detected bin collections
+    """
+    truck_id = serializers.CharField(source='truck.truck_id', read_only=True, default=None)
+    collected_amount = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = CollectionEvent
+        exclude = ['truck']
+
 class CameraSerializer(serializers.ModelSerializer):
     """Serializer for Camera model"""
     status_color = serializers.ReadOnlyField(source='get_status_color')
@@ -178,17 +247,23 @@ class CameraSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'camera_id', 'name', 'camera_type', 'location', 'status',
             'status_color', 'ip_address', 'rtsp_url', 'last_maintenance',
+            'change_gating', 'change_threshold', 'unchanged_keep_interval',
             'created_at', 'updated_at', 'total_images', 'last_image_date'
         ]
         read_only_fields = ['created_at', 'updated_at']
     
     def get_total_images(self, obj):
         """Get total number of images from this camera"""
+        # List/retrieve querysets annotate this (see CameraViewSet.get_queryset)
+        if hasattr(obj, 'image_count'):
+            return obj.image_count
         return obj.images.count()
     
     def get_last_image_date(self, obj):
         """Get date of last image from this camera"""
-        last_image = obj.images.order_by('-created_at').first()
+        if hasattr(obj, 'last_image_at'):
+            return obj.last_image_at
+        last_image = obj.images.order_by('-created_at').only('created_at').first()
         return last_image.created_at if last_image else None
 
 class CameraImageSerializer(serializers.ModelSerializer):
@@ -197,6 +272,8 @@ class CameraImageSerializer(serializers.ModelSerializer):
     camera_type = serializers.ReadOnlyField(source='camera.camera_type')
     image_url = serializers.ReadOnlyField(source='get_image_url')
     thumbnail_url = serializers.ReadOnlyField(source='get_thumbnail_url')
+    medium_url = serializers.ReadOnlyField(source='get_medium_url')
+    # Both read the width/height/byte_size columns stored at ingestion
     file_size_mb = serializers.ReadOnlyField(source='get_file_size_mb')
     dimensions = serializers.ReadOnlyField(source='get_dimensions')
     
@@ -204,11 +281,17 @@ class CameraImageSerializer(serializers.ModelSerializer):
         model = CameraImage
         fields = [
             'id', 'camera', 'camera_name', 'camera_type', 'image', 'image_url',
-            'thumbnail_url', 'analysis_type', 'confidence_score', 'detected_objects',
-            'analysis_result', 'metadata', 'is_analyzed', 'created_at',
-            'file_size_mb', 'dimensions'
+            'thumbnail_url', 'medium_url', 'processing_status', 'analysis_type',
+            'confidence_score', 'detected_objects', 'analysis_result', 'metadata',
+            'is_analyzed', 'created_at', 'file_size_mb', 'dimensions',
+            'width', 'height', 'byte_size', 'content_hash', 'deduplicated', 'duplicate_of',
+            'storage_tier'
+        ]
+        read_only_fields = [
+            'created_at', 'thumbnail', 'image_url', 'thumbnail_url', 'medium_url', 'processing_status',
+            'width', 'height', 'byte_size', 'content_hash', 'deduplicated', 'duplicate_of',
+            'storage_tier'
         ]
-        read_only_fields = ['created_at', 'thumbnail', 'image_url', 'thumbnail_url']
         extra_kwargs = {
             'camera': {'required': False}  # Make camera field optional for uploads
         }
@@ -244,4 +327,13 @@ class CameraImageSerializer(serializers.ModelSerializer):
                     'remote_addr': request.META.get('REMOTE_ADDR', ''),
                 }
         
-        return super().create(validated_data) 
\ No newline at end of file
+        return super().create(validated_data)
+    
+    def to_representation(self, instance):
+        """Point the image field at the API for originals that only exist inside an archive"""
+        data = super().to_representation(instance)
+        if instance.storage_tier == 'ARCHIVED' and data.get('image'):
+            request = self.context.get('request')
+            url = instance.get_image_url()
+            data['image'] = request.build_absolute_uri(url) if request else url
+        return data
@@ -0,0 +1,179 @@
+"""
+Asyncio runner for the polling daemons.
+
+Hosts several periodic jobs (sensor fetching, bin monitoring, ...) in one
+process. The jobs share one pooled HTTP client. Each job is scheduled on a
+fixed, drift-free timeline, and failures back off exponentially with
+jitter instead of retrying on a fixed sleep.
+
+HTTP calls go through a shared requests.Session (keep-alive connection
+pool) on a small thread pool, with connect/read timeouts on every request.
+ORM work is run with sync_to_async so it stays off the event loop.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (3.05, 5)  # (connect, read) seconds
+
+
+class AsyncHttpClient:
+    """Pooled HTTP client whose blocking requests run on a bounded thread pool"""
+
+    def __init__(self, base_url='', pool_size=10, timeout=DEFAULT_TIMEOUT, user_agent='SmartWaste-ServiceRunner/1.0'):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': user_agent, 'Accept': 'application/json'})
+        # Retries are handled by the job backoff, not by urllib3
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='http-client')
+
+    def url(self, path):
+        return path if '://' in path else f"{self.base_url}/{path.lstrip('/')}"
+
+    def _get_json(self, url, params):
+        # A session-level timeout attribute is ignored by requests; it has to be passed per call
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_json(self, path, params=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._get_json, self.url(path), params)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+class Backoff:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, base=1.0, cap=60.0):
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+
+def _run_orm(func, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_orm(func, *args, **kwargs):
+    """Run blocking ORM code from a job without stalling the event loop"""
+    return await sync_to_async(_run_orm)(func, *args, **kwargs)
+
+
+class PeriodicJob:
+    """
+    A coroutine function run every `interval` seconds.
+
+    Runs are scheduled at start + n * interval, so slow runs do not push
+    later ones back. Ticks missed while a run overran are skipped, not
+    replayed in a burst. After a failure the job retries on a backoff delay,
+    then goes back to its regular schedule.
+    """
+
+    def __init__(self, name, interval, func, backoff=None):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.backoff = backoff or Backoff(base=min(interval, 1.0), cap=max(interval * 30, 60.0))
+        self.stats = {'runs': 0, 'failures': 0, 'skipped_ticks': 0, 'consecutive_failures': 0,
+                      'last_success': None, 'last_duration': None}
+
+    async def run(self, client, stop_event):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
+        while not stop_event.is_set():
+            started = loop.time()
+            try:
+                await self.func(client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['failures'] += 1
+                self.stats['consecutive_failures'] += 1
+                delay = self.backoff.delay(self.stats['consecutive_failures'])
+                logger.warning(
+                    f"❌ Job {self.name} failed ({self.stats['consecutive_failures']} in a row): {e}; "
+                    f"retrying in {delay:.1f}s"
+                )
+                next_run = loop.time() + delay
+                await _wait(stop_event, delay)
+                continue
+
+            self.stats['runs'] += 1
+            self.stats['consecutive_failures'] = 0
+            self.stats['last_success'] = time.time()
+            self.stats['last_duration'] = round(loop.time() - started, 3)
+
+            next_run += self.interval
+            now = loop.time()
+            if next_run < now:
+                missed = int((now - next_run) // self.interval) + 1
+                self.stats['skipped_ticks'] += missed
+                next_run += missed * self.interval
+            await _wait(stop_event, next_run - now)
+
+
+async def _wait(stop_event, timeout):
+    """Sleep for timeout seconds, returning early when the runner stops"""
+    try:
+        await asyncio.wait_for(stop_event.wait(), timeout=max(timeout, 0))
+    except asyncio.TimeoutError:
+        pass
+
+
+class ServiceRunner:
+    """Runs periodic jobs concurrently on one event loop with a shared HTTP client"""
+
+    def __init__(self, client, jobs):
+        self.client = client
+        self.jobs = list(jobs)
+        self.stop_event = None
+
+    def stop(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    async def run(self, duration=None):
+        self.stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        if duration:
+            loop.call_later(duration, self.stop_event.set)
+
+        tasks = [asyncio.create_task(job.run(self.client, self.stop_event), name=job.name) for job in self.jobs]
+        logger.info(f"🚀 Service runner started with jobs: {', '.join(job.name for job in self.jobs)}")
+        try:
+            await self.stop_event.wait()
+        finally:
+            # Jobs stop at their next wait; anything still in flight is cancelled
+            done, pending = await asyncio.wait(tasks, timeout=5)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.client.close()
+            logger.info("🛑 Service runner stopped")
+
+    def statistics(self):
+        return {job.name: dict(job.stats) for job in self.jobs}
@@ -0,0 +1,48 @@
+"""
+Sliding session expiry without a session write on every request.
+
+SESSION_SAVE_EVERY_REQUEST rewrites the session of every request that
+has one, only to push its expiry forward. SessionRefreshMiddleware
+keeps the sliding expiry but only lets a session be saved when:
+- the request changed its data, or
+- less than SESSION_MIN_REMAINING_SECONDS of SESSION_COOKIE_AGE is left
+  since it was last saved.
+
+The time of the last save is kept in the session itself, so this
+works with every session engine (db, cached_db, cache or
+signed_cookies, see SESSION_ENGINE). Place it right after
+SessionMiddleware so it runs before that middleware decides to save.
+"""
+
+import time
+
+from django.conf import settings
+
+SAVED_AT_KEY = '_session_saved_at'
+
+
+class SessionRefreshMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        # No cookie and nothing stored (anonymous polling): never touch the store
+        if session is None or session.is_empty():
+            return response
+
+        now = int(time.time())
+        if session.modified:
+            if session.keys():
+                session[SAVED_AT_KEY] = now
+            return response
+
+        saved_at = session.get(SAVED_AT_KEY)
+        if not session.keys():
+            return response  # expired or unknown session key
+        remaining = settings.SESSION_COOKIE_AGE - (now - (saved_at or 0))
+        if remaining < getattr(settings, 'SESSION_MIN_REMAINING_SECONDS', settings.SESSION_COOKIE_AGE * 5 // 6):
+            # Marks the session modified, so SessionMiddleware saves it and extends its expiry
+            session[SAVED_AT_KEY] = now
+        return response
@@ -0,0 +1,232 @@
+"""
+Streaming receive of raw ESP32-CAM uploads.
+
+The request body is copied to a temporary file in fixed-size chunks while
+it is hashed and the JPEG header is sniffed for dimensions, so a worker
+never holds a whole frame in memory. Flaky links can send a frame in
+pieces with `X-Upload-Id` + `Content-Range` and resume from the offset
+the server reports.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# EXIF/APP segments sit before the frame header; 64 KB covers ESP32-CAM output
+HEADER_SNIFF_BYTES = 64 * 1024
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+PARTIAL_UPLOAD_TTL = 24 * 3600
+
+# Start-of-frame markers that carry the image size (excludes DHT, JPG and DAC)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class UploadError(Exception):
+    """Base class for upload errors, carrying the HTTP status to return"""
+    status_code = 400
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class UploadOffsetMismatch(UploadError):
+    status_code = 409
+
+    def __init__(self, offset):
+        super().__init__(f"Upload offset mismatch, server has {offset} bytes")
+        self.offset = offset
+
+
+def get_max_upload_bytes():
+    return getattr(settings, 'ESP32_UPLOAD_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+
+def parse_jpeg_dimensions(header):
+    """Return (width, height) from the SOF segment of a JPEG header, or None"""
+    if header[:2] != b'\xff\xd8':
+        return None
+    i = 2
+    while i + 9 <= len(header):
+        if header[i] != 0xFF:
+            return None
+        marker = header[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers have no length field
+            i += 2
+            continue
+        if marker in SOF_MARKERS:
+            height = int.from_bytes(header[i + 5:i + 7], 'big')
+            width = int.from_bytes(header[i + 7:i + 9], 'big')
+            return width, height
+        segment_length = int.from_bytes(header[i + 2:i + 4], 'big')
+        i += 2 + segment_length
+    return None
+
+
+def _read_dimensions(fileobj, header):
+    """Dimensions from the sniffed header, falling back to Pillow's header parser"""
+    dimensions = parse_jpeg_dimensions(header)
+    if dimensions:
+        return dimensions
+    from PIL import Image
+    try:
+        fileobj.seek(0)
+        with Image.open(fileobj) as img:
+            return img.size
+    except Exception as e:
+        logger.warning(f"Could not read image dimensions: {e}")
+        return None, None
+    finally:
+        fileobj.seek(0)
+
+
+def _copy_stream(stream, destination, length, digest=None, header=None):
+    """Copy exactly `length` bytes from stream to destination in chunks"""
+    received = 0
+    while received < length:
+        chunk = stream.read(min(CHUNK_SIZE, length - received))
+        if not chunk:
+            break
+        received += len(chunk)
+        destination.write(chunk)
+        if digest is not None:
+            digest.update(chunk)
+        if header is not None and len(header) < HEADER_SNIFF_BYTES:
+            header += chunk[:HEADER_SNIFF_BYTES - len(header)]
+    if received != length:
+        raise UploadError(f"Incomplete upload: expected {length} bytes, received {received}")
+    return received
+
+
+def receive_stream(stream, content_length, name):
+    """
+    Stream a request body of `content_length` bytes into a temporary file.
+    Returns (uploaded_file, info) where info holds CameraImage field values.
+    """
+    max_bytes = get_max_upload_bytes()
+    if content_length > max_bytes:
+        raise UploadTooLarge(f"Upload of {content_length} bytes exceeds limit of {max_bytes} bytes")
+
+    upload = TemporaryUploadedFile(name, 'image/jpeg', content_length, None)
+    digest = hashlib.sha256()
+    header = bytearray()
+    try:
+        received = _copy_stream(stream, upload, content_length, digest, header)
+        upload.flush()
+        upload.seek(0)
+        width, height = _read_dimensions(upload, bytes(header))
+    except Exception:
+        upload.close()
+        raise
+
+    info = {
+        'width': width,
+        'height': height,
+        'byte_size': received,
+        'content_hash': digest.hexdigest(),
+    }
+    return upload, info
+
+
+class AssembledUpload(File):
+    """A completed resumable upload; storage can move it into place instead of copying"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        path = self.file.name
+        super().close()
+        # Storage moves the file into place when it can; remove it if it was copied instead
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _partial_upload_dir():
+    path = getattr(settings, 'RESUMABLE_UPLOAD_DIR', None) or os.path.join(tempfile.gettempdir(), 'esp32_uploads')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _partial_upload_path(camera_id, upload_id):
+    key = hashlib.sha1(f"{camera_id}:{upload_id}".encode()).hexdigest()
+    return os.path.join(_partial_upload_dir(), f"{key}.part")
+
+
+def cleanup_partial_uploads(max_age=PARTIAL_UPLOAD_TTL):
+    """Remove partial uploads that were abandoned by their devices"""
+    cutoff = time.time() - max_age
+    directory = _partial_upload_dir()
+    for entry in os.scandir(directory):
+        try:
+            if entry.name.endswith('.part') and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def parse_content_range(value):
+    """Parse 'bytes start-end/total' into (start, end, total)"""
+    try:
+        unit, _, spec = value.strip().partition(' ')
+        byte_range, _, total = spec.partition('/')
+        start, _, end = byte_range.partition('-')
+        if unit != 'bytes':
+            raise ValueError(unit)
+        start, end, total = int(start), int(end), int(total)
+    except ValueError:
+        raise UploadError(f"Invalid Content-Range header: {value}")
+    if start < 0 or end < start or end >= total:
+        raise UploadError(f"Invalid Content-Range header: {value}")
+    return start, end, total
+
+
+def receive_chunk(stream, content_length, camera_id, upload_id, content_range, name):
+    """
+    Append one chunk of a resumable upload.
+    Returns (None, offset) while the upload is incomplete, or
+    (uploaded_file, info) once the final chunk has arrived.
+    """
+    start, end, total = parse_content_range(content_range)
+    max_bytes = get_max_upload_bytes()
+    if total > max_bytes:
+        raise UploadTooLarge(f"Upload of {total} bytes exceeds limit of {max_bytes} bytes")
+    if end - start + 1 != content_length:
+        raise UploadError("Content-Range does not match Content-Length")
+
+    path = _partial_upload_path(camera_id, upload_id)
+    if start == 0:
+        cleanup_partial_uploads()
+    offset = os.path.getsize(path) if os.path.exists(path) else 0
+    if start != offset:
+        raise UploadOffsetMismatch(offset)
+
+    with open(path, 'ab') as partial:
+        try:
+            _copy_stream(stream, partial, content_length)
+        except UploadError:
+            # Drop the torn chunk so the device can resend it from the same offset
+            partial.truncate(offset)
+            raise
+    offset = end + 1
+    if offset < total:
+        return None, offset
+
+    from .image_pipeline import read_image_info
+    upload = AssembledUpload(open(path, 'rb'), name=name)
+    info = read_image_info(upload)
+    return upload, info
@@ -0,0 +1,116 @@
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .login_throttle import LoginThrottle
+from .models import Camera, CameraImage
+
+User = get_user_model()
+
+
+class CameraListingQueryCountTests(TestCase):
+    """Camera and camera image listings cost the same queries for 1 or 10 cameras"""
+
+    IMAGES_PER_CAMERA = 2
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def seed(self, cameras):
+        """Top the cameras up to this many, each with its images"""
+        start = Camera.objects.count()
+        new_cameras = Camera.objects.bulk_create([
+            Camera(camera_id=f'CAM_{i:03d}', name=f'Camera {i}', location=f'Location {i}')
+            for i in range(start, cameras)
+        ])
+        # Rows only: file info is stored, so listing them never touches storage
+        CameraImage.objects.bulk_create([
+            CameraImage(
+                camera=camera, image=f'camera_images/{camera.camera_id}_{n}.jpg',
+                width=640, height=480, byte_size=50000, content_hash=f'{camera.camera_id}{n}'.ljust(64, '0'),
+            )
+            for camera in new_cameras for n in range(self.IMAGES_PER_CAMERA)
+        ])
+
+    def assertConstantQueries(self, url):
+        self.client.get(url)  # warm per-process caches such as content types
+        self.seed(1)
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.seed(10)
+        with self.assertNumQueries(len(few)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_camera_api_list(self):
+        self.assertConstantQueries('/api/cameras/')
+
+    def test_camera_image_api_list(self):
+        self.assertConstantQueries('/api/camera-images/')
+
+    def test_camera_admin_changelist(self):
+        self.assertConstantQueries('/admin/core/camera/')
+
+    def test_camera_image_admin_changelist(self):
+        self.assertConstantQueries('/admin/core/cameraimage/')
+
+
+class LoginThrottleConcurrencyTests(SimpleTestCase):
+    """Failed logins counted from many threads at once are never lost"""
+
+    THREADS = 16
+    ATTEMPTS = 2000
+
+    def setUp(self):
+        self.cache = LocMemCache(f'login-throttle-test-{uuid.uuid4().hex}', {'OPTIONS': {'MAX_ENTRIES': 10000}})
+        self.throttle = LoginThrottle(cache=self.cache)
+        self.now = time.time()
+
+    def counted(self, prefix, identifier):
+        """Both buckets, the sliding window counts from them"""
+        return sum(self.cache.get(key, 0) for key in self.throttle.bucket_keys(prefix, identifier, self.now))
+
+    def fail(self, ip, username):
+        return self.throttle.register_failure(ip, username, self.throttle.status(ip, username, now=self.now))
+
+    def test_concurrent_failures_are_counted_exactly(self):
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            list(pool.map(lambda _: self.fail('10.0.0.1', 'alice'), range(self.ATTEMPTS)))
+
+        self.assertEqual(self.counted('ip_attempts', '10.0.0.1'), self.ATTEMPTS)
+        self.assertEqual(self.counted('user_attempts', 'alice'), self.ATTEMPTS)
+        status = self.throttle.status('10.0.0.1', 'alice', now=self.now)
+        self.assertTrue(status['ip_blocked'])
+        self.assertTrue(status['account_locked'])
+
+    def test_get_and_set_backends_are_counted_exactly(self):
+        # FileBasedCache inherits the non-atomic BaseCache.incr
+        with tempfile.TemporaryDirectory() as directory:
+            self.cache = FileBasedCache(directory, {})
+            self.throttle = LoginThrottle(cache=self.cache)
+            self.assertFalse(self.throttle.incr_is_atomic())
+            with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+                list(pool.map(lambda _: self.fail('10.0.0.2', 'dave'), range(200)))
+
+            self.assertEqual(self.counted('ip_attempts', '10.0.0.2'), 200)
+            self.assertEqual(self.counted('user_attempts', 'dave'), 200)
+
+    def test_account_locks_at_user_attempt_limit(self):
+        limit = settings.LOGIN_USER_ATTEMPT_LIMIT
+        # A fresh IP per attempt, so only the username counter can lock anything
+        results = [self.fail(f'10.0.1.{i}', 'bob') for i in range(limit)]
+
+        self.assertEqual([result['account_locked'] for result in results], [False] * (limit - 1) + [True])
+        self.assertTrue(self.throttle.status('10.0.1.200', 'bob', now=self.now)['account_locked'])
+        self.assertFalse(self.throttle.status('10.0.1.200', 'carol', now=self.now)['account_locked'])
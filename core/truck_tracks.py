@@ -0,0 +1,209 @@
+"""
+GPS tracks of the trucks.
+
+Positions are appended to TruckPosition in batches instead of overwriting
+the Truck row on every fix:
+
+- record_positions() bulk-inserts a batch and moves each truck's current
+  position forward with a narrow UPDATE, once per truck and only when the
+  batch holds a fix newer than the truck's current one (checked in the
+  UPDATE itself, so concurrent batches cannot move a truck back). Fixes
+  sent twice (client retries) are ignored.
+- The latest position of each truck is also kept in the cache, so live maps
+  read it without touching the database.
+- Old tracks are thinned with Douglas-Peucker (compact_tracks), which keeps
+  the shape of a route within a tolerance in meters and drops the rest.
+  The same simplification is applied on the fly when a track is served
+  with a tolerance.
+"""
+
+import logging
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+LATEST_CACHE_PREFIX = 'truck_position:'
+LATEST_CACHE_TTL = 24 * 3600
+
+
+def _cache_key(truck_id):
+    return f"{LATEST_CACHE_PREFIX}{truck_id}"
+
+
+def simplify(points, tolerance_m):
+    """
+    Indexes of the points kept by Douglas-Peucker simplification.
+
+    points are (latitude, longitude) pairs in track order. Distances use an
+    equirectangular projection around the track, which is accurate to well
+    under a meter over the few kilometers between two kept points. Runs
+    with an explicit stack, so long tracks do not hit the recursion limit.
+    """
+    count = len(points)
+    if count <= 2 or tolerance_m <= 0:
+        return list(range(count))
+    scale = math.cos(math.radians(sum(lat for lat, _ in points) / count))
+    xy = [(math.radians(lon) * scale * EARTH_RADIUS_M, math.radians(lat) * EARTH_RADIUS_M) for lat, lon in points]
+
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        (x1, y1), (x2, y2) = xy[start], xy[end]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        farthest, index = -1.0, None
+        for i in range(start + 1, end):
+            x, y = xy[i]
+            if length:
+                distance = abs(dy * (x - x1) - dx * (y - y1)) / length
+            else:
+                distance = math.hypot(x - x1, y - y1)
+            if distance > farthest:
+                farthest, index = distance, i
+        if index is not None and farthest > tolerance_m:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return [i for i in range(count) if keep[i]]
+
+
+def record_positions(positions):
+    """
+    Store validated fixes (dicts with truck, timestamp, latitude, longitude
+    and optionally speed/heading) and advance each truck's current position.
+    Returns the number of fixes received and of trucks moved.
+    """
+    from .models import Truck, TruckPosition
+
+    if not positions:
+        return {'received': 0, 'trucks_updated': 0}
+    rows = [TruckPosition(**position) for position in positions]
+    newest = {}
+    for row in rows:
+        if row.truck_id not in newest or row.timestamp > newest[row.truck_id].timestamp:
+            newest[row.truck_id] = row
+
+    moved = {}
+    with transaction.atomic():
+        TruckPosition.objects.bulk_create(rows, ignore_conflicts=True)
+        for truck_id, row in newest.items():
+            # Late fixes extend the track but must not move the truck back. The check is
+            # part of the UPDATE, so a concurrent batch with newer fixes always wins.
+            updated = Truck.objects.filter(pk=truck_id).filter(
+                Q(last_updated__isnull=True) | Q(last_updated__lt=row.timestamp)
+            ).update(current_latitude=row.latitude, current_longitude=row.longitude, last_updated=row.timestamp)
+            if updated:
+                moved[_cache_key(row.truck.truck_id)] = latest_entry(row.truck.truck_id, row)
+        if moved:
+            # Before commit: a batch waiting on these rows caches its position after ours
+            cache.set_many(moved, LATEST_CACHE_TTL)
+    return {'received': len(rows), 'trucks_updated': len(moved)}
+
+
+def latest_entry(truck_id, position):
+    return {
+        'truck_id': truck_id,
+        'latitude': position.latitude,
+        'longitude': position.longitude,
+        'speed': getattr(position, 'speed', None),
+        'heading': getattr(position, 'heading', None),
+        'timestamp': position.timestamp,
+    }
+
+
+def latest_positions(truck_ids=None):
+    """Latest position of the given trucks (all by default), from the cache where possible"""
+    from .models import Truck
+
+    if truck_ids is None:
+        truck_ids = list(Truck.objects.order_by('truck_id').values_list('truck_id', flat=True))
+    cached = cache.get_many([_cache_key(truck_id) for truck_id in truck_ids])
+    missing = [truck_id for truck_id in truck_ids if _cache_key(truck_id) not in cached]
+    if missing:
+        fresh = {}
+        for truck in Truck.objects.filter(truck_id__in=missing).only(
+                'truck_id', 'current_latitude', 'current_longitude', 'last_updated'):
+            fresh[_cache_key(truck.truck_id)] = {
+                'truck_id': truck.truck_id,
+                'latitude': truck.current_latitude,
+                'longitude': truck.current_longitude,
+                'speed': None,
+                'heading': None,
+                'timestamp': truck.last_updated,
+            }
+        cache.set_many(fresh, LATEST_CACHE_TTL)
+        cached.update(fresh)
+    return [cached[_cache_key(truck_id)] for truck_id in truck_ids if _cache_key(truck_id) in cached]
+
+
+def forget_latest(truck_id):
+    """Drop a cached position that the Truck row no longer matches (e.g. after an edit)"""
+    cache.delete(_cache_key(truck_id))
+
+
+def load_track(truck, start, end, tolerance_m=0):
+    """Fixes of a truck between start and end as (timestamp, latitude, longitude), simplified if asked"""
+    points = list(
+        truck.positions.filter(timestamp__gte=start, timestamp__lte=end)
+        .order_by('timestamp').values_list('timestamp', 'latitude', 'longitude')
+    )
+    total = len(points)
+    if tolerance_m and total > 2:
+        points = [points[i] for i in simplify([(lat, lon) for _, lat, lon in points], tolerance_m)]
+    return points, total
+
+
+def compact_tracks(older_than_days=None, tolerance_m=None, truck=None):
+    """
+    Simplify stored tracks older than the cutoff, one truck-day at a time.
+    Each truck remembers how far it was compacted, so every fix is
+    simplified once. Returns (fixes examined, fixes deleted).
+    """
+    from .models import Truck, TruckPosition
+
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'TRUCK_TRACK_COMPACT_AFTER_DAYS', 7)
+    if tolerance_m is None:
+        tolerance_m = getattr(settings, 'TRUCK_TRACK_TOLERANCE_M', 5.0)
+    cutoff = (timezone.now() - timedelta(days=older_than_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    trucks = Truck.objects.all() if truck is None else Truck.objects.filter(pk=truck.pk)
+    examined = deleted = 0
+    for truck in trucks:
+        start = truck.track_compacted_until
+        truck_deleted = 0
+        while start is None or start < cutoff:
+            # Skip ahead over days without fixes
+            positions = truck.positions.all() if start is None else truck.positions.filter(timestamp__gte=start)
+            first = positions.order_by('timestamp').values_list('timestamp', flat=True).first()
+            if first is None or first >= cutoff:
+                break
+            start = first.replace(hour=0, minute=0, second=0, microsecond=0)
+            end = min(start + timedelta(days=1), cutoff)
+            points = list(
+                truck.positions.filter(timestamp__gte=start, timestamp__lt=end)
+                .order_by('timestamp').values_list('id', 'latitude', 'longitude')
+            )
+            kept = set(simplify([(lat, lon) for _, lat, lon in points], tolerance_m))
+            drop = [point[0] for index, point in enumerate(points) if index not in kept]
+            with transaction.atomic():
+                for offset in range(0, len(drop), 1000):
+                    TruckPosition.objects.filter(id__in=drop[offset:offset + 1000]).delete()
+                Truck.objects.filter(pk=truck.pk).update(track_compacted_until=end)
+            examined += len(points)
+            truck_deleted += len(drop)
+            start = end
+        if truck_deleted:
+            logger.info(f"🗜️ Truck {truck.truck_id}: {truck_deleted} fixes removed up to {start:%Y-%m-%d}")
+        deleted += truck_deleted
+    return examined, deleted
@@ -10,6 +10,10 @@ router.register(r'trucks', views.TruckViewSet)
 router.register(r'dumping-spots', views.DumpingSpotViewSet)
 router.register(r'roles', views.RoleViewSet)
 router.register(r'sensor-data', views.SensorDataViewSet)
+router.register(r'sensors/latest', views.SensorLatestViewSet, basename='sensor-latest')
+router.register(r'sensor-alerts', views.SensorAlertViewSet)
+router.register(r'collection-events', views.CollectionEventViewSet)
+router.register(r'geofence-events', views.GeofenceEventViewSet)
 router.register(r'cameras', views.CameraViewSet)
 router.register(r'camera-images', views.CameraImageViewSet)
 
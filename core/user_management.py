@@ -6,10 +6,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_protect
-from django.core.cache import cache
-from django.utils import timezone
 from datetime import timedelta
 from .models import Role
+from .login_throttle import login_throttle
+from .login_audit import login_audit
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -32,7 +32,7 @@ def user_dashboard(request):
     staff_users = users.filter(is_staff=True).count()
     
     # Get recent login attempts
-    recent_logins = cache.get('recent_logins', [])
+    recent_logins, _ = login_audit.page(limit=10)
     
     context = {
         'users': users,
@@ -94,8 +94,7 @@ def reset_user_password(request, user_id):
         user.save()
         
         # Clear any account locks
-        cache.delete(f'user_attempts:{user.username}')
-        cache.delete(f'account_locked:{user.username}')
+        login_throttle.reset(username=user.username)
         
         logger.info(f"Password reset for user {user.username} by {request.user.username}")
         
@@ -124,8 +123,7 @@ def unlock_user_account(request, user_id):
         user = get_object_or_404(User, id=user_id)
         
         # Clear account locks
-        cache.delete(f'user_attempts:{user.username}')
-        cache.delete(f'account_locked:{user.username}')
+        login_throttle.reset(username=user.username)
         
         logger.info(f"Account unlocked for user {user.username} by {request.user.username}")
         
@@ -147,22 +145,33 @@ def unlock_user_account(request, user_id):
 @user_passes_test(is_admin)
 def user_activity_log(request):
     """View user activity log"""
-    # Get recent login attempts from cache
-    recent_logins = cache.get('recent_logins', [])
+    # Login attempts, newest first, filtered by ?username=, ?ip= and ?result=success|failed
+    filters = {
+        'username': request.GET.get('username', '').strip(),
+        'ip': request.GET.get('ip', '').strip(),
+        'result': request.GET.get('result', ''),
+    }
+    success = {'success': True, 'failed': False}.get(filters['result'])
+    try:
+        before = int(request.GET.get('before', 0)) or None
+    except ValueError:
+        before = None
+    recent_logins, next_before = login_audit.page(
+        username=filters['username'], ip_address=filters['ip'], success=success, before=before
+    )
     
-    # Get failed login attempts
-    failed_attempts = []
-    for key in cache.keys('*attempts*'):
-        attempts = cache.get(key)
-        if attempts:
-            failed_attempts.append({
-                'identifier': key,
-                'attempts': attempts
-            })
+    # IPs and usernames with failed attempts in the throttle window, from its index
+    failed_attempts, untracked_count = login_throttle.tracked()
+    tracked_count = len(failed_attempts)
+    failed_attempts = failed_attempts[:200]
     
     context = {
         'recent_logins': recent_logins,
+        'next_before': next_before,
+        'filters': filters,
         'failed_attempts': failed_attempts,
+        'tracked_count': tracked_count,
+        'untracked_count': untracked_count,
     }
     
     return render(request, 'admin/user_activity_log.html', context)
@@ -178,8 +187,7 @@ def clear_ip_block(request):
         
         if ip_address:
             # Clear IP blocks
-            cache.delete(f'ip_attempts:{ip_address}')
-            cache.delete(f'ip_blocked:{ip_address}')
+            login_throttle.reset(ip=ip_address)
             
             logger.info(f"IP block cleared for {ip_address} by {request.user.username}")
             
@@ -204,19 +212,4 @@ def clear_ip_block(request):
 
 def log_login_attempt(username, ip_address, success=True):
     """Log login attempt"""
-    log_entry = {
-        'username': username,
-        'ip_address': ip_address,
-        'success': success,
-        'timestamp': timezone.now().isoformat(),
-    }
-    
-    # Store in cache (last 100 attempts)
-    recent_logins = cache.get('recent_logins', [])
-    recent_logins.append(log_entry)
-    
-    # Keep only last 100 entries
-    if len(recent_logins) > 100:
-        recent_logins = recent_logins[-100:]
-    
-    cache.set('recent_logins', recent_logins, 86400)  # 24 hours
+    login_audit.record(username, ip_address, success)
@@ -1,28 +1,54 @@
 import logging
+import mimetypes
 from rest_framework import status
-from rest_framework.decorators import api_view, throttle_classes, permission_classes
+from rest_framework.decorators import api_view, throttle_classes, permission_classes, action
 from rest_framework.response import Response
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from django.conf import settings
 from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.exceptions import ParseError
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import DatabaseError
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Max, Q
+from django.http import FileResponse, Http404
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.utils import timezone
-from .models import Bin, DumpingSpot, Truck, Role, SensorData, Camera, CameraImage
+from django.utils.dateparse import parse_datetime
+from .models import Bin, DumpingSpot, DumpingSpotLoad, Truck, TruckPosition, GeofenceEvent, Role, SensorData, SensorLatest, SensorAlert, CollectionEvent, Camera, CameraImage
 from .serializers import (
-    BinSerializer, DumpingSpotSerializer, TruckSerializer,
-    RoleSerializer, SensorDataSerializer, CameraSerializer, CameraImageSerializer
+    BinSerializer, DumpingSpotSerializer, TruckSerializer, TruckPositionSerializer, GeofenceEventSerializer,
+    RoleSerializer, SensorDataSerializer, SensorLatestSerializer, SensorAlertSerializer, CollectionEventSerializer,
+    CameraSerializer, CameraImageSerializer
 )
+from .streaming_upload import receive_stream, receive_chunk, UploadError, UploadOffsetMismatch
+from .frame_gate import gating_metrics
+from .camera_ingest import ingest_frame, DROPPED, DUPLICATE
+from .image_retention import open_original
+from .sensor_anomaly import ingest_readings
+from .truck_tracks import record_positions, latest_positions, forget_latest, load_track
+from .geofence import open_visits
+from .dumping_loads import unload_collections, fill_rates, forecast_overflows
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+def parse_timestamp(value, param):
+    """ISO 8601 timestamp from a request, or a 400 for malformed and out-of-range values alike"""
+    try:
+        timestamp = parse_datetime(str(value))
+    except ValueError:
+        # Well-formed but impossible, such as 2024-13-45T00:00:00
+        timestamp = None
+    if timestamp is None:
+        raise ParseError(f'{param} must be an ISO 8601 timestamp')
+    return timestamp
+
 # Rate limiting classes
 class BinRateThrottle(UserRateThrottle):
     rate = '10000/hour'  # Increased for dashboard access
@@ -37,6 +63,35 @@ class SensorDataRateThrottle(UserRateThrottle):
 class AnonSensorDataRateThrottle(AnonRateThrottle):
     rate = '500/hour'   # Allow 500 requests per hour for anonymous sensors
 
+class CameraImageCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the camera gallery.
+    Stable under concurrent uploads and served straight from the
+    (camera, created_at) / (analysis_type, created_at) indexes.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    # Allowed values for the ?sort= query parameter
+    SORT_ORDERINGS = {
+        'newest': ('-created_at', '-id'),
+        'oldest': ('created_at', 'id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        sort = request.query_params.get('sort', 'newest')
+        return self.SORT_ORDERINGS.get(sort, self.ordering)
+
+class SensorDataPagination(PageNumberPagination):
+    """
+    Page size can be raised so incremental consumers catch up in a few requests
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
 @api_view(['GET', 'POST'])
 @throttle_classes([BinRateThrottle, AnonBinRateThrottle])
 @permission_classes([AllowAny])  # Allow unauthenticated access for dashboard
@@ -84,10 +139,71 @@ class DumpingSpotViewSet(viewsets.ModelViewSet):
         Allow unauthenticated access for GET requests (dashboard access)
         Require authentication for POST, PUT, DELETE operations
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'forecast', 'stats']:
             return []  # No permission required for read operations
         return [IsAuthenticated()]  # Authentication required for create/update/delete operations
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            # One grouped query for the overflow forecast of every listed spot
+            context['fill_rates'] = fill_rates()
+        return context
+
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        """When each dumping spot overflows at its recent fill rate, soonest first"""
+        return Response(forecast_overflows())
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Capacity, content and fill of all dumping spots, from the stored fill levels"""
+        from datetime import timedelta
+        from django.db.models import Avg, F, Sum
+        totals = DumpingSpot.objects.aggregate(
+            total_spots=Count('id'),
+            total_capacity=Sum('total_capacity'),
+            total_content=Sum(F('organic_content') + F('plastic_content') + F('metal_content')),
+            average_fill_level=Avg('fill_level'),
+            full_spots=Count('id', filter=Q(fill_level__gte=80)),
+            overflowing_spots=Count('id', filter=Q(fill_level__gte=100)),
+        )
+        unloaded = DumpingSpotLoad.objects.filter(unloaded_at__gte=timezone.now() - timedelta(hours=24)).aggregate(
+            unloads=Count('id'), volume=Sum('volume')
+        )
+        projections = forecast_overflows()
+        upcoming = projections[0] if projections and projections[0]['overflow_at'] is not None else None
+        return Response({
+            **{key: value or 0 for key, value in totals.items()},
+            'unloads_last_24h': unloaded['unloads'],
+            'volume_unloaded_last_24h': unloaded['volume'] or 0,
+            'next_overflow': {key: upcoming[key] for key in ('spot_id', 'overflow_at', 'days_to_overflow')} if upcoming else None,
+        })
+
+    @action(detail=True, methods=['post'])
+    def unload(self, request, pk=None):
+        """A truck unloads here: {"truck_id", "timestamp" (optional)}; accounts its collections not yet unloaded"""
+        from datetime import timedelta
+        spot = self.get_object()
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Expected an object with a truck_id'}, status=status.HTTP_400_BAD_REQUEST)
+        truck = Truck.objects.filter(truck_id=request.data.get('truck_id')).first()
+        if truck is None:
+            return Response({'error': 'A valid truck_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        at = timezone.now()
+        if request.data.get('timestamp'):
+            at = parse_timestamp(request.data['timestamp'], 'timestamp')
+        lookback = timedelta(hours=getattr(settings, 'DUMPING_UNLOAD_LOOKBACK_HOURS', 24))
+        collections = CollectionEvent.objects.filter(truck=truck, collected_at__gte=at - lookback, collected_at__lte=at)
+        loads = unload_collections(spot, collections, truck=truck, at=at)
+        spot.refresh_from_db()
+        return Response({
+            'spot_id': spot.spot_id,
+            'collections': len(loads),
+            'volume': sum(load.volume for load in loads),
+            'fill_level': spot.fill_level,
+        }, status=status.HTTP_201_CREATED if loads else status.HTTP_200_OK)
+
     def perform_create(self, serializer):
         serializer.save()
         logger.info(f"Dumping spot created: {serializer.instance.spot_id}")
@@ -110,7 +226,7 @@ class TruckViewSet(viewsets.ModelViewSet):
         Allow unauthenticated access for GET requests (dashboard access)
         Require authentication for POST, PUT, DELETE operations
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'track'] or (self.action == 'positions' and self.request.method == 'GET'):
             return []  # No permission required for read operations
         return [IsAuthenticated()]  # Authentication required for create/update/delete operations
 
@@ -119,8 +235,66 @@ class TruckViewSet(viewsets.ModelViewSet):
         logger.info(f"Truck created: {serializer.instance.truck_id}")
 
     def perform_update(self, serializer):
+        previous = (serializer.instance.current_latitude, serializer.instance.current_longitude)
         serializer.save()
-        logger.info(f"Truck updated: {serializer.instance.truck_id}")
+        truck = serializer.instance
+        if (truck.current_latitude, truck.current_longitude) != previous:
+            # Keep the track complete for clients that still move trucks with PUT/PATCH
+            TruckPosition.objects.get_or_create(
+                truck=truck, timestamp=truck.last_updated,
+                defaults={'latitude': truck.current_latitude, 'longitude': truck.current_longitude}
+            )
+        forget_latest(truck.truck_id)
+        logger.info(f"Truck updated: {truck.truck_id}")
+
+    @action(detail=False, methods=['get', 'post'])
+    def positions(self, request):
+        """
+        GET: latest position of every truck (served from the cache).
+        POST: batch of GPS fixes, {"positions": [{"truck_id", "timestamp", "latitude", "longitude", ...}]}
+        """
+        if request.method == 'GET':
+            return Response(latest_positions())
+        
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Expected an object with a "positions" list'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = TruckPositionSerializer(data=request.data.get('positions', []), many=True)
+        serializer.is_valid(raise_exception=True)
+        fixes = serializer.validated_data
+        trucks = Truck.objects.in_bulk({fix['truck_id'] for fix in fixes}, field_name='truck_id')
+        unknown = sorted({fix['truck_id'] for fix in fixes} - set(trucks))
+        if unknown:
+            return Response({'error': f"Unknown truck(s): {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+        for fix in fixes:
+            fix['truck'] = trucks[fix.pop('truck_id')]
+        return Response(record_positions(fixes), status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def track(self, request, pk=None):
+        """Fixes of the truck between ?from= and ?to= (default: last 24 hours), simplified to ?tolerance= meters"""
+        from datetime import timedelta
+        truck = self.get_object()
+        end = self.parse_time('to', timezone.now())
+        start = self.parse_time('from', end - timedelta(hours=24))
+        try:
+            tolerance = float(request.query_params.get('tolerance', 0))
+        except ValueError:
+            raise ParseError('tolerance must be a number of meters')
+        points, total = load_track(truck, start, end, tolerance)
+        return Response({
+            'truck_id': truck.truck_id,
+            'from': start,
+            'to': end,
+            'tolerance': tolerance,
+            'total_points': total,
+            'points': [[timestamp, latitude, longitude] for timestamp, latitude, longitude in points],
+        })
+
+    def parse_time(self, param, default):
+        value = self.request.query_params.get(param, None)
+        if not value:
+            return default
+        return parse_timestamp(value, param)
 
     def perform_destroy(self, instance):
         truck_id = instance.truck_id
@@ -178,6 +352,7 @@ class SensorDataViewSet(viewsets.ModelViewSet):
     queryset = SensorData.objects.all()
     serializer_class = SensorDataSerializer
     throttle_classes = [SensorDataRateThrottle, AnonSensorDataRateThrottle]
+    pagination_class = SensorDataPagination
     
     def get_permissions(self):
         """
@@ -201,19 +376,27 @@ class SensorDataViewSet(viewsets.ModelViewSet):
                    f"Fill level: {sensor_data.get('fill_level')}%, "
                    f"Location: ({sensor_data.get('latitude')}, {sensor_data.get('longitude')})")
         
-        # Save the sensor data
-        serializer.save()
-        
-        # Update the associated bin if it exists
+        # The reading, the state it feeds and its bin are stored together or not at all,
+        # so a failed request leaves nothing behind for the device's retry to duplicate
+        with transaction.atomic():
+            serializer.save()
+            # Latest per-sensor state and anomaly alerts
+            ingest_readings([serializer.instance])
+            self.update_bin(bin_id, sensor_id, sensor_data)
+
+    def update_bin(self, bin_id, sensor_id, sensor_data):
+        """Update the associated bin if it exists"""
         try:
-            bin_instance = Bin.objects.get(bin_id=bin_id)
-            bin_instance.fill_level = sensor_data.get('fill_level')
-            bin_instance.latitude = sensor_data.get('latitude')
-            bin_instance.longitude = sensor_data.get('longitude')
-            bin_instance.organic_percentage = sensor_data.get('organic_percentage')
-            bin_instance.plastic_percentage = sensor_data.get('plastic_percentage')
-            bin_instance.metal_percentage = sensor_data.get('metal_percentage')
-            bin_instance.save()
+            # Savepoint: a bin that rejects the values does not undo the reading
+            with transaction.atomic():
+                bin_instance = Bin.objects.get(bin_id=bin_id)
+                bin_instance.fill_level = sensor_data.get('fill_level')
+                bin_instance.latitude = sensor_data.get('latitude')
+                bin_instance.longitude = sensor_data.get('longitude')
+                bin_instance.organic_percentage = sensor_data.get('organic_percentage')
+                bin_instance.plastic_percentage = sensor_data.get('plastic_percentage')
+                bin_instance.metal_percentage = sensor_data.get('metal_percentage')
+                bin_instance.save()
             
             logger.info(f"✅ Bin {bin_id} updated with sensor data from {sensor_id}")
             
@@ -254,13 +437,149 @@ class SensorDataViewSet(viewsets.ModelViewSet):
         # Filter by recent data (last 24 hours)
         recent = self.request.query_params.get('recent', None)
         if recent == 'true':
-            from django.utils import timezone
             from datetime import timedelta
             yesterday = timezone.now() - timedelta(hours=24)
             queryset = queryset.filter(timestamp__gte=yesterday)
         
+        # Incremental consumption: readings after a (timestamp, id) watermark, oldest first
+        after_timestamp = self.request.query_params.get('after_timestamp', None)
+        if after_timestamp:
+            watermark = parse_timestamp(after_timestamp, 'after_timestamp')
+            if timezone.is_naive(watermark):
+                watermark = timezone.make_aware(watermark)
+            try:
+                after_id = int(self.request.query_params.get('after_id', 0))
+            except ValueError:
+                raise ParseError('after_id must be an integer')
+            queryset = queryset.filter(
+                Q(timestamp__gt=watermark) | Q(timestamp=watermark, id__gt=after_id)
+            )
+            return queryset.order_by('timestamp', 'id')
+        
         return queryset.order_by('-timestamp') 
 
+class SensorLatestViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Latest reading of every sensor, one row per sensor
+    """
+    queryset = SensorLatest.objects.all()
+    serializer_class = SensorLatestSerializer
+    throttle_classes = [SensorDataRateThrottle, AnonSensorDataRateThrottle]
+    pagination_class = SensorDataPagination
+    permission_classes = [AllowAny]  # Dashboard access, like the sensor data list
+    lookup_field = 'sensor_id'
+
+    def get_queryset(self):
+        queryset = SensorLatest.objects.all()
+        
+        bin_id = self.request.query_params.get('bin_id', None)
+        if bin_id:
+            queryset = queryset.filter(bin_id=bin_id)
+        
+        status = self.request.query_params.get('status', None)
+        if status:
+            queryset = queryset.filter(sensor_status=status)
+        
+        # Sensors that have not reported for the given number of minutes
+        silent_minutes = self.request.query_params.get('silent_minutes', None)
+        if silent_minutes:
+            from datetime import timedelta
+            try:
+                cutoff = timezone.now() - timedelta(minutes=float(silent_minutes))
+            except (ValueError, OverflowError):
+                raise ParseError('silent_minutes must be a number')
+            queryset = queryset.filter(last_seen__lt=cutoff)
+        
+        return queryset.order_by('sensor_id')
+
+class SensorAlertViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Anomalies flagged by the ingestion-time detector (core.sensor_anomaly)
+    """
+    queryset = SensorAlert.objects.all()
+    serializer_class = SensorAlertSerializer
+    throttle_classes = [SensorDataRateThrottle, AnonSensorDataRateThrottle]
+    pagination_class = SensorDataPagination
+    permission_classes = [AllowAny]  # Dashboard access, like the sensor data list
+
+    def get_queryset(self):
+        queryset = SensorAlert.objects.all()
+        
+        for param, field in (('sensor_id', 'sensor_id'), ('bin_id', 'bin_id'), ('kind', 'kind'), ('severity', 'severity')):
+            value = self.request.query_params.get(param, None)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        
+        # Open alerts only (what the dashboard shows)
+        active = self.request.query_params.get('active', None)
+        if active == 'true':
+            queryset = queryset.filter(resolved_at__isnull=True)
+        elif active == 'false':
+            queryset = queryset.filter(resolved_at__isnull=False)
+        
+        return queryset.order_by('-created_at', '-id')
+
+class CollectionEventViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Bin collections detected from fill drops in the sensor data (core.collection_events)
+    """
+    queryset = CollectionEvent.objects.all()
+    serializer_class = CollectionEventSerializer
+    throttle_classes = [SensorDataRateThrottle, AnonSensorDataRateThrottle]
+    pagination_class = SensorDataPagination
+    permission_classes = [AllowAny]  # Dashboard access, like the sensor data list
+
+    def get_queryset(self):
+        queryset = CollectionEvent.objects.select_related('truck')
+        
+        bin_id = self.request.query_params.get('bin_id', None)
+        if bin_id:
+            queryset = queryset.filter(bin_id=bin_id)
+        
+        truck_id = self.request.query_params.get('truck_id', None)
+        if truck_id:
+            queryset = queryset.filter(truck__truck_id=truck_id)
+        
+        for param, lookup in (('since', 'collected_at__gte'), ('until', 'collected_at__lt')):
+            value = self.request.query_params.get(param, None)
+            if value:
+                queryset = queryset.filter(**{lookup: parse_timestamp(value, param)})
+        
+        return queryset.order_by('-collected_at', '-id')
+
+class GeofenceEventViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Trucks entering, staying at and leaving bin and dumping spot fences (core.geofence)
+    """
+    queryset = GeofenceEvent.objects.all()
+    serializer_class = GeofenceEventSerializer
+    throttle_classes = [SensorDataRateThrottle, AnonSensorDataRateThrottle]
+    pagination_class = SensorDataPagination
+    permission_classes = [AllowAny]  # Dashboard access, like the sensor data list
+
+    def get_queryset(self):
+        queryset = GeofenceEvent.objects.select_related('truck')
+        
+        for param, field in (('truck_id', 'truck__truck_id'), ('fence_type', 'fence_type'),
+                             ('fence_id', 'fence_id'), ('event', 'event')):
+            value = self.request.query_params.get(param, None)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        
+        since = self.request.query_params.get('since', None)
+        if since:
+            queryset = queryset.filter(timestamp__gte=parse_timestamp(since, 'since'))
+        
+        return queryset.order_by('-timestamp', '-id')
+
+    @action(detail=False, methods=['get'])
+    def present(self, request):
+        """Which truck is currently inside which fence"""
+        return Response([
+            {'truck_id': truck_id, 'fence_type': fence_type, 'fence_id': fence_id, 'entered_at': entered_at}
+            for truck_id, fence_type, fence_id, entered_at in open_visits()
+        ])
+
 class CameraViewSet(viewsets.ModelViewSet):
     """ViewSet for Camera management"""
     queryset = Camera.objects.all()
@@ -270,7 +589,7 @@ class CameraViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Allow unauthenticated access for GET operations"""
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'gating_metrics']:
             return [AllowAny()]
         return super().get_permissions()
     
@@ -280,7 +599,19 @@ class CameraViewSet(viewsets.ModelViewSet):
         status = self.request.query_params.get('status', None)
         if status:
             queryset = queryset.filter(status=status)
+        if self.action in ['list', 'retrieve']:
+            # Image totals come from one grouped query instead of two queries per camera
+            queryset = queryset.annotate(
+                image_count=Count('images'),
+                last_image_at=Max('images__created_at')
+            ).order_by('-created_at')  # Meta.ordering is not applied to grouped queries
         return queryset
+    
+    @action(detail=False, methods=['get'], url_path='gating-metrics')
+    def gating_metrics(self, request):
+        """Kept vs dropped frame counters from frame-change gating"""
+        camera_ids = list(self.get_queryset().values_list('camera_id', flat=True))
+        return Response(gating_metrics(camera_ids))
 
 class CameraImageViewSet(viewsets.ModelViewSet):
     """ViewSet for CameraImage management"""
@@ -289,12 +620,68 @@ class CameraImageViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     throttle_classes = [UserRateThrottle]
     
+    pagination_class = CameraImageCursorPagination
+    
     def get_permissions(self):
         """Allow unauthenticated access for image upload and viewing"""
-        if self.action in ['list', 'retrieve', 'create']:
+        if self.action in ['list', 'retrieve', 'create', 'file']:
             return [AllowAny()]
         return super().get_permissions()
     
+    def get_queryset(self):
+        """Filter images by various parameters"""
+        # camera_name/camera_type are serialized for every row
+        queryset = CameraImage.objects.select_related('camera')
+        
+        # Filter by camera
+        camera_id = self.request.query_params.get('camera_id', None)
+        if camera_id:
+            queryset = queryset.filter(camera__camera_id=camera_id)
+        
+        # Filter by analysis type
+        analysis_type = self.request.query_params.get('analysis_type', None)
+        if analysis_type:
+            queryset = queryset.filter(analysis_type=analysis_type)
+        
+        # Filter by date range (half-open range on created_at so the
+        # composite indexes can be used instead of a __date cast)
+        from datetime import datetime, timedelta
+        date_from = self.request.query_params.get('date_from', None)
+        if date_from:
+            try:
+                date_obj = datetime.strptime(date_from, '%Y-%m-%d')
+                queryset = queryset.filter(created_at__gte=timezone.make_aware(date_obj))
+            except ValueError:
+                pass
+        
+        date_to = self.request.query_params.get('date_to', None)
+        if date_to:
+            try:
+                date_obj = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
+                queryset = queryset.filter(created_at__lt=timezone.make_aware(date_obj))
+            except ValueError:
+                pass
+        
+        # Filter by analyzed status
+        is_analyzed = self.request.query_params.get('is_analyzed', None)
+        if is_analyzed is not None:
+            is_analyzed_bool = is_analyzed.lower() == 'true'
+            queryset = queryset.filter(is_analyzed=is_analyzed_bool)
+        
+        return queryset
+    
+    def perform_create(self, serializer):
+        """Handle image upload and processing"""
+        # Save the image
+        image_instance = serializer.save()
+        
+        logger.info(f"Camera image uploaded: {image_instance.image.name} ({image_instance.get_file_size_mb()} MB)")
+        
+        # Waste classification runs out of band: `manage.py classify_camera_images`
+        # picks up images with is_analyzed=False in batches
+        
+        return image_instance
+    
     def create(self, request, *args, **kwargs):
         """Custom create method to handle ESP32-CAM uploads"""
         # Get camera info from headers
@@ -324,6 +711,19 @@ class CameraImageViewSet(viewsets.ModelViewSet):
         
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+    
+    @action(detail=True, methods=['get'])
+    def file(self, request, pk=None):
+        """Stream the original image, including originals packed into day archives"""
+        camera_image = self.get_object()
+        if not camera_image.image:
+            raise Http404('Image has no file')
+        try:
+            stream = open_original(camera_image)
+        except (FileNotFoundError, KeyError):
+            raise Http404('Image file not found')
+        content_type = mimetypes.guess_type(camera_image.image.name)[0] or 'image/jpeg'
+        return FileResponse(stream, content_type=content_type)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -351,61 +751,69 @@ def esp32_cam_upload(request):
             }
         )
         
-        # Get raw image data from request body
-        image_data = request.body
+        # The body is streamed to disk, so check its declared size before reading anything
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
         
-        if not image_data:
+        if not content_length:
             return Response(
                 {'error': 'No image data received'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create a temporary file-like object
-        from django.core.files.base import ContentFile
-        from django.core.files.storage import default_storage
+        file_name = f'image_{camera_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.jpg'
         
-        # Create the image file
-        image_file = ContentFile(image_data, name=f'image_{camera_id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.jpg')
-        
-        # Create CameraImage instance
-        camera_image = CameraImage.objects.create(
-            camera=camera,
-            image=image_file,
-            analysis_type=analysis_type,
-            metadata={
-                'camera_id': camera_id,
-                'camera_type': camera_type,
-                'upload_method': 'ESP32-CAM',
-                'file_size': len(image_data)
-            }
-        )
+        try:
+            upload_id = request.headers.get('X-Upload-Id')
+            if upload_id:
+                # Resumable upload: the frame arrives in Content-Range chunks
+                image_file, info = receive_chunk(
+                    request.stream, content_length, camera_id, upload_id,
+                    request.headers.get('Content-Range', ''), file_name
+                )
+                if image_file is None:
+                    return Response(
+                        {'upload_id': upload_id, 'offset': info},
+                        status=status.HTTP_202_ACCEPTED,
+                        headers={'Upload-Offset': str(info)}
+                    )
+            else:
+                image_file, info = receive_stream(request.stream, content_length, file_name)
+        except UploadOffsetMismatch as e:
+            return Response(
+                {'error': str(e), 'offset': e.offset},
+                status=e.status_code,
+                headers={'Upload-Offset': str(e.offset)}
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status_code)
         
-        # Generate thumbnail
         try:
-            from PIL import Image
-            import io
-            
-            # Open the image
-            img = Image.open(io.BytesIO(image_data))
-            
-            # Create thumbnail
-            img.thumbnail((150, 150), Image.Resampling.LANCZOS)
-            
-            # Save thumbnail
-            thumb_io = io.BytesIO()
-            img.save(thumb_io, format='JPEG', quality=85)
-            thumb_io.seek(0)
-            
-            # Create thumbnail file
-            thumb_file = ContentFile(thumb_io.getvalue(), name=f'thumb_{camera_image.id}.jpg')
-            camera_image.thumbnail = thumb_file
-            camera_image.save()
-            
-        except Exception as e:
-            logger.warning(f"Failed to generate thumbnail for image {camera_image.id}: {e}")
+            result = ingest_frame(
+                camera, image_file, info,
+                analysis_type=analysis_type,
+                metadata={
+                    'camera_id': camera_id,
+                    'camera_type': camera_type,
+                    'upload_method': 'ESP32-CAM',
+                }
+            )
+        finally:
+            image_file.close()
+        
+        if result.outcome == DROPPED:
+            return Response(
+                {'dropped': True, 'reason': 'Scene unchanged', **result.gate.as_metadata()},
+                status=status.HTTP_200_OK
+            )
+        if result.outcome == DUPLICATE:
+            serializer = CameraImageSerializer(result.camera_image)
+            return Response({**serializer.data, 'duplicate': True}, status=status.HTTP_200_OK)
         
         # Return success response
-        serializer = CameraImageSerializer(camera_image)
+        serializer = CameraImageSerializer(result.camera_image)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
         
     except Exception as e:
@@ -414,62 +822,3 @@ def esp32_cam_upload(request):
             {'error': f'Upload failed: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
-    
-    def get_queryset(self):
-        """Filter images by various parameters"""
-        queryset = CameraImage.objects.all()
-        
-        # Filter by camera
-        camera_id = self.request.query_params.get('camera_id', None)
-        if camera_id:
-            queryset = queryset.filter(camera__camera_id=camera_id)
-        
-        # Filter by analysis type
-        analysis_type = self.request.query_params.get('analysis_type', None)
-        if analysis_type:
-            queryset = queryset.filter(analysis_type=analysis_type)
-        
-        # Filter by date range
-        date_from = self.request.query_params.get('date_from', None)
-        if date_from:
-            try:
-                from datetime import datetime
-                date_obj = datetime.strptime(date_from, '%Y-%m-%d')
-                queryset = queryset.filter(created_at__date__gte=date_obj.date())
-            except ValueError:
-                pass
-        
-        date_to = self.request.query_params.get('date_to', None)
-        if date_to:
-            try:
-                from datetime import datetime
-                date_obj = datetime.strptime(date_to, '%Y-%m-%d')
-                queryset = queryset.filter(created_at__date__lte=date_obj.date())
-            except ValueError:
-                pass
-        
-        # Filter by analyzed status
-        is_analyzed = self.request.query_params.get('is_analyzed', None)
-        if is_analyzed is not None:
-            is_analyzed_bool = is_analyzed.lower() == 'true'
-            queryset = queryset.filter(is_analyzed=is_analyzed_bool)
-        
-        return queryset
-    
-    def perform_create(self, serializer):
-        """Handle image upload and processing"""
-        # Save the image
-        image_instance = serializer.save()
-        
-        # Log the upload
-        print(f"📸 New image uploaded: {image_instance.image.name}")
-        print(f"📊 Image size: {image_instance.get_file_size_mb()} MB")
-        print(f"📅 Upload time: {image_instance.created_at}")
-        
-        # TODO: Add image analysis processing here
-        # This could include:
-        # - Waste classification using AI
-        # - Object detection
-        # - Quality assessment
-        
-        return image_instance 
\ No newline at end of file
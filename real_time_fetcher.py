@@ -34,12 +34,13 @@ class RealTimeSensorFetcher:
         self.sensor_data_url = f"{api_base_url}/api/sensor-data/"
         self.bin_data_url = f"{api_base_url}/api/bin-data/"
         self.session = requests.Session()
-        self.session.timeout = 5
+        # requests ignores a session-level timeout, so it is passed on every call
+        self.timeout = 5
         
     def fetch_sensor_data(self):
         """Fetch latest sensor data from the API"""
         try:
-            response = self.session.get(self.sensor_data_url)
+            response = self.session.get(self.sensor_data_url, timeout=self.timeout)
             if response.status_code == 200:
                 data = response.json()
                 return data.get('results', [])
@@ -53,7 +54,7 @@ class RealTimeSensorFetcher:
     def fetch_bin_data(self):
         """Fetch current bin data from the API"""
         try:
-            response = self.session.get(self.bin_data_url)
+            response = self.session.get(self.bin_data_url, timeout=self.timeout)
             if response.status_code == 200:
                 data = response.json()
                 return data
@@ -12,6 +12,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 import threading
 
+from core.alert_rules import build_engine, default_trackers
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -29,9 +31,19 @@ class RealTimeBinUpdater:
     and updates the local database every second.
     """
     
-    def __init__(self, api_base_url: str = "http://localhost:8000/api", update_interval: float = 1.0):
+    def __init__(self, api_base_url: str = "http://localhost:8000/api", update_interval: float = 1.0, source=None,
+                 engine=None, context_interval: float = 30.0):
         self.api_base_url = api_base_url.rstrip('/')
+        # Optional object with fetch_bins() (see core.sensor_sources) used instead of the HTTP API
+        self.source = source
         self.update_interval = update_interval
+        
+        # Alert rules run on changed bins, dumping spots and sensors only (see core.alert_rules)
+        self.engine = engine or build_engine()
+        self.trackers = default_trackers()
+        # Dumping spots and sensor states change slowly and are polled less often than bins
+        self.context_interval = context_interval
+        self.last_context_update = None
         self.running = False
         self.update_thread = None
         self.session = requests.Session()
@@ -43,12 +55,16 @@ class RealTimeBinUpdater:
         # API endpoints
         self.bins_endpoint = f"{self.api_base_url}/bin-data/"
         self.sensor_data_endpoint = f"{self.api_base_url}/sensor-data/"
+        self.dumping_spots_endpoint = f"{self.api_base_url}/dumping-spots/"
+        self.sensor_states_endpoint = f"{self.api_base_url}/sensors/latest/"
         
         # Statistics
         self.stats = {
             'total_updates': 0,
             'successful_updates': 0,
             'failed_updates': 0,
+            'changed_entities': 0,
+            'alerts': 0,
             'last_update': None,
             'start_time': datetime.now()
         }
@@ -103,25 +119,19 @@ class RealTimeBinUpdater:
     def _update_all_bins(self):
         """Fetch all bins from API and update local data"""
         try:
+            if self.context_due():
+                self._update_context()
+            
+            if self.source is not None:
+                self.process_bins(self.source.fetch_bins())
+                return
+            
             # Fetch current bin data
             response = self.session.get(self.bins_endpoint, timeout=5)
             
             if response.status_code == 200:
                 bins_data = response.json()
-                self.stats['total_updates'] += 1
-                self.stats['last_update'] = datetime.now()
-                
-                logger.info(f"📡 Fetched {len(bins_data)} bins from API")
-                
-                # Process each bin
-                for bin_data in bins_data:
-                    self._process_bin_update(bin_data)
-                
-                self.stats['successful_updates'] += 1
-                
-                # Log statistics every 10 updates
-                if self.stats['total_updates'] % 10 == 0:
-                    self._log_statistics()
+                self.process_bins(bins_data)
                     
             else:
                 logger.error(f"❌ API request failed: {response.status_code} - {response.text}")
@@ -134,25 +144,64 @@ class RealTimeBinUpdater:
             logger.error(f"❌ Unexpected error: {str(e)}")
             self.stats['failed_updates'] += 1
     
-    def _process_bin_update(self, bin_data: Dict):
-        """Process individual bin update"""
-        try:
-            bin_id = bin_data.get('bin_id')
-            fill_level = bin_data.get('fill_level', 0)
-            latitude = bin_data.get('latitude', 0)
-            longitude = bin_data.get('longitude', 0)
-            
-            # Log significant changes
-            if fill_level > 80:
-                logger.warning(f"⚠️ Bin {bin_id} is {fill_level}% full!")
-            elif fill_level > 60:
-                logger.info(f"📦 Bin {bin_id} is {fill_level}% full")
-            
-            # You can add additional processing here
-            # For example, sending notifications, updating dashboards, etc.
-            
-        except Exception as e:
-            logger.error(f"❌ Error processing bin {bin_data.get('bin_id', 'Unknown')}: {str(e)}")
+    def process_bins(self, bins_data: List[Dict]):
+        """Process one fetched batch of bins (also used by the asyncio service runner)"""
+        self.stats['total_updates'] += 1
+        self.stats['last_update'] = datetime.now()
+        
+        changed = self._evaluate('bin', bins_data)
+        logger.debug(f"📡 Fetched {len(bins_data)} bins, {changed} changed")
+        
+        self.stats['successful_updates'] += 1
+        
+        # Log statistics every 10 updates
+        if self.stats['total_updates'] % 10 == 0:
+            self._log_statistics()
+    
+    def process_dumping_spots(self, spots_data: List[Dict]):
+        """Run the alert rules on dumping spots whose content changed"""
+        self._evaluate('dumping_spot', spots_data)
+    
+    def process_sensor_states(self, sensors_data: List[Dict]):
+        """Run the alert rules on sensors whose battery, signal or status changed"""
+        self._evaluate('sensor', sensors_data)
+    
+    def _evaluate(self, entity_type: str, rows: List[Dict]) -> int:
+        """Diff rows against the previous poll and evaluate the rules on the changed ones"""
+        events = self.trackers[entity_type].diff(rows)
+        alerts = self.engine.evaluate(events)
+        self.stats['changed_entities'] += len(events)
+        self.stats['alerts'] += len(alerts)
+        return len(events)
+    
+    def context_due(self) -> bool:
+        """Whether dumping spots and sensor states should be polled again"""
+        return self.last_context_update is None or time.time() - self.last_context_update >= self.context_interval
+    
+    def _update_context(self):
+        """Poll dumping spots and sensor states for the rules that watch them"""
+        self.last_context_update = time.time()
+        if self.source is not None:
+            self.process_dumping_spots(self.source.fetch_dumping_spots())
+            self.process_sensor_states(self.source.fetch_sensor_states())
+            return
+        self.process_dumping_spots(self._fetch_all(self.dumping_spots_endpoint))
+        self.process_sensor_states(self._fetch_all(self.sensor_states_endpoint))
+    
+    def _fetch_all(self, url: str) -> List[Dict]:
+        """Every row of a paginated list endpoint"""
+        rows = []
+        while url:
+            response = self.session.get(url, timeout=5)
+            if response.status_code != 200:
+                logger.error(f"❌ API request failed: {response.status_code} - {url}")
+                break
+            data = response.json()
+            if not isinstance(data, dict):
+                return rows + data
+            rows.extend(data.get('results', []))
+            url = data.get('next')
+        return rows
     
     def _log_statistics(self):
         """Log current statistics"""
@@ -164,6 +213,8 @@ class RealTimeBinUpdater:
         logger.info(f"   Successful: {self.stats['successful_updates']}")
         logger.info(f"   Failed: {self.stats['failed_updates']}")
         logger.info(f"   Success Rate: {success_rate:.1f}%")
+        logger.info(f"   Changed Entities: {self.stats['changed_entities']}")
+        logger.info(f"   Alerts: {self.stats['alerts']} ({self.engine.stats['suppressed']} suppressed as duplicates)")
         logger.info(f"   Uptime: {uptime}")
         logger.info(f"   Last Update: {self.stats['last_update']}")
     
@@ -184,6 +235,8 @@ def main():
                        help='Django API base URL')
     parser.add_argument('--interval', type=float, default=1.0,
                        help='Update interval in seconds')
+    parser.add_argument('--webhook-url', default=None,
+                       help='POST alerts as JSON to this URL as well as logging them')
     parser.add_argument('--log-level', default='INFO',
                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
                        help='Logging level')
@@ -196,7 +249,8 @@ def main():
     # Create and start updater
     updater = RealTimeBinUpdater(
         api_base_url=args.api_url,
-        update_interval=args.interval
+        update_interval=args.interval,
+        engine=build_engine(webhook_url=args.webhook_url)
     )
     
     try:
@@ -8,7 +8,9 @@ import json
 import altair as alt
 import pandas as pd
 import datetime as dt
-from dateutil import parser as date_parser
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
 
 # Configure Streamlit page
 st.set_page_config(
@@ -789,11 +791,122 @@ def get_trucks():
         return data
     return []
 
+def get_sensor_alerts():
+    """Fetch open sensor alerts (precomputed at ingestion) from the API"""
+    alerts = []
+    url = f"{API_BASE_URL}/sensor-alerts/"
+    params = {'active': 'true', 'page_size': 500}
+    try:
+        while url:
+            response = requests.get(url, params=params, timeout=10)
+            if response.status_code != 200:
+                break
+            data = response.json()
+            alerts.extend(data.get('results', []))
+            # The next link already carries the query
+            url, params = data.get('next'), None
+    except requests.exceptions.RequestException:
+        pass
+    return alerts
+
 def add_bin(bin_data):
     """Add a new bin via the API"""
     response = requests.post(f"{API_BASE_URL}/bin-data/", json=bin_data)
     return response.status_code == 201
 
+def get_cameras():
+    """Fetch all cameras from the API"""
+    try:
+        response = requests.get(f"{API_BASE_URL}/cameras/", timeout=10)
+    except requests.exceptions.RequestException:
+        return []
+    if response.status_code == 200:
+        data = response.json()
+        # Handle paginated response
+        if isinstance(data, dict) and 'results' in data:
+            return data['results']
+        return data
+    return []
+
+# Gallery sort labels mapped to the API's ?sort= values
+GALLERY_SORT_OPTIONS = {
+    "Newest": "newest",
+    "Oldest": "oldest",
+}
+
+# Upper bound on thumbnail bytes kept in memory by the dashboard process
+THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+class ThumbnailCache:
+    """Thread-safe LRU of thumbnail bytes, bounded by total size rather than item count"""
+    
+    def __init__(self, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+    
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self._entries[key] = data
+            self.current_bytes += len(data)
+            # Evict least recently used entries until we are back under budget
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+@st.cache_resource
+def get_thumbnail_cache():
+    """Process-wide thumbnail cache shared across reruns and sessions"""
+    return ThumbnailCache()
+
+def get_thumbnail_bytes(url):
+    """Return thumbnail bytes, downloading them only on a cache miss"""
+    cache = get_thumbnail_cache()
+    data = cache.get(url)
+    if data is not None:
+        return data
+    try:
+        response = requests.get(url, timeout=10)
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    cache.put(url, response.content)
+    return response.content
+
+def _extract_cursor(page_url):
+    """Pull the opaque cursor token out of a DRF next/previous link"""
+    if not page_url:
+        return None
+    return parse_qs(urlparse(page_url).query).get('cursor', [None])[0]
+
 
 
 def create_map(bins, dumping_spots, trucks, selected_bin=None, path=None, highlight_item=None, highlight_type=None):
@@ -1515,9 +1628,56 @@ def camera_gallery_section():
     </style>
     """, unsafe_allow_html=True)
     
-    # Fetch camera images from API
+    # Gallery controls (applied server-side)
+    col1, col2, col3 = st.columns([2, 2, 1])
+    
+    with col1:
+        # Filter by camera
+        cameras = get_cameras()
+        camera_names = {cam['name']: cam['camera_id'] for cam in cameras}
+        camera_filter = st.selectbox(
+            "📷 Filter by Camera:",
+            ["All Cameras"] + list(camera_names)
+        )
+    
+    with col2:
+        # Filter by analysis type
+        analysis_types = ["All Types", "WASTE_CLASSIFICATION", "SECURITY", "COLLECTION", "GENERAL"]
+        analysis_filter = st.selectbox("🔍 Filter by Type:", analysis_types)
+    
+    with col3:
+        # Sort options
+        sort_by = st.selectbox("📊 Sort by:", list(GALLERY_SORT_OPTIONS))
+    
+    date_col1, date_col2 = st.columns(2)
+    with date_col1:
+        date_from = st.date_input("📅 From:", value=None)
+    with date_col2:
+        date_to = st.date_input("📅 To:", value=None)
+    
+    params = {'sort': GALLERY_SORT_OPTIONS[sort_by]}
+    if camera_filter != "All Cameras":
+        params['camera_id'] = camera_names[camera_filter]
+    if analysis_filter != "All Types":
+        params['analysis_type'] = analysis_filter
+    if date_from:
+        params['date_from'] = date_from.isoformat()
+    if date_to:
+        params['date_to'] = date_to.isoformat()
+    
+    # Reset the cursor stack whenever the filters change
+    filter_key = json.dumps(params, sort_keys=True)
+    if st.session_state.get('gallery_filter_key') != filter_key:
+        st.session_state['gallery_filter_key'] = filter_key
+        st.session_state['gallery_cursors'] = [None]
+    cursors = st.session_state['gallery_cursors']
+    
+    # Fetch one page of camera images from API
     try:
-        response = requests.get(f"{API_BASE_URL}/camera-images/")
+        request_params = dict(params)
+        if cursors[-1]:
+            request_params['cursor'] = cursors[-1]
+        response = requests.get(f"{API_BASE_URL}/camera-images/", params=request_params, timeout=10)
         if response.status_code == 200:
             images_data = response.json()
             images = images_data.get('results', [])
@@ -1526,59 +1686,17 @@ def camera_gallery_section():
                 st.info("📷 No images captured yet. ESP32-CAM will start sending images automatically.")
                 return
             
-            # Gallery controls
-            col1, col2, col3 = st.columns([2, 2, 1])
-            
-            with col1:
-                # Filter by camera
-                camera_response = requests.get(f"{API_BASE_URL}/cameras/")
-                cameras = []
-                if camera_response.status_code == 200:
-                    cameras_data = camera_response.json()
-                    cameras = cameras_data.get('results', [])
-                
-                camera_filter = st.selectbox(
-                    "📷 Filter by Camera:",
-                    ["All Cameras"] + [cam['name'] for cam in cameras]
-                )
-            
-            with col2:
-                # Filter by analysis type
-                analysis_types = ["All Types", "WASTE_CLASSIFICATION", "SECURITY", "COLLECTION", "GENERAL"]
-                analysis_filter = st.selectbox("🔍 Filter by Type:", analysis_types)
-            
-            with col3:
-                # Sort options
-                sort_by = st.selectbox("📊 Sort by:", ["Newest", "Oldest", "File Size", "Camera"])
-            
-            # Apply filters
-            filtered_images = images
-            if camera_filter != "All Cameras":
-                filtered_images = [img for img in images if img.get('camera_name') == camera_filter]
-            
-            if analysis_filter != "All Types":
-                filtered_images = [img for img in filtered_images if img.get('analysis_type') == analysis_filter]
-            
-            # Apply sorting
-            if sort_by == "Oldest":
-                filtered_images.sort(key=lambda x: x.get('created_at', ''))
-            elif sort_by == "File Size":
-                filtered_images.sort(key=lambda x: x.get('file_size_mb', 0), reverse=True)
-            elif sort_by == "Camera":
-                filtered_images.sort(key=lambda x: x.get('camera_name', ''))
-            else:  # Newest (default)
-                filtered_images.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
             # Display image count
-            st.success(f"📊 Found {len(filtered_images)} images")
+            st.success(f"📊 Page {len(cursors)}: showing {len(images)} images")
             
             # Gallery grid - 4x4 layout
             st.markdown("### 📸 Image Gallery (4x4 Grid)")
             
             # Create 4 columns for the grid
             cols = st.columns(4)
+            media_base_url = API_BASE_URL.replace('/api', '')
             
-            for idx, image in enumerate(filtered_images):
+            for idx, image in enumerate(images):
                 col_idx = idx % 4
                 
                 with cols[col_idx]:
@@ -1597,37 +1715,17 @@ def camera_gallery_section():
                         ">
                         """, unsafe_allow_html=True)
                         
-                        # Image thumbnail with hover effect
-                        try:
-                            if image.get('thumbnail_url'):
-                                # Convert relative URL to full URL
-                                thumbnail_url = f"{API_BASE_URL.replace('/api', '')}{image['thumbnail_url']}"
-                                st.image(
-                                    thumbnail_url, 
-                                    use_container_width=True,
-                                    caption=f"📷 {image.get('camera_name', 'Unknown Camera')}"
-                                )
-                            elif image.get('image_url'):
-                                # Convert relative URL to full URL
-                                image_url = f"{API_BASE_URL.replace('/api', '')}{image['image_url']}"
-                                st.image(
-                                    image_url, 
-                                    use_container_width=True,
-                                    caption=f"📷 {image.get('camera_name', 'Unknown Camera')}"
-                                )
-                            else:
-                                st.error("❌ Image not available")
-                        except Exception as e:
-                            # Fallback to main image if thumbnail fails
-                            if image.get('image_url'):
-                                image_url = f"{API_BASE_URL.replace('/api', '')}{image['image_url']}"
-                                st.image(
-                                    image_url, 
-                                    use_container_width=True,
-                                    caption=f"📷 {image.get('camera_name', 'Unknown Camera')} (Full Image)"
-                                )
-                            else:
-                                st.error("❌ Image not available")
+                        # Thumbnail only - full images are never loaded into the grid
+                        thumbnail_path = image.get('thumbnail_url') or image.get('image_url')
+                        thumbnail_bytes = get_thumbnail_bytes(f"{media_base_url}{thumbnail_path}") if thumbnail_path else None
+                        if thumbnail_bytes:
+                            st.image(
+                                thumbnail_bytes, 
+                                use_container_width=True,
+                                caption=f"📷 {image.get('camera_name', 'Unknown Camera')}"
+                            )
+                        else:
+                            st.error("❌ Image not available")
                         
                         # Compact image info
                         st.markdown(f"**📅 {image.get('created_at', 'Unknown Date')[:10]}**")
@@ -1650,28 +1748,54 @@ def camera_gallery_section():
                             # View full image button
                             if image.get('image_url'):
                                 if st.button("🔍", key=f"view_{image['id']}", help="View full image"):
-                                    full_image_url = f"{API_BASE_URL.replace('/api', '')}{image['image_url']}"
+                                    full_image_url = f"{media_base_url}{image['image_url']}"
                                     st.image(full_image_url, use_container_width=True)
                                     st.success("✅ Full image displayed above")
                         
                         with button_col2:
-                            # Download button
+                            # Download button - bytes are fetched only after the user asks for them
                             if image.get('image_url'):
-                                full_image_url = f"{API_BASE_URL.replace('/api', '')}{image['image_url']}"
-                                st.download_button(
-                                    "⬇️",
-                                    data=requests.get(full_image_url).content,
-                                    file_name=f"camera_image_{image['id']}.jpg",
-                                    mime="image/jpeg",
-                                    key=f"download_{image['id']}",
-                                    help="Download image"
-                                )
+                                download_key = f"download_ready_{image['id']}"
+                                if st.session_state.get(download_key):
+                                    full_image_url = f"{media_base_url}{image['image_url']}"
+                                    try:
+                                        image_bytes = requests.get(full_image_url, timeout=30).content
+                                        st.download_button(
+                                            "💾",
+                                            data=image_bytes,
+                                            file_name=f"camera_image_{image['id']}.jpg",
+                                            mime="image/jpeg",
+                                            key=f"download_{image['id']}",
+                                            help="Save image",
+                                            on_click=st.session_state.pop,
+                                            args=(download_key, None)
+                                        )
+                                    except requests.exceptions.RequestException:
+                                        st.session_state.pop(download_key, None)
+                                        st.error("❌ Download failed")
+                                elif st.button("⬇️", key=f"prepare_{image['id']}", help="Download image"):
+                                    st.session_state[download_key] = True
+                                    st.rerun()
                         
                         st.markdown("</div>", unsafe_allow_html=True)
             
-            # Pagination info
-            if len(images) > len(filtered_images):
-                st.info(f"📄 Showing {len(filtered_images)} of {len(images)} total images")
+            # Cursor pagination controls
+            nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
+            with nav_col1:
+                if len(cursors) > 1 and st.button("⬅️ Previous", key="gallery_prev"):
+                    cursors.pop()
+                    st.rerun()
+            with nav_col3:
+                next_cursor = _extract_cursor(images_data.get('next'))
+                if next_cursor and st.button("Next ➡️", key="gallery_next"):
+                    cursors.append(next_cursor)
+                    st.rerun()
+            with nav_col2:
+                stats = get_thumbnail_cache().stats()
+                st.caption(
+                    f"🗂️ Thumbnail cache: {stats['entries']} items, "
+                    f"{stats['bytes'] / (1024 * 1024):.1f} MB, {stats['hits']} hits / {stats['misses']} misses"
+                )
                 
         else:
             st.error(f"❌ Failed to fetch images: {response.status_code}")
@@ -2374,8 +2498,8 @@ def main():
     # Technical Support Bins Section
     st.header("Technical Support Needed (Real Data)")
     # Find real bins needing technical support
-    now = dt.datetime.utcnow()
     tech_support_bins = []
+    bins_by_id = {b.get('bin_id'): b for b in bins}
     for b in bins:
         reason = None
         severity = None
@@ -2392,20 +2516,18 @@ def main():
         elif b.get('fill_level') == 9999:
             reason = "Unreachable / 404"
             severity = "Critical"
-        else:
-            # Or, if the bin is the one with the old timestamp (simulate 'No Signal')
-            try:
-                last_updated = date_parser.parse(b.get('last_updated'))
-                if (now - last_updated).total_seconds() > 3600 * 24:  # 1 day old
-                    reason = "No Signal"
-                    severity = "Warning"
-            except Exception:
-                pass
         if reason:
             b = b.copy()
             b['Reason'] = reason
             b['Severity'] = severity
             tech_support_bins.append(b)
+    # Sensor anomalies (spikes, stuck values, battery collapse, no signal) are flagged by the server at ingestion
+    for alert in get_sensor_alerts():
+        b = bins_by_id.get(alert['bin_id'], {'bin_id': alert['bin_id'], 'fill_level': alert.get('value'), 'last_updated': None})
+        b = b.copy()
+        b['Reason'] = f"{alert['kind_display']} ({alert['sensor_id']}): {alert['message']}"
+        b['Severity'] = alert['severity'].title()
+        tech_support_bins.append(b)
     if tech_support_bins:
         st.warning(f"{len(tech_support_bins)} bins require technical support:")
         df_tech = pd.DataFrame(tech_support_bins)
@@ -2573,7 +2695,13 @@ def main():
         nearest_dumping_spot = None
         min_distance_to_dumping_spot = float('inf')
         if dumping_spots:
-            for spot in dumping_spots:
+            # Skip spots that are full or forecast to overflow within a day, unless all are
+            def has_room(spot):
+                forecast = spot.get('forecast') or {}
+                days_to_overflow = forecast.get('days_to_overflow')
+                return spot.get('fill_level', 0) < 100 and (days_to_overflow is None or days_to_overflow >= 1)
+            candidate_spots = [spot for spot in dumping_spots if has_room(spot)] or dumping_spots
+            for spot in candidate_spots:
                 dist = calculate_distance(current_location[0], current_location[1], spot['latitude'], spot['longitude'])
                 if dist < min_distance_to_dumping_spot:
                     min_distance_to_dumping_spot = dist
@@ -19,6 +19,61 @@ ALLOWED_HOSTS = os.getenv('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1,192.168.1
 # Optional device upload token for ESP32-CAM uploads
 UPLOAD_DEVICE_TOKEN = os.getenv('UPLOAD_DEVICE_TOKEN', '')
 
+# Worker threads for background thumbnail/derivative generation.
+# Set to 0 to leave images PENDING for `manage.py process_image_derivatives`.
+IMAGE_PIPELINE_WORKERS = int(os.getenv('IMAGE_PIPELINE_WORKERS', '2'))
+
+# Maximum size of a single ESP32-CAM frame, checked before the body is read
+ESP32_UPLOAD_MAX_BYTES = int(os.getenv('ESP32_UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+
+# Near-duplicate handling for periodic camera frames: 'off', 'link' or 'skip'.
+# Byte-identical uploads are always stored once regardless of this setting.
+CAMERA_NEAR_DUPLICATE_POLICY = os.getenv('CAMERA_NEAR_DUPLICATE_POLICY', 'off')
+CAMERA_NEAR_DUPLICATE_WINDOW = int(os.getenv('CAMERA_NEAR_DUPLICATE_WINDOW', '300'))  # seconds
+CAMERA_NEAR_DUPLICATE_DISTANCE = int(os.getenv('CAMERA_NEAR_DUPLICATE_DISTANCE', '4'))  # dHash bits
+
+# Admin bulk image upload limit (Django rejects requests with more files than DATA_UPLOAD_MAX_NUMBER_FILES)
+BULK_UPLOAD_MAX_FILES = int(os.getenv('BULK_UPLOAD_MAX_FILES', '500'))
+DATA_UPLOAD_MAX_NUMBER_FILES = BULK_UPLOAD_MAX_FILES
+
+# Camera image retention tiers for `manage.py apply_image_retention` (days, 0 disables a tier)
+CAMERA_COMPACT_AFTER_DAYS = int(os.getenv('CAMERA_COMPACT_AFTER_DAYS', '14'))
+CAMERA_ARCHIVE_AFTER_DAYS = int(os.getenv('CAMERA_ARCHIVE_AFTER_DAYS', '60'))
+CAMERA_DELETE_AFTER_DAYS = int(os.getenv('CAMERA_DELETE_AFTER_DAYS', '365'))
+CAMERA_COMPACT_QUALITY = int(os.getenv('CAMERA_COMPACT_QUALITY', '70'))
+CAMERA_COMPACT_MAX_DIMENSION = int(os.getenv('CAMERA_COMPACT_MAX_DIMENSION', '1280'))
+
+# Sensor anomaly detection at ingestion (see core/sensor_anomaly.py)
+SENSOR_HEARTBEAT_MIN_SECONDS = int(os.getenv('SENSOR_HEARTBEAT_MIN_SECONDS', '300'))  # never flag a silence shorter than this
+SENSOR_HEARTBEAT_FACTOR = float(os.getenv('SENSOR_HEARTBEAT_FACTOR', '5'))  # x the sensor's usual reporting interval
+SENSOR_ALERT_EVENT_TTL_HOURS = int(os.getenv('SENSOR_ALERT_EVENT_TTL_HOURS', '24'))  # spike/jump/battery alerts stay open this long
+
+# Collection (bin emptied) detection from sensor data (see core/collection_events.py)
+COLLECTION_MIN_DROP = float(os.getenv('COLLECTION_MIN_DROP', '30'))  # fill points lost between two readings
+COLLECTION_MAX_AFTER = float(os.getenv('COLLECTION_MAX_AFTER', '20'))  # fill level the bin must be down to
+COLLECTION_TRUCK_RADIUS_M = float(os.getenv('COLLECTION_TRUCK_RADIUS_M', '100'))  # truck counted as at the bin
+COLLECTION_TRUCK_WINDOW_MINUTES = int(os.getenv('COLLECTION_TRUCK_WINDOW_MINUTES', '10'))
+
+# Truck GPS tracks (see core/truck_tracks.py and `manage.py compact_truck_tracks`)
+TRUCK_TRACK_COMPACT_AFTER_DAYS = int(os.getenv('TRUCK_TRACK_COMPACT_AFTER_DAYS', '7'))  # simplify tracks older than this
+TRUCK_TRACK_TOLERANCE_M = float(os.getenv('TRUCK_TRACK_TOLERANCE_M', '5'))  # Douglas-Peucker tolerance in meters
+
+# Geofences around bins and dumping spots (see core/geofence.py, `geofence` job of run_services)
+GEOFENCE_BIN_RADIUS_M = float(os.getenv('GEOFENCE_BIN_RADIUS_M', '30'))
+GEOFENCE_SPOT_RADIUS_M = float(os.getenv('GEOFENCE_SPOT_RADIUS_M', '150'))
+GEOFENCE_DWELL_SECONDS = int(os.getenv('GEOFENCE_DWELL_SECONDS', '60'))  # stay this long to count as a stop
+GEOFENCE_CELL_SIZE_M = float(os.getenv('GEOFENCE_CELL_SIZE_M', '250'))  # spatial grid cell, at least the largest radius
+GEOFENCE_ID_OVERLAP = int(os.getenv('GEOFENCE_ID_OVERLAP', '1000'))  # fix ids below the watermark rechecked for late commits
+
+# Dumping-spot load accounting (see core/dumping_loads.py)
+DUMPING_BIN_VOLUME = float(os.getenv('DUMPING_BIN_VOLUME', '1.0'))  # a full bin, in dumping-spot capacity units
+DUMPING_UNLOAD_LOOKBACK_HOURS = int(os.getenv('DUMPING_UNLOAD_LOOKBACK_HOURS', '24'))  # collections a truck can still be carrying
+DUMPING_FORECAST_DAYS = int(os.getenv('DUMPING_FORECAST_DAYS', '7'))  # unloads used for the overflow forecast
+
+# Rule engine sinks for the bin updater (see core/alert_rules.py); alerts are always logged
+ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL', '')  # e.g. http://localhost:8765/ for `manage.py alert_webhook_stub`
+ALERT_RULES_DB = os.getenv('ALERT_RULES_DB', 'True').lower() == 'true'  # store alerts as RuleAlert rows
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -38,6 +93,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.session_middleware.SessionRefreshMiddleware',  # Sliding session expiry with coalesced writes
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -60,7 +116,10 @@ SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False  # Expiry still slides, see core/session_middleware.py
+SESSION_MIN_REMAINING_SECONDS = int(os.getenv('SESSION_MIN_REMAINING_SECONDS', '3000'))  # resave once less than this is left
+# django.contrib.sessions.backends.db (default), cached_db, cache or signed_cookies
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
 
 # Password Validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -109,6 +168,18 @@ AXES_LOCK_OUT_BY_IP_AND_USERNAME = True
 AXES_RESET_ON_SUCCESS = True
 AXES_VERBOSE = True
 
+# Failed-login throttling in core.auth_backends (sliding window, see core/login_throttle.py)
+LOGIN_THROTTLE_WINDOW_SECONDS = 3600  # 1 hour
+LOGIN_IP_ATTEMPT_LIMIT = 10
+LOGIN_USER_ATTEMPT_LIMIT = 5
+LOGIN_IP_BLOCK_SECONDS = 3600  # 1 hour
+LOGIN_USER_LOCK_SECONDS = 1800  # 30 minutes
+
+# Login audit log (LoginAttempt table, see core/login_audit.py)
+LOGIN_AUDIT_BATCH_SIZE = 20  # attempts buffered per insert
+LOGIN_AUDIT_FLUSH_SECONDS = 2  # longest an attempt waits in the buffer
+LOGIN_AUDIT_RETENTION_DAYS = 90
+
 # Defender Settings (Advanced Security) - temporarily disabled
 # DEFENDER_ENABLED = True
 # DEFENDER_LOGIN_FAILURE_LIMIT = 5
@@ -182,6 +253,11 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
+        'OPTIONS': {
+            # The default of 300 culls login throttle counters and their index
+            # (about 4 entries per failing IP or username, see core/login_throttle.py)
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '50000')),
+        },
     }
 }
 